@@ -572,6 +572,8 @@ PYBIND11_MODULE(core_noavx, m) {
       .def("_place", [](Tensor &self) { return self.place(); })
       .def("_dtype", [](Tensor &self) { return self.type(); })
       .def("_share_data_with", &Tensor::ShareDataWith)
+      .def("_holder_use_count",
+           [](const Tensor &self) { return self.Holder().use_count(); })
       .def("__getitem__", PySliceTensor, py::return_value_policy::reference)
       .def("__str__", [](const Tensor &self) {
         std::stringstream ostr;
@@ -665,6 +667,15 @@ PYBIND11_MODULE(core_noavx, m) {
 
         )DOC")
       .def("__array__", [](Tensor &self) { return TensorToPyArray(self); })
+      .def("_as_numpy_view",
+           [](py::object &self) {
+             return TensorToPyArrayView(self.cast<const LoDTensor &>(), self);
+           },
+           R"DOC(
+           Return a read-only numpy.ndarray sharing the CPU buffer of this
+           LoDTensor without copy. The array keeps this LoDTensor alive, and
+           it is invalidated if the LoDTensor is set or resized afterwards.
+           )DOC")
       .def("__init__",
            [](LoDTensor &instance, const std::vector<std::vector<size_t>>
                                        &recursive_sequence_lengths) {
@@ -1038,6 +1049,17 @@ All parameter, weight, gradient are variables in Paddle.
            R"DOC(
            Delete all sub-scopes of the current scope.
            )DOC")
+      .def("_drop_kid",
+           [](Scope &self, Scope *kid) {
+             if (self.HasKid(kid)) {
+               self.DeleteScope(kid);
+             }
+           },
+           py::arg("kid"),
+           R"DOC(
+           Delete the given sub-scope of the current scope. Nothing is done
+           if :code:`kid` is not a sub-scope of the current scope.
+           )DOC")
       .def("_kids", &Scope::kids);
 
   m.def("Scope",
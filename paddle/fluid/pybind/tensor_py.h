@@ -554,5 +554,40 @@ inline py::array TensorToPyArray(const framework::Tensor &tensor,
 #endif
 }
 
+// Share the CPU buffer of the tensor with a read-only numpy array instead of
+// copying it. The array holds a reference to `owner`, the Python object of the
+// tensor, so the buffer stays valid as long as the array is alive and the
+// tensor is not resized or reset.
+inline py::array TensorToPyArrayView(const framework::Tensor &tensor,
+                                     py::handle owner) {
+  if (!tensor.IsInitialized()) {
+    return py::array();
+  }
+  PADDLE_ENFORCE_EQ(
+      platform::is_cpu_place(tensor.place()), true,
+      platform::errors::InvalidArgument(
+          "Only the tensor on CPUPlace can be shared with numpy array, "
+          "but received tensor on %s.",
+          tensor.place()));
+  const auto &tensor_dims = tensor.dims();
+  size_t sizeof_dtype = framework::SizeOfType(tensor.type());
+
+  std::vector<size_t> py_dims(tensor_dims.size());
+  std::vector<size_t> py_strides(tensor_dims.size());
+
+  size_t numel = 1;
+  for (int i = tensor_dims.size() - 1; i >= 0; --i) {
+    py_dims[i] = (size_t)tensor_dims[i];
+    py_strides[i] = sizeof_dtype * numel;
+    numel *= py_dims[i];
+  }
+
+  std::string py_dtype_str = details::TensorDTypeToPyDTypeStr(tensor.type());
+  py::array py_arr(py::dtype(py_dtype_str.c_str()), py_dims, py_strides,
+                   tensor.data<void>(), owner);
+  py_arr.attr("setflags")(py::arg("write") = false);
+  return py_arr;
+}
+
 }  // namespace pybind
 }  // namespace paddle
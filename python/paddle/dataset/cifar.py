@@ -52,22 +52,29 @@ def reader_creator(filename, sub_name, cycle=False):
             six.b('labels'), batch.get(six.b('fine_labels'), None))
         assert labels is not None
         for sample, label in six.moves.zip(data, labels):
-            yield (sample / 255.0).astype(numpy.float32), int(label)
+            yield sample, int(label)
+
+    def parse():
+        with tarfile.open(filename, mode='r') as f:
+            names = (each_item.name for each_item in f
+                     if sub_name in each_item.name)
+
+            for name in names:
+                if six.PY2:
+                    batch = pickle.load(f.extractfile(name))
+                else:
+                    batch = pickle.load(f.extractfile(name), encoding='bytes')
+                for item in read_batch(batch):
+                    yield item
+
+    # the uint8 pixels are cached, which is 4 times smaller than float32
+    samples = paddle.dataset.common.cached_reader(
+        parse, 'cifar', sub_name, sources=[filename])
 
     def reader():
         while True:
-            with tarfile.open(filename, mode='r') as f:
-                names = (each_item.name for each_item in f
-                         if sub_name in each_item.name)
-
-                for name in names:
-                    if six.PY2:
-                        batch = pickle.load(f.extractfile(name))
-                    else:
-                        batch = pickle.load(
-                            f.extractfile(name), encoding='bytes')
-                    for item in read_batch(batch):
-                        yield item
+            for sample, label in samples():
+                yield (sample / 255.0).astype(numpy.float32), label
 
             if not cycle:
                 break
@@ -142,5 +149,5 @@ def test10(cycle=False):
 
 
 def fetch():
-    paddle.dataset.common.download(CIFAR10_URL, 'cifar', CIFAR10_MD5)
-    paddle.dataset.common.download(CIFAR100_URL, 'cifar', CIFAR100_MD5)
+    paddle.dataset.common.prefetch([(CIFAR10_URL, 'cifar', CIFAR10_MD5),
+                                    (CIFAR100_URL, 'cifar', CIFAR100_MD5)])
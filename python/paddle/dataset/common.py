@@ -18,13 +18,20 @@ import requests
 import hashlib
 import os
 import errno
-import shutil
 import six
 import sys
 import importlib
 import paddle.dataset
 import six.moves.cPickle as pickle
 import glob
+import itertools
+import mmap
+import struct
+import tempfile
+import time
+import zlib
+import numpy as np
+from multiprocessing.pool import ThreadPool
 
 __all__ = [
     'DATA_HOME',
@@ -32,6 +39,10 @@ __all__ = [
     'md5file',
     'split',
     'cluster_files_reader',
+    'RecordWriter',
+    'RecordReader',
+    'prefetch',
+    'cached_reader',
 ]
 
 DATA_HOME = os.path.expanduser('~/.cache/paddle/dataset')
@@ -44,7 +55,7 @@ DATA_HOME = os.path.expanduser('~/.cache/paddle/dataset')
 # catching returned errors.
 def must_mkdirs(path):
     try:
-        os.makedirs(DATA_HOME)
+        os.makedirs(path)
     except OSError as exc:
         if exc.errno != errno.EEXIST:
             raise
@@ -53,130 +64,530 @@ def must_mkdirs(path):
 
 must_mkdirs(DATA_HOME)
 
+_DOWNLOAD_CHUNK_SIZE = 1 << 20
+_DOWNLOAD_RETRY_LIMIT = 3
+_DOWNLOAD_RETRY_SLEEP_SECOND = 1
+
 
 def md5file(fname):
     hash_md5 = hashlib.md5()
     f = open(fname, "rb")
-    for chunk in iter(lambda: f.read(4096), b""):
+    for chunk in iter(lambda: f.read(_DOWNLOAD_CHUNK_SIZE), b""):
         hash_md5.update(chunk)
     f.close()
     return hash_md5.hexdigest()
 
 
+def _file_stamp(filename, md5sum):
+    st = os.stat(filename)
+    return "%s %d %d" % (md5sum, st.st_size, int(st.st_mtime))
+
+
+def _is_verified(filename, md5sum):
+    """
+    Whether the md5 of the file is md5sum. The result is remembered in
+    filename + '.md5' with the size and mtime of the file, so that the file
+    is read only once.
+    """
+    if not os.path.exists(filename):
+        return False
+    stamp_file = filename + '.md5'
+    if os.path.exists(stamp_file):
+        with open(stamp_file) as f:
+            if f.read().strip() == _file_stamp(filename, md5sum):
+                return True
+    file_md5 = md5file(filename)
+    if file_md5 != md5sum:
+        sys.stderr.write("file %s  md5 %s\n" % (file_md5, md5sum))
+        return False
+    with open(stamp_file, 'w') as f:
+        f.write(_file_stamp(filename, md5sum))
+    return True
+
+
+def _open_url(url):
+    """
+    Return the content length of url, None if unknown, and an iterator of
+    the chunks of its content. Both http(s):// and file:// urls are
+    supported.
+    """
+    if url.startswith('file://'):
+        path = six.moves.urllib.request.url2pathname(url[len('file://'):])
+        f = open(path, 'rb')
+
+        def chunks():
+            with f:
+                for chunk in iter(lambda: f.read(_DOWNLOAD_CHUNK_SIZE), b""):
+                    yield chunk
+
+        return os.path.getsize(path), chunks()
+
+    r = requests.get(url, stream=True, timeout=60)
+    r.raise_for_status()
+    total_length = r.headers.get('content-length')
+    if total_length is not None:
+        total_length = int(total_length)
+    return total_length, r.iter_content(chunk_size=_DOWNLOAD_CHUNK_SIZE)
+
+
+def _fetch(url, filename, md5sum):
+    """
+    Download url to filename, computing the md5 while the data streams in.
+    The data is written to a temporary file, which is moved to filename
+    only if its md5 is md5sum.
+    """
+    total_length, chunks = _open_url(url)
+    hash_md5 = hashlib.md5()
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(filename),
+        prefix=os.path.basename(filename) + '.',
+        suffix='.part')
+    try:
+        size = 0
+        log_index = 0
+        with os.fdopen(fd, 'wb') as f:
+            for data in chunks:
+                hash_md5.update(data)
+                f.write(data)
+                size += len(data)
+                if total_length and size * 20 // total_length > log_index:
+                    log_index = size * 20 // total_length
+                    sys.stderr.write(".")
+        if hash_md5.hexdigest() != md5sum:
+            sys.stderr.write(
+                "file %s  md5 %s\n" % (hash_md5.hexdigest(), md5sum))
+            return False
+        # mkstemp creates the file readable only by the owner
+        os.chmod(tmp_path, 0o644)
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmp_path, filename)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    with open(filename + '.md5', 'w') as f:
+        f.write(_file_stamp(filename, md5sum))
+    return True
+
+
 def download(url, module_name, md5sum, save_name=None):
     dirname = os.path.join(DATA_HOME, module_name)
-    if not os.path.exists(dirname):
-        os.makedirs(dirname)
+    must_mkdirs(dirname)
 
     filename = os.path.join(dirname,
                             url.split('/')[-1]
                             if save_name is None else save_name)
 
-    if os.path.exists(filename) and md5file(filename) == md5sum:
+    if _is_verified(filename, md5sum):
         return filename
 
-    retry = 0
-    retry_limit = 3
-    while not (os.path.exists(filename) and md5file(filename) == md5sum):
-        if os.path.exists(filename):
-            sys.stderr.write("file %s  md5 %s\n" % (md5file(filename), md5sum))
-        if retry < retry_limit:
-            retry += 1
-        else:
-            raise RuntimeError("Cannot download {0} within retry limit {1}".
-                               format(url, retry_limit))
+    for retry in six.moves.range(_DOWNLOAD_RETRY_LIMIT):
+        if retry > 0:
+            time.sleep(_DOWNLOAD_RETRY_SLEEP_SECOND * 2**(retry - 1))
         sys.stderr.write("Cache file %s not found, downloading %s \n" %
                          (filename, url))
         sys.stderr.write("Begin to download\n")
-        r = requests.get(url, stream=True)
-        total_length = r.headers.get('content-length')
-
-        if total_length is None:
-            with open(filename, 'wb') as f:
-                shutil.copyfileobj(r.raw, f)
-        else:
-            with open(filename, 'wb') as f:
-                chunk_size = 4096
-                total_length = int(total_length)
-                total_iter = total_length / chunk_size + 1
-                log_interval = total_iter / 20 if total_iter > 20 else 1
-                log_index = 0
-                for data in r.iter_content(chunk_size=chunk_size):
-                    if six.PY2:
-                        data = six.b(data)
-                    f.write(data)
-                    log_index += 1
-                    if log_index % log_interval == 0:
-                        sys.stderr.write(".")
-                    sys.stdout.flush()
-    sys.stderr.write("\nDownload finished\n")
-    sys.stdout.flush()
-    return filename
-
-
-def fetch_all():
+        try:
+            if _fetch(url, filename, md5sum):
+                sys.stderr.write("\nDownload finished\n")
+                sys.stdout.flush()
+                return filename
+        except (IOError, OSError, requests.RequestException) as e:
+            sys.stderr.write("Download %s failed: %s\n" % (url, e))
+    raise RuntimeError("Cannot download {0} within retry limit {1}".format(
+        url, _DOWNLOAD_RETRY_LIMIT))
+
+
+def prefetch(downloads, num_workers=4):
+    """
+    Download several files concurrently.
+
+    .. code-block:: python
+
+        prefetch([(cifar.CIFAR10_URL, 'cifar', cifar.CIFAR10_MD5),
+                  (imdb.URL, 'imdb', imdb.MD5)])
+
+    :param downloads: the arguments of download, as (url, module_name,
+                      md5sum) or (url, module_name, md5sum, save_name).
+    :type downloads: list
+    :param num_workers: the number of the concurrent downloads.
+    :type num_workers: int
+    :return: the downloaded file names, in the order of downloads.
+    :rtype: list
+    """
+    pool = ThreadPool(num_workers)
+    try:
+        return pool.map(lambda args: download(*args), downloads)
+    finally:
+        pool.close()
+        pool.join()
+
+
+def fetch_all(num_workers=4):
+    fetchers = []
     for module_name in [
             x for x in dir(paddle.dataset) if not x.startswith("__")
     ]:
-        if "fetch" in dir(
-                importlib.import_module("paddle.dataset.%s" % module_name)):
-            getattr(
-                importlib.import_module("paddle.dataset.%s" % module_name),
-                "fetch")()
+        module = importlib.import_module("paddle.dataset.%s" % module_name)
+        if "fetch" in dir(module):
+            fetchers.append(getattr(module, "fetch"))
+    pool = ThreadPool(num_workers)
+    try:
+        pool.map(lambda fetch: fetch(), fetchers)
+    finally:
+        pool.close()
+        pool.join()
 
 
-def split(reader, line_count, suffix="%05d.pickle", dumper=pickle.dump):
+def cached_reader(reader, module_name, cache_name, sources=(), args=()):
+    """
+    Cache the samples of a reader creator in a record file under
+    DATA_HOME/module_name, so that a dataset is parsed only once across runs.
+
+    The samples are written to the cache while they are read for the first
+    time, and read from the cache afterwards. The cache is identified by the
+    names, sizes and mtimes of the source files and by args, so a new cache
+    is built if any of them changes.
+
+    :param reader: the reader creator parsing the dataset, whose samples
+                   should be picklable.
+    :type reader: callable
+    :param module_name: the name of the dataset module.
+    :type module_name: str
+    :param cache_name: the name of the cache.
+    :type cache_name: str
+    :param sources: the files the samples are parsed from.
+    :type sources: list
+    :param args: the arguments affecting the samples, which should be
+                 strings or numbers.
+    :type args: list
+    :return: the reader creator of the cached samples.
+    :rtype: callable
+    """
+
+    def cached():
+        key = [(os.path.basename(fn), os.path.getsize(fn),
+                int(os.path.getmtime(fn))) for fn in sources] + list(args)
+        key = hashlib.md5(repr(key).encode('utf-8')).hexdigest()[:16]
+        path = os.path.join(DATA_HOME, module_name,
+                            '%s-%s.record' % (cache_name, key))
+        if os.path.exists(path):
+            with RecordReader(path) as f:
+                for sample in f:
+                    yield sample
+            return
+
+        must_mkdirs(os.path.dirname(path))
+        with RecordWriter(path) as writer:
+            for sample in reader():
+                writer.write(sample)
+                yield sample
+
+    return cached
+
+
+# The layout of a record file:
+#
+#   header: magic, format version, compressor id
+#   records: the serialized records, one after another
+#   index: the offsets of the records and of the end of the last record,
+#          as little-endian uint64
+#   footer: record count, offset of the index, magic
+_RECORD_MAGIC = b'PDRF'
+_RECORD_VERSION = 1
+_RECORD_HEADER = struct.Struct('<4sBB')
+_RECORD_FOOTER = struct.Struct('<QQ4s')
+_RECORD_COMPRESSORS = {None: 0, 'zlib': 1}
+_RECORD_INDEX_DTYPE = np.dtype('<u8')
+_RECORD_INDEX_CHUNK = 65536
+
+
+def _pickle_dumps(obj):
+    return pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+
+
+def _is_record_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(_RECORD_MAGIC)) == _RECORD_MAGIC
+
+
+class RecordWriter(object):
+    """
+    Write objects into a record file one by one, without holding them in
+    memory. The records are indexed by their offsets, so that RecordReader
+    can read any of them without reading the file from the beginning.
+
+    The file is written to a temporary file next to path, and renamed to
+    path when the writer is closed, so a record file is always complete.
+
+    .. code-block:: python
+
+        with RecordWriter('train-00000.record', compressor='zlib') as writer:
+            for sample in reader():
+                writer.write(sample)
+
+    :param path: the path of the record file.
+    :type path: str
+    :param compressor: None or 'zlib'. The records are compressed one by one,
+                       so that they can still be read randomly.
+    :type compressor: str
+    :param dumps: a callable function that serializes an object to bytes.
+                  Default is cPickle.dumps with the highest protocol.
+    :type dumps: callable
+    """
+
+    def __init__(self, path, compressor=None, dumps=None):
+        if compressor not in _RECORD_COMPRESSORS:
+            raise ValueError("compressor should be one of %s, but got %s" %
+                             (list(_RECORD_COMPRESSORS.keys()), compressor))
+        if dumps is not None and not callable(dumps):
+            raise TypeError("dumps should be callable.")
+        self.path = path
+        self._compressor = compressor
+        self._dumps = dumps or _pickle_dumps
+        fd, self._tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(path)),
+            prefix=os.path.basename(path) + '.',
+            suffix='.tmp')
+        self._file = os.fdopen(fd, 'wb')
+        self._file.write(
+            _RECORD_HEADER.pack(_RECORD_MAGIC, _RECORD_VERSION,
+                                _RECORD_COMPRESSORS[compressor]))
+        self._pos = _RECORD_HEADER.size
+        self._offsets = []
+        self._index_chunks = []
+        self._count = 0
+
+    def write(self, obj):
+        """
+        Append an object to the record file.
+        """
+        data = self._dumps(obj)
+        if self._compressor == 'zlib':
+            data = zlib.compress(data)
+        self._offsets.append(self._pos)
+        if len(self._offsets) == _RECORD_INDEX_CHUNK:
+            self._index_chunks.append(
+                np.array(self._offsets, dtype=_RECORD_INDEX_DTYPE))
+            self._offsets = []
+        self._file.write(data)
+        self._pos += len(data)
+        self._count += 1
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        """
+        Write the index and move the file to its path.
+        """
+        if self._file is None:
+            return
+        self._offsets.append(self._pos)
+        self._index_chunks.append(
+            np.array(self._offsets, dtype=_RECORD_INDEX_DTYPE))
+        for chunk in self._index_chunks:
+            self._file.write(chunk.tobytes())
+        self._file.write(
+            _RECORD_FOOTER.pack(self._count, self._pos, _RECORD_MAGIC))
+        self._file.close()
+        self._file = None
+        self._offsets = self._index_chunks = None
+        # mkstemp creates the file readable only by the owner
+        os.chmod(self._tmp_path, 0o644)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        os.rename(self._tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        elif self._file is not None:
+            # leave no partial record file behind
+            self._file.close()
+            self._file = None
+            os.remove(self._tmp_path)
+
+
+class RecordReader(object):
+    """
+    Read the record file written by RecordWriter. The file is memory mapped
+    and only the index is loaded, a record is read and deserialized when it
+    is accessed, by index or by iterating.
+
+    .. code-block:: python
+
+        with RecordReader('train-00000.record') as reader:
+            print(len(reader), reader[0], reader[-1])
+            for sample in reader.read(start=100):
+                pass
+
+    :param path: the path of the record file.
+    :type path: str
+    :param loads: a callable function that deserializes an object from bytes.
+                  Default is cPickle.loads.
+    :type loads: callable
+    """
+
+    def __init__(self, path, loads=None):
+        if loads is not None and not callable(loads):
+            raise TypeError("loads should be callable.")
+        self.path = path
+        self._loads = loads or pickle.loads
+        self._file = open(path, 'rb')
+        try:
+            self._mmap = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            size = len(self._mmap)
+            if size < _RECORD_HEADER.size + _RECORD_FOOTER.size:
+                raise ValueError("%s is not a record file." % path)
+            magic, version, compressor = _RECORD_HEADER.unpack_from(
+                self._mmap, 0)
+            count, index_offset, end_magic = _RECORD_FOOTER.unpack_from(
+                self._mmap, size - _RECORD_FOOTER.size)
+            if magic != _RECORD_MAGIC or end_magic != _RECORD_MAGIC:
+                raise ValueError("%s is not a record file." % path)
+            if version != _RECORD_VERSION:
+                raise ValueError("Unsupported record file version %d of %s." %
+                                 (version, path))
+        except Exception:
+            self.close()
+            raise
+        self._decompress = zlib.decompress if compressor == _RECORD_COMPRESSORS[
+            'zlib'] else None
+        index_end = index_offset + (count + 1) * _RECORD_INDEX_DTYPE.itemsize
+        self._offsets = np.frombuffer(
+            self._mmap[index_offset:index_end], dtype=_RECORD_INDEX_DTYPE)
+        self._count = count
+
+    def __len__(self):
+        return self._count
+
+    def _read(self, index):
+        data = self._mmap[int(self._offsets[index]):int(self._offsets[index +
+                                                                      1])]
+        if self._decompress is not None:
+            data = self._decompress(data)
+        return self._loads(data)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._count
+        if index < 0 or index >= self._count:
+            raise IndexError("record index out of range")
+        return self._read(index)
+
+    def read(self, start=0, end=None):
+        """
+        Yield the records in [start, end) in order.
+        """
+        end = self._count if end is None else min(end, self._count)
+        for index in six.moves.range(max(start, 0), end):
+            yield self._read(index)
+
+    def __iter__(self):
+        return self.read()
+
+    def close(self):
+        if getattr(self, '_mmap', None) is not None:
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def split(reader,
+          line_count,
+          suffix="%05d.record",
+          dumper=None,
+          compressor=None):
     """
     you can call the function as:
 
     split(paddle.dataset.cifar.train10(), line_count=1000,
-        suffix="imikolov-train-%05d.pickle")
+        suffix="imikolov-train-%05d.record")
 
     the output files as:
 
-    |-imikolov-train-00000.pickle
-    |-imikolov-train-00001.pickle
+    |-imikolov-train-00000.record
+    |-imikolov-train-00001.record
     |- ...
-    |-imikolov-train-00480.pickle
+    |-imikolov-train-00480.record
+
+    The files are record files written by RecordWriter, which can be read
+    by cluster_files_reader or RecordReader. If dumper is given, each file is
+    instead written by dumper as a list of the samples.
 
     :param reader: is a reader creator
     :param line_count: line count for each file
     :param suffix: the suffix for the output files, should contain "%d"
-                means the id for each file. Default is "%05d.pickle"
+                means the id for each file. Default is "%05d.record"
     :param dumper: is a callable function that dump object to file, this
                 function will be called as dumper(obj, f) and obj is the object
-                will be dumped, f is a file object. Default is cPickle.dump.
+                will be dumped, f is a file object. Default is None, which
+                means writing record files.
+    :param compressor: the compressor of the record files, None or 'zlib'.
     """
-    if not callable(dumper):
-        raise TypeError("dumper should be callable.")
-    lines = []
-    indx_f = 0
-    for i, d in enumerate(reader()):
-        lines.append(d)
-        if i >= line_count and i % line_count == 0:
+    if dumper is not None:
+        if not callable(dumper):
+            raise TypeError("dumper should be callable.")
+        lines = []
+        indx_f = 0
+        for i, d in enumerate(reader()):
+            lines.append(d)
+            if i >= line_count and i % line_count == 0:
+                with open(suffix % indx_f, "w") as f:
+                    dumper(lines, f)
+                    lines = []
+                    indx_f += 1
+        if lines:
             with open(suffix % indx_f, "w") as f:
                 dumper(lines, f)
-                lines = []
-                indx_f += 1
-    if lines:
-        with open(suffix % indx_f, "w") as f:
-            dumper(lines, f)
+        return
+
+    writer = None
+    for i, d in enumerate(reader()):
+        if i % line_count == 0:
+            if writer is not None:
+                writer.close()
+            writer = RecordWriter(
+                suffix % (i // line_count), compressor=compressor)
+        writer.write(d)
+    if writer is not None:
+        writer.close()
 
 
 def cluster_files_reader(files_pattern,
                          trainer_count,
                          trainer_id,
-                         loader=pickle.load):
+                         loader=pickle.load,
+                         offset=0):
     """
     Create a reader that yield element from the given files, select
     a file set according trainer count and trainer_id
 
+    If all the files are record files, the records instead of the files are
+    partitioned: each trainer reads an even, contiguous range of the records
+    of the sorted files, and only the records in its range are read.
+
     :param files_pattern: the files which generating by split(...)
     :param trainer_count: total trainer count
     :param trainer_id: the trainer rank id
     :param loader: is a callable function that load object from file, this
                 function will be called as loader(f) and f is a file object.
-                Default is cPickle.load
+                Default is cPickle.load. It is not used by record files.
+    :param offset: the number of the elements of this trainer to skip, to
+                resume the reading from the middle.
     """
 
     def reader():
@@ -184,15 +595,46 @@ def cluster_files_reader(files_pattern,
             raise TypeError("loader should be callable.")
         file_list = glob.glob(files_pattern)
         file_list.sort()
+        if file_list and all(_is_record_file(fn) for fn in file_list):
+            for record in _cluster_records_reader(file_list, trainer_count,
+                                                  trainer_id, offset):
+                yield record
+            return
+
         my_file_list = []
         for idx, fn in enumerate(file_list):
             if idx % trainer_count == trainer_id:
                 print("append file: %s" % fn)
                 my_file_list.append(fn)
-        for fn in my_file_list:
-            with open(fn, "r") as f:
-                lines = loader(f)
-                for line in lines:
-                    yield line
+        for line in itertools.islice(
+                _files_reader(my_file_list, loader), offset, None):
+            yield line
 
     return reader
+
+
+def _files_reader(file_list, loader):
+    for fn in file_list:
+        with open(fn, "r") as f:
+            lines = loader(f)
+            for line in lines:
+                yield line
+
+
+def _cluster_records_reader(file_list, trainer_count, trainer_id, offset):
+    counts = []
+    for fn in file_list:
+        with RecordReader(fn) as f:
+            counts.append(len(f))
+    total = sum(counts)
+    begin = total * trainer_id // trainer_count + offset
+    end = total * (trainer_id + 1) // trainer_count
+
+    file_begin = 0
+    for fn, count in zip(file_list, counts):
+        file_end = file_begin + count
+        if file_begin < end and begin < file_end:
+            with RecordReader(fn) as f:
+                for record in f.read(begin - file_begin, end - file_begin):
+                    yield record
+        file_begin = file_end
@@ -33,17 +33,14 @@ from __future__ import print_function
 
 import itertools
 import functools
-from .common import download
+from .common import download, cached_reader, prefetch
 import tarfile
 import scipy.io as scio
 from paddle.dataset.image import *
 from paddle.reader import *
-from paddle import compat as cpt
 import os
 import numpy as np
 from multiprocessing import cpu_count
-import six
-from six.moves import cPickle as pickle
 __all__ = ['train', 'test', 'valid']
 
 DATA_URL = 'http://paddlemodels.bj.bcebos.com/flowers/102flowers.tgz'
@@ -84,9 +81,9 @@ def reader_creator(data_file,
                    use_xmap=True,
                    cycle=False):
     '''
-    1. read images from tar file and
-        merge images into batch files in 102flowers.tgz_batch/
-    2. get a reader to read sample from batch file
+    1. read images from tar file and cache them in a record file
+        in DATA_HOME/flowers/ for the first time
+    2. get a reader to read sample from the record file
 
     :param data_file: downloaded data file
     :type data_file: string
@@ -107,33 +104,30 @@ def reader_creator(data_file,
     :return: data reader
     :rtype: callable
     '''
-    labels = scio.loadmat(label_file)['labels'][0]
-    indexes = scio.loadmat(setid_file)[dataset_name][0]
-    img2label = {}
-    for i in indexes:
-        img = "jpg/image_%05d.jpg" % i
-        img2label[img] = labels[i - 1]
-    file_list = batch_images_from_tar(data_file, dataset_name, img2label)
+
+    def parse():
+        labels = scio.loadmat(label_file)['labels'][0]
+        indexes = scio.loadmat(setid_file)[dataset_name][0]
+        img2label = {}
+        for i in indexes:
+            img = "jpg/image_%05d.jpg" % i
+            img2label[img] = labels[i - 1]
+        with tarfile.open(data_file) as tf:
+            for mem in tf.getmembers():
+                if mem.name in img2label:
+                    yield tf.extractfile(mem).read(), int(
+                        img2label[mem.name]) - 1
+
+    samples = cached_reader(
+        parse,
+        'flowers',
+        dataset_name,
+        sources=[data_file, label_file, setid_file])
 
     def reader():
         while True:
-            with open(file_list, 'r') as f_list:
-                for file in f_list:
-                    file = file.strip()
-                    batch = None
-                    with open(file, 'rb') as f:
-                        if six.PY2:
-                            batch = pickle.load(f)
-                        else:
-                            batch = pickle.load(f, encoding='bytes')
-
-                        if six.PY3:
-                            batch = cpt.to_text(batch)
-                        data_batch = batch['data']
-                        labels_batch = batch['label']
-                        for sample, label in six.moves.zip(data_batch,
-                                                           labels_batch):
-                            yield sample, int(label) - 1
+            for sample in samples():
+                yield sample
             if not cycle:
                 break
 
@@ -225,6 +219,6 @@ def valid(mapper=test_mapper, buffered_size=1024, use_xmap=True):
 
 
 def fetch():
-    download(DATA_URL, 'flowers', DATA_MD5)
-    download(LABEL_URL, 'flowers', LABEL_MD5)
-    download(SETID_URL, 'flowers', SETID_MD5)
+    prefetch([(DATA_URL, 'flowers', DATA_MD5), (LABEL_URL, 'flowers',
+                                                LABEL_MD5),
+              (SETID_URL, 'flowers', SETID_MD5)])
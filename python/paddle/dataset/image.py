@@ -57,11 +57,12 @@ else:
 import os
 import tarfile
 import six.moves.cPickle as pickle
+from multiprocessing.pool import ThreadPool
 
 __all__ = [
     "load_image_bytes", "load_image", "resize_short", "to_chw", "center_crop",
     "random_crop", "left_right_flip", "simple_transform", "load_and_transform",
-    "batch_images_from_tar"
+    "batch_images_from_tar", "BatchTransformer"
 ]
 
 
@@ -414,3 +415,154 @@ def load_and_transform(filename,
     im = load_image(filename, is_color)
     im = simple_transform(im, resize_size, crop_size, is_train, is_color, mean)
     return im
+
+
+class BatchTransformer(object):
+    """
+    Transform a batch of images at a time with the operations of
+    `simple_transform`, and return them as one float32 array.
+
+    The images are decoded, resized and cropped by a pool of worker threads
+    straight into a preallocated uint8 NHWC buffer, which is reused by the
+    following batches. The flipping is then done in place on the buffer for
+    the selected images, and the transposition to NCHW, the conversion to
+    float32 and the mean subtraction are done by one vectorized operation
+    over the whole batch, which writes the output array.
+
+    For the same images, the result of a test transform equals stacking the
+    results of `simple_transform`.
+
+    Example usage:
+
+    .. code-block:: python
+
+        transformer = BatchTransformer(256, 224, is_train=True,
+                                       mean=[103.94, 116.78, 123.68])
+        batch = transformer(['cat.jpg', 'dog.jpg'])  # shape [2, 3, 224, 224]
+
+    :param resize_size: The shorter edge length of the resized image.
+    :type resize_size: int
+    :param crop_size: The cropping size.
+    :type crop_size: int
+    :param is_train: Whether it is training or not. If it is, the images are
+                     cropped randomly and flipped with probability 0.5,
+                     otherwise they are center cropped.
+    :type is_train: bool
+    :param is_color: whether the images are color or not. The gray images
+                     are returned in NHW layout.
+    :type is_color: bool
+    :param mean: the mean values, which can be element-wise mean values or
+                 mean values per channel.
+    :type mean: numpy array | list
+    :param num_workers: the number of the threads decoding and resizing the
+                        images.
+    :type num_workers: int
+    """
+
+    def __init__(self,
+                 resize_size,
+                 crop_size,
+                 is_train,
+                 is_color=True,
+                 mean=None,
+                 num_workers=4):
+        self.resize_size = resize_size
+        self.crop_size = crop_size
+        self.is_train = is_train
+        self.is_color = is_color
+        self.channels = 3 if is_color else 1
+        self.mean = None
+        if mean is not None:
+            mean = np.array(mean, dtype=np.float32)
+            if is_color and mean.ndim == 1:
+                # mean value, may be one value per channel
+                mean = mean[:, np.newaxis, np.newaxis]
+            self.mean = mean
+        self._buffer = np.empty([0, crop_size, crop_size, self.channels],
+                                dtype=np.uint8)
+        self._pool = ThreadPool(num_workers) if num_workers > 1 else None
+
+    def _load(self, item):
+        if isinstance(item, np.ndarray):
+            return item
+        if isinstance(item, six.text_type):
+            return load_image(item, self.is_color)
+        return load_image_bytes(item, self.is_color)
+
+    def _decode(self, args):
+        index, item, offset = args
+        im = resize_short(self._load(item), self.resize_size)
+        h, w = im.shape[:2]
+        size = self.crop_size
+        if self.is_train:
+            h_start = int(offset[0] * (h - size + 1))
+            w_start = int(offset[1] * (w - size + 1))
+        else:
+            h_start = (h - size) // 2
+            w_start = (w - size) // 2
+        self._buffer[index] = im[h_start:h_start + size, w_start:w_start +
+                                 size].reshape(size, size, self.channels)
+
+    def __call__(self, images, out=None):
+        """
+        Transform the images.
+
+        :param images: the images, each of which can be an image with HWC
+                       layout, the encoded bytes of an image, or the file
+                       name of an image as a unicode string.
+        :type images: list
+        :param out: the array to write the result to, a new array is created
+                    if it is None.
+        :type out: numpy array
+        :return: the transformed images with NCHW layout, or NHW for gray
+                 images.
+        :rtype: numpy array
+        """
+        num = len(images)
+        size = self.crop_size
+        if self._buffer.shape[0] < num:
+            self._buffer = np.empty([num, size, size, self.channels],
+                                    dtype=np.uint8)
+        buf = self._buffer[:num]
+
+        # the random numbers are drawn here so that the result only depends
+        # on the state of np.random, not on the order of the workers
+        if self.is_train:
+            offsets = np.random.random_sample((num, 2))
+            flips = np.random.randint(2, size=num) == 0
+        else:
+            offsets = [None] * num
+        tasks = [(i, images[i], offsets[i]) for i in six.moves.range(num)]
+        if self._pool is not None:
+            self._pool.map(self._decode, tasks)
+        else:
+            for task in tasks:
+                self._decode(task)
+
+        if self.is_train and flips.any():
+            buf[flips] = buf[flips][:, :, ::-1]
+
+        if self.is_color:
+            shape = [num, self.channels, size, size]
+            src = buf.transpose(0, 3, 1, 2)
+        else:
+            shape = [num, size, size]
+            src = buf.reshape(shape)
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+        assert list(out.shape) == shape and out.dtype == np.float32, \
+            "out should be a float32 array of shape {}".format(shape)
+        if self.mean is not None:
+            np.subtract(src, self.mean, out=out, casting='unsafe')
+        else:
+            out[...] = src
+        return out
+
+    def close(self):
+        """
+        Stop the worker threads.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
@@ -40,20 +40,25 @@ def tokenize(pattern):
     """
     Read files that match the given pattern.  Tokenize and yield each file.
     """
+    filename = paddle.dataset.common.download(URL, 'imdb', MD5)
 
-    with tarfile.open(paddle.dataset.common.download(URL, 'imdb', MD5)) as tarf:
-        # Note that we should use tarfile.next(), which does
-        # sequential access of member files, other than
-        # tarfile.extractfile, which does random access and might
-        # destroy hard disks.
-        tf = tarf.next()
-        while tf != None:
-            if bool(pattern.match(tf.name)):
-                # newline and punctuations removal and ad-hoc tokenization.
-                yield tarf.extractfile(tf).read().rstrip(six.b(
-                    "\n\r")).translate(
-                        None, six.b(string.punctuation)).lower().split()
+    def reader():
+        with tarfile.open(filename) as tarf:
+            # Note that we should use tarfile.next(), which does
+            # sequential access of member files, other than
+            # tarfile.extractfile, which does random access and might
+            # destroy hard disks.
             tf = tarf.next()
+            while tf != None:
+                if bool(pattern.match(tf.name)):
+                    # newline and punctuations removal and ad-hoc tokenization.
+                    yield tarf.extractfile(tf).read().rstrip(
+                        six.b("\n\r")).translate(None, six.b(
+                            string.punctuation)).lower().split()
+                tf = tarf.next()
+
+    return paddle.dataset.common.cached_reader(
+        reader, 'imdb', 'tokens', sources=[filename], args=[pattern.pattern])()
 
 
 def build_dict(pattern, cutoff):
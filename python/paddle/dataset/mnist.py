@@ -122,7 +122,7 @@ def test():
 
 
 def fetch():
-    paddle.dataset.common.download(TRAIN_IMAGE_URL, 'mnist', TRAIN_IMAGE_MD5)
-    paddle.dataset.common.download(TRAIN_LABEL_URL, 'mnist', TRAIN_LABEL_MD5)
-    paddle.dataset.common.download(TEST_IMAGE_URL, 'mnist', TEST_IMAGE_MD5)
-    paddle.dataset.common.download(TEST_LABEL_URL, 'mnist', TEST_LABEL_MD5)
+    paddle.dataset.common.prefetch([(TRAIN_IMAGE_URL, 'mnist', TRAIN_IMAGE_MD5),
+                                    (TRAIN_LABEL_URL, 'mnist', TRAIN_LABEL_MD5),
+                                    (TEST_IMAGE_URL, 'mnist', TEST_IMAGE_MD5),
+                                    (TEST_LABEL_URL, 'mnist', TEST_LABEL_MD5)])
@@ -0,0 +1,266 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+import six.moves.cPickle as pickle
+
+import paddle.dataset.common as common
+
+
+def sample_reader(num):
+    def reader():
+        for i in range(num):
+            yield np.arange(i % 7, dtype='int64'), i
+
+    return reader
+
+
+class TestRecordFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def check_samples(self, samples, indexes):
+        self.assertEqual([label for _, label in samples], list(indexes))
+        for data, label in samples:
+            self.assertTrue(
+                np.array_equal(data, np.arange(label % 7, dtype='int64')))
+
+    def test_write_and_read(self):
+        for compressor in [None, 'zlib']:
+            path = os.path.join(self.tmp_dir, 'data.record')
+            with common.RecordWriter(path, compressor=compressor) as writer:
+                for sample in sample_reader(100)():
+                    writer.write(sample)
+            self.assertEqual(os.listdir(self.tmp_dir), ['data.record'])
+
+            with common.RecordReader(path) as reader:
+                self.assertEqual(len(reader), 100)
+                self.check_samples(list(reader), range(100))
+                self.check_samples([reader[42], reader[-1]], [42, 99])
+                self.check_samples(list(reader.read(95)), range(95, 100))
+                self.check_samples(list(reader.read(10, 13)), range(10, 13))
+                self.assertRaises(IndexError, reader.__getitem__, 100)
+
+    def test_abort_and_invalid_file(self):
+        path = os.path.join(self.tmp_dir, 'data.record')
+        try:
+            with common.RecordWriter(path) as writer:
+                writer.write(1)
+                raise KeyboardInterrupt()
+        except KeyboardInterrupt:
+            pass
+        self.assertEqual(os.listdir(self.tmp_dir), [])
+
+        with open(path, 'wb') as f:
+            pickle.dump(list(range(10)), f)
+        self.assertRaises(ValueError, common.RecordReader, path)
+        self.assertRaises(ValueError, common.RecordWriter, path, 'gzip')
+
+    def test_split_and_cluster_reader(self):
+        suffix = os.path.join(self.tmp_dir, 'train-%05d.record')
+        common.split(sample_reader(103), 10, suffix=suffix, compressor='zlib')
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 11)
+        with common.RecordReader(suffix % 0) as reader:
+            self.assertEqual(len(reader), 10)
+
+        pattern = os.path.join(self.tmp_dir, 'train-*.record')
+        samples = []
+        for trainer_id in range(4):
+            trainer_samples = list(
+                common.cluster_files_reader(pattern, 4, trainer_id)())
+            # the records are partitioned evenly, not the files
+            self.assertIn(len(trainer_samples), [25, 26])
+            samples.extend(trainer_samples)
+        self.check_samples(samples, range(103))
+
+        # resume from the middle
+        resumed = list(common.cluster_files_reader(pattern, 4, 1, offset=20)())
+        self.check_samples(resumed, range(45, 51))
+        self.assertEqual(
+            list(common.cluster_files_reader(pattern, 4, 1, offset=30)()), [])
+
+    def test_split_with_dumper(self):
+        def reader():
+            for i in range(25):
+                yield i
+
+        suffix = os.path.join(self.tmp_dir, 'train-%05d.json')
+        common.split(reader, 10, suffix=suffix, dumper=json.dump)
+        pattern = os.path.join(self.tmp_dir, 'train-*.json')
+        samples = list(
+            common.cluster_files_reader(pattern, 1, 0, loader=json.load)())
+        self.assertEqual(samples, list(range(25)))
+        samples = list(
+            common.cluster_files_reader(
+                pattern, 1, 0, loader=json.load, offset=20)())
+        self.assertEqual(samples, list(range(20, 25)))
+
+
+class TestDownloadAndCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.data_home = common.DATA_HOME
+        self.retry_sleep = common._DOWNLOAD_RETRY_SLEEP_SECOND
+        common.DATA_HOME = os.path.join(self.tmp_dir, 'dataset')
+        common._DOWNLOAD_RETRY_SLEEP_SECOND = 0
+
+    def tearDown(self):
+        common.DATA_HOME = self.data_home
+        common._DOWNLOAD_RETRY_SLEEP_SECOND = self.retry_sleep
+        shutil.rmtree(self.tmp_dir)
+
+    def make_source(self, name, size):
+        path = os.path.join(self.tmp_dir, name)
+        content = os.urandom(size)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return 'file://' + path, hashlib.md5(content).hexdigest()
+
+    def test_download(self):
+        url, md5sum = self.make_source('data.tar.gz', 3 * (1 << 20) + 10)
+        filename = common.download(url, 'test', md5sum)
+        self.assertEqual(filename,
+                         os.path.join(common.DATA_HOME, 'test', 'data.tar.gz'))
+        self.assertEqual(common.md5file(filename), md5sum)
+        self.assertEqual(
+            sorted(os.listdir(os.path.dirname(filename))),
+            ['data.tar.gz', 'data.tar.gz.md5'])
+
+        # the verified file is not hashed again
+        md5file = common.md5file
+        common.md5file = None
+        try:
+            self.assertEqual(common.download(url, 'test', md5sum), filename)
+        finally:
+            common.md5file = md5file
+
+        # a corrupted file is downloaded again
+        with open(filename, 'ab') as f:
+            f.write(b'corrupted')
+        self.assertEqual(common.download(url, 'test', md5sum), filename)
+        self.assertEqual(common.md5file(filename), md5sum)
+
+    def test_download_md5_mismatch(self):
+        url, _ = self.make_source('data.tar.gz', 1000)
+        self.assertRaises(RuntimeError, common.download, url, 'test', '0' * 32)
+        self.assertEqual(os.listdir(os.path.join(common.DATA_HOME, 'test')), [])
+        self.assertRaises(RuntimeError, common.download, url + '.not_exist',
+                          'test', '0' * 32)
+
+    def test_prefetch(self):
+        downloads = []
+        for i in range(6):
+            url, md5sum = self.make_source('data_%d' % i, 1000 + i)
+            downloads.append((url, 'test', md5sum, 'saved_%d' % i))
+        filenames = common.prefetch(downloads, num_workers=3)
+        self.assertEqual([os.path.basename(fn) for fn in filenames],
+                         ['saved_%d' % i for i in range(6)])
+        for fn, (_, _, md5sum, _) in zip(filenames, downloads):
+            self.assertEqual(common.md5file(fn), md5sum)
+
+    def test_cached_reader(self):
+        url, md5sum = self.make_source('data.tar.gz', 1000)
+        source = common.download(url, 'test', md5sum)
+        parsed = []
+
+        def parse():
+            for i in range(50):
+                parsed.append(i)
+                yield np.arange(i % 7, dtype='int64'), i
+
+        reader = common.cached_reader(
+            parse, 'test', 'train', sources=[source], args=[7])
+        self.check_samples(list(reader()))
+        self.assertEqual(len(parsed), 50)
+        # read from the cache, even by a new reader
+        self.check_samples(list(reader()))
+        reader = common.cached_reader(
+            parse, 'test', 'train', sources=[source], args=[7])
+        self.check_samples(list(reader()))
+        self.assertEqual(len(parsed), 50)
+
+        # an interrupted first pass leaves no cache
+        other = common.cached_reader(
+            parse, 'test', 'train', sources=[source], args=[8])
+        for _ in zip(range(10), other()):
+            pass
+        self.check_samples(list(other()))
+        self.assertEqual(len(parsed), 110)
+
+        # the cache is rebuilt when the source changes
+        os.utime(source, (0, 0))
+        self.check_samples(list(reader()))
+        self.assertEqual(len(parsed), 160)
+
+    def check_samples(self, samples):
+        self.assertEqual([label for _, label in samples], list(range(50)))
+        for data, label in samples:
+            self.assertTrue(
+                np.array_equal(data, np.arange(label % 7, dtype='int64')))
+
+
+class TestRecordFileBenchmark(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_benchmark(self):
+        samples = [(np.random.random(256).astype('float32'), i)
+                   for i in range(20000)]
+        pickle_file = os.path.join(self.tmp_dir, 'data.pickle')
+        with open(pickle_file, 'wb') as f:
+            pickle.dump(samples, f)
+        record_file = os.path.join(self.tmp_dir, 'data.record')
+        with common.RecordWriter(record_file) as writer:
+            for sample in samples:
+                writer.write(sample)
+
+        start = time.time()
+        with open(pickle_file, 'rb') as f:
+            next(iter(pickle.load(f)))
+        pickle_first = time.time() - start
+        start = time.time()
+        with common.RecordReader(record_file) as reader:
+            next(iter(reader))
+        record_first = time.time() - start
+
+        start = time.time()
+        with common.RecordReader(record_file) as reader:
+            sampled = [reader[i] for i in np.random.randint(0, 20000, 1000)]
+        record_sample = time.time() - start
+        print("first sample: pickle %.4fs, record %.4fs; 1000 random "
+              "samples from record %.4fs" % (pickle_first, record_first,
+                                             record_sample))
+        self.assertEqual(len(sampled), 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
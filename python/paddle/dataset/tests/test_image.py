@@ -14,6 +14,8 @@
 
 from __future__ import print_function
 
+import os
+import time
 import unittest
 import numpy as np
 
@@ -41,5 +43,65 @@ class Image(unittest.TestCase):
         self.assertEqual(w, im.shape[2])
 
 
+class TestBatchTransformer(unittest.TestCase):
+    def setUp(self):
+        with open('cat.jpg', 'rb') as f:
+            self.image_bytes = f.read()
+        self.mean = [103.94, 116.78, 123.68]
+
+    def test_same_as_simple_transform(self):
+        im = image.load_image_bytes(self.image_bytes)
+        expected = np.stack(
+            [image.simple_transform(im, 256, 224, False, mean=self.mean)] * 4)
+        transformer = image.BatchTransformer(256, 224, False, mean=self.mean)
+        self.assertTrue(
+            np.allclose(transformer([self.image_bytes] * 4), expected))
+        self.assertTrue(np.allclose(transformer([im] * 4), expected))
+
+        # the buffer of a larger batch is reused by a smaller one
+        out = np.empty([2, 3, 224, 224], dtype=np.float32)
+        self.assertTrue(transformer([im] * 2, out=out) is out)
+        self.assertTrue(np.allclose(out, expected[:2]))
+        transformer.close()
+
+    def test_gray(self):
+        im = image.load_image_bytes(self.image_bytes, is_color=False)
+        expected = image.simple_transform(im, 256, 224, False, is_color=False)
+        transformer = image.BatchTransformer(
+            256, 224, False, is_color=False, num_workers=1)
+        batch = transformer([im] * 3)
+        self.assertEqual(batch.shape, (3, 224, 224))
+        self.assertTrue(np.allclose(batch[1], expected))
+
+    def test_train(self):
+        transformer = image.BatchTransformer(256, 224, True, mean=self.mean)
+        np.random.seed(1)
+        first = transformer([self.image_bytes] * 8)
+        np.random.seed(1)
+        second = transformer([self.image_bytes] * 8)
+        self.assertEqual(first.shape, (8, 3, 224, 224))
+        self.assertTrue(np.array_equal(first, second))
+        transformer.close()
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_benchmark(self):
+        batch_size = 64
+        images = [self.image_bytes] * batch_size
+        start = time.time()
+        for data in images:
+            image.simple_transform(
+                image.load_image_bytes(data), 256, 224, True, mean=self.mean)
+        single_time = time.time() - start
+
+        transformer = image.BatchTransformer(256, 224, True, mean=self.mean)
+        start = time.time()
+        transformer(images)
+        batch_time = time.time() - start
+        transformer.close()
+        print("per image transform %.1f images/s, BatchTransformer %.1f "
+              "images/s" % (batch_size / single_time, batch_size / batch_time))
+
+
 if __name__ == '__main__':
     unittest.main()
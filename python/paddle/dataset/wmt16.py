@@ -141,7 +141,12 @@ def reader_creator(tar_file, file_name, src_dict_size, trg_dict_size, src_lang):
 
                 yield src_ids, trg_ids, trg_ids_next
 
-    return reader
+    return paddle.dataset.common.cached_reader(
+        reader,
+        'wmt16',
+        'samples',
+        sources=[tar_file],
+        args=[file_name, src_dict_size, trg_dict_size, src_lang])
 
 
 def train(src_dict_size, trg_dict_size, src_lang="en"):
@@ -322,5 +327,4 @@ def get_dict(lang, dict_size, reverse=False):
 def fetch():
     """download the entire dataset.
     """
-    paddle.v4.dataset.common.download(DATA_URL, "wmt16", DATA_MD5,
-                                      "wmt16.tar.gz")
+    paddle.dataset.common.download(DATA_URL, "wmt16", DATA_MD5, "wmt16.tar.gz")
@@ -0,0 +1,195 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+"""
+Binary checkpoint file used by fluid.save and fluid.load.
+
+The file layout is::
+
+    | magic (8B) | index offset (8B) | index length (8B) | padding |
+    | tensor payload | padding | tensor payload | ... | index (json) |
+
+Every payload is the raw C-contiguous buffer of one tensor, aligned to
+_ALIGNMENT bytes. The index records name, dtype, shape and offset of each
+payload, so tensors can be streamed in one by one when saving and mapped
+lazily with mmap when loading. Files written by the former pickle based
+fluid.save are detected by their missing magic and still loaded.
+"""
+
+from __future__ import print_function
+
+import os
+import json
+import mmap
+import pickle
+import struct
+
+import six
+import numpy as np
+
+__all__ = [
+    'write_checkpoint', 'is_checkpoint_file', 'CheckpointReader',
+    'load_state_file'
+]
+
+_MAGIC = b'PDCKPT\x00\x01'
+_HEADER_FORMAT = '<8sQQ'
+_HEADER_SIZE = struct.calcsize(_HEADER_FORMAT)
+_ALIGNMENT = 64
+
+
+def _pad(f, alignment=_ALIGNMENT):
+    remainder = f.tell() % alignment
+    if remainder:
+        f.write(b'\x00' * (alignment - remainder))
+
+
+def write_checkpoint(file_name, named_arrays, sync=False):
+    """
+    Write tensors to a binary checkpoint file.
+
+    Args:
+        file_name(str): The path of the checkpoint file.
+        named_arrays(iterable): An iterable of (name, numpy.ndarray) pairs.
+            It is consumed lazily, so a generator only needs to hold one
+            tensor in host memory at a time.
+        sync(bool, optional): Whether to flush the file to disk by fsync
+            before returning. Default: False.
+
+    Returns:
+        None
+    """
+    entries = []
+    with open(file_name, 'wb') as f:
+        f.write(struct.pack(_HEADER_FORMAT, _MAGIC, 0, 0))
+        for name, array in named_arrays:
+            array = np.ascontiguousarray(array)
+            _pad(f)
+            entries.append({
+                'name': name,
+                'dtype': array.dtype.str,
+                'shape': list(array.shape),
+                'offset': f.tell(),
+                'nbytes': int(array.nbytes),
+            })
+            if array.nbytes > 0:
+                array.tofile(f)
+        _pad(f)
+        index_offset = f.tell()
+        index = json.dumps({'version': 1, 'vars': entries}).encode('utf-8')
+        f.write(index)
+        f.seek(0)
+        f.write(struct.pack(_HEADER_FORMAT, _MAGIC, index_offset, len(index)))
+        if sync:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def is_checkpoint_file(file_name):
+    """
+    Check whether the given file is a binary checkpoint file written by
+    write_checkpoint.
+    """
+    with open(file_name, 'rb') as f:
+        return f.read(len(_MAGIC)) == _MAGIC
+
+
+class CheckpointReader(object):
+    """
+    Read tensors from a binary checkpoint file by mmap.
+
+    Only the index is parsed when the reader is created. The tensor returned
+    by get is a numpy.ndarray backed by the mapped file, so its pages are
+    read from disk only when the tensor is touched. The array is writable,
+    but modifications are private and never written back to the file.
+
+    Args:
+        file_name(str): The path of the checkpoint file.
+    """
+
+    def __init__(self, file_name):
+        self._file_name = file_name
+        with open(file_name, 'rb') as f:
+            magic, index_offset, index_length = struct.unpack(
+                _HEADER_FORMAT, f.read(_HEADER_SIZE))
+            if magic != _MAGIC:
+                raise ValueError(
+                    "[{}] is not a binary checkpoint file".format(file_name))
+            f.seek(index_offset)
+            index = json.loads(f.read(index_length).decode('utf-8'))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._entries = dict((e['name'], e) for e in index['vars'])
+
+    def keys(self):
+        return list(self._entries.keys())
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, name):
+        """
+        Get the tensor named name as a numpy.ndarray mapped from the file.
+        """
+        if name not in self._entries:
+            raise KeyError("Can not find [{}] in checkpoint file [{}]".format(
+                name, self._file_name))
+        entry = self._entries[name]
+        dtype = np.dtype(entry['dtype'])
+        shape = tuple(entry['shape'])
+        if entry['nbytes'] == 0:
+            return np.zeros(shape, dtype=dtype)
+        array = np.frombuffer(
+            self._mmap,
+            dtype=dtype,
+            count=entry['nbytes'] // dtype.itemsize,
+            offset=entry['offset'])
+        return array.reshape(shape)
+
+    def load_dict(self, names=None):
+        """
+        Get a dict of mapped tensors. If names is given, only the tensors
+        in names that exist in the file are returned.
+        """
+        if names is None:
+            names = self.keys()
+        return dict(
+            (name, self.get(name)) for name in names if name in self._entries)
+
+
+def load_state_file(file_name, names=None):
+    """
+    Load a dict of numpy.ndarray from a file saved by fluid.save, in either
+    the binary checkpoint format or the former pickle format.
+
+    Args:
+        file_name(str): The path of the file.
+        names(list of str, optional): The names of the tensors to load. For
+            a binary checkpoint file only these tensors are mapped. Default:
+            None, load all the tensors.
+
+    Returns:
+        dict: the dict from name to numpy.ndarray.
+    """
+    if is_checkpoint_file(file_name):
+        return CheckpointReader(file_name).load_dict(names)
+
+    with open(file_name, 'rb') as f:
+        state_dict = pickle.load(f) if six.PY2 else pickle.load(
+            f, encoding='latin1')
+    if names is not None:
+        state_dict = dict(
+            (name, state_dict[name]) for name in names if name in state_dict)
+    return state_dict
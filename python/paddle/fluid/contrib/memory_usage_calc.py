@@ -27,7 +27,7 @@ import six
 from .. import core
 from ..framework import Program, Variable
 
-__all__ = ['memory_usage']
+__all__ = ['memory_usage', 'estimate_peak_memory', 'find_max_batch_size']
 
 dtype_to_size = {
     core.VarDesc.VarType.FP16: 2,
@@ -38,11 +38,29 @@ dtype_to_size = {
     core.VarDesc.VarType.INT64: 8,
     core.VarDesc.VarType.BOOL: 1,
     core.VarDesc.VarType.UINT8: 1,
+    core.VarDesc.VarType.INT8: 1,
 }
 
 DEBUG = False
 
 
+def _var_memory(var, batch_size):
+    if var.desc.type() != core.VarDesc.VarType.LOD_TENSOR:
+        return 0
+    data_count = 1
+    neg_dim_count = 0
+    for x in var.shape:
+        if x < 0:
+            if neg_dim_count >= 1:
+                raise ValueError(
+                    "Var %s has more than one negative dim." % (var.name))
+            neg_dim_count += 1
+            data_count *= batch_size * (-x)
+        else:
+            data_count *= x
+    return data_count * dtype_to_size[var.dtype]
+
+
 def memory_usage(program, batch_size):
     """
     Get the estimate memory usage of program with input batch size.
@@ -86,19 +104,7 @@ def memory_usage(program, batch_size):
             if var.desc.type() != core.VarDesc.VarType.LOD_TENSOR:
                 continue
 
-            data_count = 1
-            neg_dim_count = 0
-            for x in var.shape:
-                if x < 0:
-                    if neg_dim_count >= 1:
-                        raise ValueError(
-                            "Var %s has more than one negative dim." %
-                            (var_name))
-                    neg_dim_count += 1
-                    data_count *= batch_size * (-x)
-                else:
-                    data_count *= x
-            var_memory = data_count * dtype_to_size[var.dtype]
+            var_memory = _var_memory(var, batch_size)
             if DEBUG:
                 print("%s memory usage: %d" % (var.name, var_memory))
             total_memory += var_memory
@@ -119,3 +125,244 @@ def memory_usage(program, batch_size):
     max_total_memory = total_memory * 1.1
 
     return min_total_memory, max_total_memory, unit_str
+
+
+def _op_role_name(op):
+    op_maker = core.op_proto_and_checker_maker
+    role_attr_name = op_maker.kOpRoleAttrName()
+    if role_attr_name not in op.attr_names:
+        return 'forward'
+    role = int(op.attr(role_attr_name))
+    if role & int(op_maker.OpRole.Optimize):
+        return 'optimize'
+    if role & int(op_maker.OpRole.LRSched):
+        return 'lr_sched'
+    if role & int(op_maker.OpRole.Backward):
+        return 'backward'
+    return 'forward'
+
+
+def _sub_blocks(op):
+    program = op.block.program
+    for name in op.attr_names:
+        attr_type = op.attr_type(name)
+        if attr_type == core.AttrType.BLOCK:
+            yield program.block(op._block_attr_id(name))
+        elif attr_type == core.AttrType.BLOCKS:
+            for idx in op._blocks_attr_ids(name):
+                yield program.block(idx)
+
+
+def _analyze_block(block, batch_size):
+    """
+    Liveness analysis of the non-persistable variables of block. A variable
+    lives from the first op using it to the last one. The ops of a sub-block
+    run during the op owning the sub-block, so the peak of the sub-block is
+    added to that step, and the variables of outer blocks used inside the
+    sub-block are used by that op.
+    """
+    first_use = {}
+    last_use = {}
+    sub_block_memory = []
+    for step, op in enumerate(block.ops):
+        var_names = list(op.input_arg_names) + list(op.output_arg_names)
+        step_memory = 0
+        for sub_block in _sub_blocks(op):
+            sub_info = _analyze_block(sub_block, batch_size)
+            step_memory += sub_info['peak']
+            var_names.extend(sub_info['outer_var_names'])
+        sub_block_memory.append(step_memory)
+
+        for var_name in var_names:
+            if var_name == core.empty_var_name():
+                continue
+            first_use.setdefault(var_name, step)
+            last_use[var_name] = step
+
+    outer_var_names = set()
+    var_memory = {}
+    for var_name in first_use:
+        var = block.vars.get(var_name)
+        if var is None:
+            outer_var_names.add(var_name)
+        elif not var.persistable:
+            var_memory[var_name] = _var_memory(var, batch_size)
+            if var.is_data:
+                # data is fed before the first op runs
+                first_use[var_name] = 0
+
+    step_num = len(block.ops)
+    delta = [0] * (step_num + 1)
+    for var_name, memory in six.iteritems(var_memory):
+        delta[first_use[var_name]] += memory
+        delta[last_use[var_name] + 1] -= memory
+
+    live = 0
+    step_memory = []
+    for step in six.moves.range(step_num):
+        live += delta[step]
+        step_memory.append(live + sub_block_memory[step])
+
+    peak = max(step_memory) if step_memory else 0
+    peak_step = step_memory.index(peak) if step_memory else -1
+    return {
+        'peak': peak,
+        'peak_step': peak_step,
+        'step_memory': step_memory,
+        'sub_block_memory': sub_block_memory,
+        'var_memory': var_memory,
+        'first_use': first_use,
+        'last_use': last_use,
+        'outer_var_names': outer_var_names,
+    }
+
+
+def estimate_peak_memory(program, batch_size, top_k=10):
+    """
+    Estimate the peak memory usage of running program once with input batch
+    size by a liveness analysis over the ops of the program.
+
+    The persistable variables, e.g. parameters and optimizer states, live
+    during the whole run. Other variables live from the first op using them
+    to the last one, and a variable written in place keeps one buffer. The
+    ops in sub-blocks of control flow ops are analyzed recursively, and the
+    peak of a sub-block is added to the step of its owner op. The loop
+    blocks are counted as running one step only.
+
+    Args:
+        program(Program): The program to estimate.
+        batch_size(int): The input data batch size.
+        top_k(int, optional): The number of the largest variables alive at
+            the peak to report. Default: 10.
+
+    Returns:
+        dict: the estimated memory usage in bytes, with keys:
+            peak_memory: the peak memory, including persistable_memory.
+            persistable_memory: the memory of persistable variables.
+            peak_step: the index of the op in the global block where the
+                peak occurs.
+            peak_op_type: the type of the op at peak_step.
+            peak_op_role: the role of the op at peak_step, which is one of
+                'forward', 'backward', 'optimize' and 'lr_sched'.
+            role_peak_memory: a dict from op role to the peak memory of
+                the ops with that role.
+            top_vars: a list of (var_name, memory) of the top_k largest
+                variables alive at the peak, in descending order of memory.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle.fluid as fluid
+
+            x = fluid.data(name='x', shape=[None, 13], dtype='float32')
+            y = fluid.layers.fc(input=x, size=1)
+            loss = fluid.layers.mean(y)
+            fluid.optimizer.SGD(learning_rate=0.001).minimize(loss)
+
+            info = fluid.contrib.estimate_peak_memory(
+                fluid.default_main_program(), batch_size=32)
+            print("peak memory %d bytes at op %s" %
+                  (info['peak_memory'], info['peak_op_type']))
+    """
+    if not isinstance(program, Program):
+        raise TypeError(
+            "Calculating Memory Usage requires Program as its Parameter."
+            "But you passed in %s" % (type(program)))
+    if batch_size <= 0:
+        raise ValueError("The batch size need to be positive.")
+
+    block = program.global_block()
+    persistable_memory = {
+        var.name: _var_memory(var, batch_size)
+        for var in six.itervalues(block.vars) if var.persistable
+    }
+    total_persistable_memory = sum(six.itervalues(persistable_memory))
+
+    info = _analyze_block(block, batch_size)
+    role_peak_memory = {}
+    for step, memory in enumerate(info['step_memory']):
+        role = _op_role_name(block.ops[step])
+        role_peak_memory[role] = max(
+            role_peak_memory.get(role, 0), memory + total_persistable_memory)
+
+    peak_step = info['peak_step']
+    live_memory = dict(persistable_memory)
+    if peak_step >= 0:
+        for var_name, memory in six.iteritems(info['var_memory']):
+            if info['first_use'][var_name] <= peak_step <= info['last_use'][
+                    var_name]:
+                live_memory[var_name] = memory
+        sub_block_memory = info['sub_block_memory'][peak_step]
+        if sub_block_memory > 0:
+            live_memory['@SUB_BLOCK@'] = sub_block_memory
+    top_vars = sorted(
+        six.iteritems(live_memory), key=lambda item: (-item[1], item[0]))
+
+    return {
+        'peak_memory': info['peak'] + total_persistable_memory,
+        'persistable_memory': total_persistable_memory,
+        'peak_step': peak_step,
+        'peak_op_type': block.ops[peak_step].type if peak_step >= 0 else None,
+        'peak_op_role':
+        _op_role_name(block.ops[peak_step]) if peak_step >= 0 else None,
+        'role_peak_memory': role_peak_memory,
+        'top_vars': top_vars[:top_k],
+    }
+
+
+def find_max_batch_size(program, memory_limit, max_batch_size=1 << 20):
+    """
+    Find the largest batch size whose peak memory estimated by
+    estimate_peak_memory does not exceed memory_limit.
+
+    Args:
+        program(Program): The program to estimate.
+        memory_limit(int): The memory budget in bytes.
+        max_batch_size(int, optional): The largest batch size to try.
+            Default: 1048576.
+
+    Returns:
+        int: the largest batch size fitting in memory_limit, or 0 if even
+             batch size 1 does not fit.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle.fluid as fluid
+
+            x = fluid.data(name='x', shape=[None, 13], dtype='float32')
+            y = fluid.layers.fc(input=x, size=1)
+            loss = fluid.layers.mean(y)
+            fluid.optimizer.SGD(learning_rate=0.001).minimize(loss)
+
+            batch_size = fluid.contrib.find_max_batch_size(
+                fluid.default_main_program(), memory_limit=1 << 30)
+    """
+
+    def fits(batch_size):
+        info = estimate_peak_memory(program, batch_size, top_k=0)
+        return info['peak_memory'] <= memory_limit
+
+    if not fits(1):
+        return 0
+
+    # the peak memory grows with batch size, double the batch size to find
+    # an upper bound and then bisect
+    low = 1
+    high = 2
+    while high <= max_batch_size and fits(high):
+        low = high
+        high *= 2
+    if high > max_batch_size:
+        if fits(max_batch_size):
+            return max_batch_size
+        high = max_batch_size
+
+    # fits(low) and not fits(high)
+    while high - low > 1:
+        mid = (low + high) // 2
+        if fits(mid):
+            low = mid
+        else:
+            high = mid
+    return low
@@ -52,6 +52,61 @@ def _set_variable_data(scope, place, var_name, np_value):
         tensor.set(np_value, place)
 
 
+class _AbsHistogram(object):
+    '''
+    The running abs max and the histogram of the abs values of a variable,
+    sampled batch by batch. The histogram has a fixed number of bins over
+    [0, upper]. When a batch exceeds the upper bound, the bound is extended
+    by an integer factor k and every k adjacent bins are merged, so that the
+    old bins are rebinned exactly. The bins are finer than the ones used by
+    the KL method, for the histogram is rebinned onto [0, abs_max] at last.
+    '''
+
+    def __init__(self, bins=16384):
+        self.bins = bins
+        self.hist = np.zeros(bins, dtype=np.int64)
+        self.upper = 0.0
+        self.abs_max = 0.0
+
+    def update(self, abs_data):
+        if abs_data.size == 0:
+            return
+        batch_max = float(np.max(abs_data))
+        self.abs_max = max(self.abs_max, batch_max)
+        if self.upper == 0:
+            # all the values sampled so far are zeros, in the first bin
+            if batch_max == 0:
+                self.hist[0] += abs_data.size
+                return
+            self.upper = batch_max
+        elif batch_max > self.upper:
+            factor = int(math.ceil(batch_max / self.upper))
+            self.hist = np.bincount(
+                np.arange(self.bins) // factor,
+                weights=self.hist,
+                minlength=self.bins).astype(np.int64)
+            self.upper *= factor
+        hist, _ = np.histogram(abs_data, bins=self.bins, range=(0, self.upper))
+        self.hist += hist
+
+    def rebin(self, bins=2048):
+        '''
+        Rebin the histogram onto [0, abs_max] by interpolating the cumulative
+        counts, and return the new histogram and its bin width.
+        '''
+        if self.abs_max == 0:
+            hist = np.zeros(bins)
+            hist[0] = np.sum(self.hist)
+            return hist, 0.0
+        edges = np.linspace(0, self.upper, self.bins + 1)
+        cum_hist = np.concatenate([[0], np.cumsum(self.hist)])
+        new_edges = np.linspace(0, self.abs_max, bins + 1)
+        new_cum_hist = np.interp(new_edges, edges, cum_hist)
+        # all the values are not greater than abs_max
+        new_cum_hist[-1] = cum_hist[-1]
+        return np.diff(new_cum_hist), self.abs_max / bins
+
+
 class PostTrainingQuantization(object):
     def __init__(self,
                  executor=None,
@@ -68,7 +123,8 @@ class PostTrainingQuantization(object):
                  weight_bits=8,
                  activation_bits=8,
                  is_use_cache_file=False,
-                 cache_dir="./temp_post_training"):
+                 cache_dir="./temp_post_training",
+                 is_online_calibration=False):
         '''
         The class utilizes post training quantization methon to quantize the 
         fp32 model. It uses calibrate data to calculate the scale factor of 
@@ -115,6 +171,14 @@ class PostTrainingQuantization(object):
                 as True. Defalut is False.
             cache_dir(str, optional): When is_use_cache_file is True, set cache_dir as
                 the directory for saving temp data. Default is ./temp_post_training.
+            is_online_calibration(bool, optional): If set is_online_calibration as
+                True, the temp data is not kept, but the running abs max and the
+                histogram of every activation is updated batch by batch. It takes
+                O(bins) memory for a variable however many calibrate data there are,
+                and is_use_cache_file is ignored. The abs max scale factors are the
+                same, and the KL scale factors are very close to the ones from the
+                temp data, as the histogram is rebinned when its range grows.
+                Default is False.
         Returns:
             None
 
@@ -171,6 +235,9 @@ class PostTrainingQuantization(object):
         self._algo = algo
         self._is_use_cache_file = is_use_cache_file
         self._cache_dir = cache_dir
+        self._is_online_calibration = is_online_calibration
+        if self._is_online_calibration:
+            self._is_use_cache_file = False
         if self._is_use_cache_file and not os.path.exists(self._cache_dir):
             os.mkdir(self._cache_dir)
 
@@ -197,6 +264,7 @@ class PostTrainingQuantization(object):
         self._quantized_weight_var_name = set()
         self._quantized_act_var_name = set()
         self._sampling_data = {}
+        self._sampling_act_histogram = {}
         self._quantized_var_scale_factor = {}
 
     def quantize(self):
@@ -329,7 +397,14 @@ class PostTrainingQuantization(object):
                 var_tensor = _load_variable_data(self._scope, var_name)
                 self._sampling_data[var_name] = var_tensor
 
-        if self._is_use_cache_file:
+        if self._is_online_calibration:
+            for var_name in self._quantized_act_var_name:
+                if var_name not in self._sampling_act_histogram:
+                    self._sampling_act_histogram[var_name] = _AbsHistogram()
+                var_tensor = _load_variable_data(self._scope, var_name)
+                self._sampling_act_histogram[var_name].update(
+                    np.abs(var_tensor.ravel()))
+        elif self._is_use_cache_file:
             for var_name in self._quantized_act_var_name:
                 var_tensor = _load_variable_data(self._scope, var_name)
                 var_tensor = var_tensor.ravel()
@@ -359,7 +434,17 @@ class PostTrainingQuantization(object):
                 var_name] = scale_factor_per_channel
 
         # apply kl quantization for activation
-        if self._is_use_cache_file:
+        if self._is_online_calibration:
+            for var_name in self._quantized_act_var_name:
+                histogram = self._sampling_act_histogram[var_name]
+                if self._algo == "KL":
+                    hist, bin_width = histogram.rebin()
+                    self._quantized_var_scale_factor[var_name] = \
+                        self._get_kl_scaling_factor_from_hist(hist, bin_width)
+                else:
+                    self._quantized_var_scale_factor[var_name] = \
+                        histogram.abs_max
+        elif self._is_use_cache_file:
             for var_name in self._quantized_act_var_name:
                 sampling_data = []
                 filenames = [f for f in os.listdir(self._cache_dir) \
@@ -487,19 +572,29 @@ class PostTrainingQuantization(object):
         if min_val >= 0:
             hist, hist_edeges = np.histogram(
                 activation_blob, bins=2048, range=(min_val, max_val))
-            ending_iter = 2047
-            starting_iter = int(ending_iter * 0.7)
         else:
             _logger.error("Please first apply abs to activation_blob.")
         bin_width = hist_edeges[1] - hist_edeges[0]
+        return self._get_kl_scaling_factor_from_hist(hist, bin_width,
+                                                     num_quantized_bins)
 
-        P_sum = len(np.array(activation_blob).ravel())
+    def _get_kl_scaling_factor_from_hist(self,
+                                         hist,
+                                         bin_width,
+                                         num_quantized_bins=255):
+        '''
+        Using the KL-divergenc method to get the scaling factor from the
+        histogram of the abs values.
+        '''
+        ending_iter = len(hist) - 1
+        starting_iter = int(ending_iter * 0.7)
+        P_sum = np.sum(hist)
         min_kl_divergence = 0
         min_kl_index = 0
         kl_inited = False
         for i in range(starting_iter, ending_iter + 1):
             reference_distr_P = hist[0:i].tolist()
-            outliers_count = sum(hist[i:2048])
+            outliers_count = sum(hist[i:])
             if reference_distr_P[i - 1] == 0:
                 continue
             reference_distr_P[i - 1] += outliers_count
@@ -0,0 +1,149 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+from paddle.fluid.contrib.slim.quantization import PostTrainingQuantization
+from paddle.fluid.contrib.slim.quantization.post_training_quantization import _AbsHistogram
+
+
+def random_batches(batch_num, growing):
+    rng = np.random.RandomState(1)
+    batches = []
+    for i in range(batch_num):
+        scale = 1 + 0.2 * i if growing else 2 - 0.05 * i
+        batches.append(
+            np.maximum(rng.randn(4, 16, 8, 8) * scale, 0).astype('float32'))
+    return batches
+
+
+class TestAbsHistogram(unittest.TestCase):
+    def test_rebin_on_growth(self):
+        batches = random_batches(20, growing=True)
+        histogram = _AbsHistogram()
+        for batch in batches:
+            histogram.update(np.abs(batch.ravel()))
+        data = np.abs(np.concatenate([batch.ravel() for batch in batches]))
+
+        self.assertEqual(histogram.abs_max, np.max(data))
+        self.assertGreaterEqual(histogram.upper, histogram.abs_max)
+        self.assertEqual(np.sum(histogram.hist), data.size)
+        expected, _ = np.histogram(
+            data, bins=histogram.bins, range=(0, histogram.upper))
+        # only the values on the bin edges may fall into the neighbours
+        self.assertLessEqual(np.sum(np.abs(expected - histogram.hist)), 4)
+
+        hist, bin_width = histogram.rebin(2048)
+        self.assertEqual(len(hist), 2048)
+        self.assertAlmostEqual(bin_width, np.max(data) / 2048)
+        self.assertAlmostEqual(np.sum(hist), data.size)
+
+    def test_kl_scale(self):
+        ptq = PostTrainingQuantization.__new__(PostTrainingQuantization)
+        for growing in [True, False]:
+            batches = random_batches(10, growing)
+            histogram = _AbsHistogram()
+            for batch in batches:
+                histogram.update(np.abs(batch.ravel()))
+            data = np.concatenate([batch.ravel() for batch in batches])
+            expected = ptq._get_kl_scaling_factor(np.abs(data))
+            scale = ptq._get_kl_scaling_factor_from_hist(*histogram.rebin())
+            self.assertLess(abs(scale - expected) / expected, 0.01)
+
+    def test_zeros(self):
+        histogram = _AbsHistogram(bins=8)
+        histogram.update(np.zeros(10, dtype='float32'))
+        self.assertEqual(histogram.upper, 0)
+        histogram.update(np.array([0.5, 1.0], dtype='float32'))
+        self.assertEqual(histogram.upper, 1.0)
+        self.assertEqual(histogram.hist.tolist(), [10, 0, 0, 0, 1, 0, 0, 1])
+        histogram.update(np.array([2.5], dtype='float32'))
+        self.assertEqual(histogram.upper, 3.0)
+        self.assertEqual(histogram.hist.tolist(), [10, 1, 1, 0, 0, 0, 1, 0])
+
+
+class TestOnlineCalibration(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.model_dir = self.tmp_dir + '/model'
+        self.place = fluid.CPUPlace()
+        main = fluid.Program()
+        startup = fluid.Program()
+        with fluid.program_guard(main, startup):
+            image = fluid.data(
+                name='image', shape=[None, 1, 16, 16], dtype='float32')
+            conv = fluid.layers.conv2d(
+                image, num_filters=8, filter_size=3, act='relu')
+            pool = fluid.layers.pool2d(conv, pool_size=2, pool_stride=2)
+            hidden = fluid.layers.fc(pool, size=32, act='relu')
+            out = fluid.layers.fc(hidden, size=10, act='softmax')
+        exe = fluid.Executor(self.place)
+        scope = fluid.Scope()
+        with fluid.scope_guard(scope):
+            exe.run(startup)
+            fluid.io.save_inference_model(self.model_dir, ['image'], [out], exe,
+                                          main)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def sample_generator(self):
+        rng = np.random.RandomState(2)
+        for i in range(80):
+            scale = 1 + i / 20.0
+            yield [rng.randn(1, 16, 16).astype('float32') * scale]
+
+    def calibrate(self, algo, is_online_calibration):
+        exe = fluid.Executor(self.place)
+        scope = fluid.Scope()
+        with fluid.scope_guard(scope):
+            ptq = PostTrainingQuantization(
+                executor=exe,
+                scope=scope,
+                sample_generator=self.sample_generator,
+                model_dir=self.model_dir,
+                batch_size=8,
+                algo=algo,
+                is_online_calibration=is_online_calibration)
+            ptq.quantize()
+        return ptq
+
+    def test_scale_factors(self):
+        for algo in ["direct", "KL"]:
+            ptq = self.calibrate(algo, False)
+            online_ptq = self.calibrate(algo, True)
+            for var_name in ptq._quantized_act_var_name:
+                self.assertNotIn(var_name, online_ptq._sampling_data)
+            scales = ptq._quantized_var_scale_factor
+            online_scales = online_ptq._quantized_var_scale_factor
+            self.assertEqual(
+                sorted(scales.keys()), sorted(online_scales.keys()))
+            for var_name in ptq._quantized_act_var_name:
+                if algo == "direct":
+                    self.assertAlmostEqual(scales[var_name],
+                                           online_scales[var_name])
+                else:
+                    self.assertLess(
+                        abs(scales[var_name] - online_scales[var_name]) /
+                        scales[var_name], 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
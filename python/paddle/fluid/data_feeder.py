@@ -26,6 +26,8 @@ from .framework import Variable, default_main_program, _current_expected_place
 from .framework import _cpu_num, _cuda_ids
 __all__ = ['DataFeeder']
 
+_DEFAULT_BATCH_CAPACITY = 32
+
 
 def convert_dtype(dtype):
     if isinstance(dtype, core.VarDesc.VarType):
@@ -104,7 +106,17 @@ def check_dtype(input_dtype,
 
 
 class DataToLoDTensorConverter(object):
-    def __init__(self, place, lod_level, shape, dtype):
+    """
+    Assemble the samples of one slot into a batch LoDTensor.
+
+    If the slot has no LoD and the shape of its samples is fixed, i.e. only
+    the batch dimension of :code:`shape` is unknown, samples are written into
+    a preallocated numpy array directly, which is reused by following batches
+    and grows when :code:`capacity` is exceeded. Otherwise samples are
+    collected into a list and converted to numpy array in :code:`done`.
+    """
+
+    def __init__(self, place, lod_level, shape, dtype, capacity=None):
         self.place = place
         self.lod_level = lod_level
         self.shape = shape
@@ -116,23 +128,89 @@ class DataToLoDTensorConverter(object):
                 self.shape = None
                 break
         self.dtype = convert_dtype(dtype)
+        self._sample_shape = self._get_sample_shape()
+        self._capacity = capacity if capacity else _DEFAULT_BATCH_CAPACITY
+        self._buffer = None
         self._reset()
 
+    def _get_sample_shape(self):
+        if self.lod_level != 0 or not self.shape or self.shape[0] >= 0:
+            return None
+        if any(s < 0 for s in self.shape[1:]):
+            return None
+        return tuple(self.shape[1:])
+
     def _reset(self):
         self.data = []
         self.lod = [[] for _ in six.moves.range(self.lod_level)]
+        self._size = 0
+        self._batch_shape = None
+        self._use_buffer = self._sample_shape is not None
 
     def feed(self, data):
+        if self._use_buffer and self._write_to_buffer(data):
+            return
         self._feed_impl_(data, self.lod, self.lod_level)
 
     def _feed_impl_(self, data, lod, lod_level):
         if lod_level == 0:
             self.data.append(data)
+        elif lod_level == 1:
+            # the innermost level only records the sequence length, there
+            # is no need to walk through its elements one by one
+            lod[0].append(len(data))
+            self.data.extend(data)
         else:
             lod[0].append(len(data))
             for each_data in data:
                 self._feed_impl_(each_data, lod[1:], lod_level - 1)
 
+    def _write_to_buffer(self, data):
+        try:
+            arr = np.asarray(data)
+        except ValueError:
+            arr = None
+        if arr is None or arr.dtype == np.object_ or not self._fit_buffer(arr):
+            # fallback to collect samples into list, so that the batch is
+            # assembled and checked exactly the same as before
+            self._spill_buffer()
+            return False
+
+        if self._buffer is None or self._size == len(self._buffer):
+            self._grow_buffer()
+        self._buffer[self._size] = arr.reshape(self._sample_shape)
+        self._size += 1
+        return True
+
+    def _fit_buffer(self, arr):
+        # all samples of a batch must have the same shape to be stacked
+        if self._batch_shape is not None:
+            return arr.shape == self._batch_shape
+        # samples whose rank is different from the data layer are reshaped
+        # to the shape of the data layer, see done()
+        if arr.shape != self._sample_shape and (arr.ndim + 1 == len(
+                self.shape) or arr.size != int(np.prod(self._sample_shape))):
+            return False
+        self._batch_shape = arr.shape
+        return True
+
+    def _grow_buffer(self):
+        capacity = self._capacity
+        if self._buffer is not None:
+            capacity = max(capacity, 2 * len(self._buffer))
+        buf = np.empty((capacity, ) + self._sample_shape, dtype=self.dtype)
+        if self._size > 0:
+            buf[:self._size] = self._buffer[:self._size]
+        self._buffer = buf
+
+    def _spill_buffer(self):
+        if self._size > 0:
+            self.data = list(
+                self._buffer[:self._size].reshape((self._size, ) +
+                                                  self._batch_shape).copy())
+        self._size = 0
+        self._use_buffer = False
+
     def _check_shape(self, shape):
         for s1, s2 in zip(self.shape, shape):
             if s1 != s2 and s1 >= 0 and s2 >= 0:
@@ -141,7 +219,13 @@ class DataToLoDTensorConverter(object):
                     format(self.shape, shape))
 
     def done(self):
-        arr = np.array(self.data, dtype=self.dtype)
+        if self._use_buffer:
+            if self._buffer is None:
+                self._grow_buffer()
+            # LoDTensor.set copies the data, so the buffer can be reused
+            arr = self._buffer[:self._size]
+        else:
+            arr = np.array(self.data, dtype=self.dtype)
         if self.shape:
             if len(arr.shape) != len(self.shape):
                 try:
@@ -173,7 +257,8 @@ class BatchedTensorProvider(object):
                     place=self.place,
                     lod_level=0,
                     shape=var.shape,
-                    dtype=var.dtype))
+                    dtype=var.dtype,
+                    capacity=batch_size))
 
     def _done(self):
         return [c.done() for c in self.converters]
@@ -183,7 +268,7 @@ class BatchedTensorProvider(object):
         for each_sample in self.generator():
             for each_slot, each_converter in six.moves.zip(each_sample,
                                                            self.converters):
-                each_converter.data.append(each_slot)
+                each_converter.feed(each_slot)
 
             idx += 1
             if idx == self.batch_size:
@@ -273,6 +358,32 @@ class DataFeeder(object):
             self.feed_shapes.append(each_var.shape)
 
         self.place = place
+        self._converters = None
+
+    def _get_converters(self, capacity):
+        # the converters, together with their batch buffers, are kept and
+        # reused by the following feed calls
+        if self._converters is None:
+            self._converters = [
+                DataToLoDTensorConverter(
+                    place=self.place,
+                    lod_level=lod_level,
+                    shape=shape,
+                    dtype=dtype,
+                    capacity=capacity)
+                for lod_level, shape, dtype in six.moves.zip(
+                    self.feed_lod_level, self.feed_shapes, self.feed_dtypes)
+            ]
+            return self._converters
+        for each_converter in self._converters:
+            # feed_parallel switches the place between the calls
+            each_converter.place = self.place
+            # drop what is left by a failed feed call
+            each_converter._reset()
+            if capacity:
+                each_converter._capacity = max(each_converter._capacity,
+                                               capacity)
+        return self._converters
 
     def feed(self, iterable):
         """
@@ -312,16 +423,8 @@ class DataFeeder(object):
                 print(result['data_3'])
 
         """
-        converter = []
-        for lod_level, shape, dtype in six.moves.zip(
-                self.feed_lod_level, self.feed_shapes, self.feed_dtypes):
-            converter.append(
-                DataToLoDTensorConverter(
-                    place=self.place,
-                    lod_level=lod_level,
-                    shape=shape,
-                    dtype=dtype))
-
+        capacity = len(iterable) if hasattr(iterable, '__len__') else None
+        converter = self._get_converters(capacity)
         for each_sample in iterable:
             assert len(each_sample) == len(converter), (
                 "The number of fields in data (%d) does not match " +
@@ -22,6 +22,7 @@ import six
 from . import learning_rate_scheduler
 import warnings
 from .. import core
+from ..checkpoint_file import load_state_file
 
 __all__ = [
     'save_dygraph',
@@ -130,17 +131,13 @@ def load_dygraph(model_path, keep_name_table=False):
         raise RuntimeError("Parameter file [ {} ] not exists".format(
             params_file_path))
 
-    with open(params_file_path, 'rb') as f:
-        para_dict = pickle.load(f) if six.PY2 else pickle.load(
-            f, encoding='latin1')
+    para_dict = load_state_file(params_file_path)
 
     if not keep_name_table and "StructuredToParameterName@@" in para_dict:
         del para_dict["StructuredToParameterName@@"]
     opti_dict = None
     opti_file_path = model_path + ".pdopt"
     if os.path.exists(opti_file_path):
-        with open(opti_file_path, 'rb') as f:
-            opti_dict = pickle.load(f) if six.PY2 else pickle.load(
-                f, encoding='latin1')
+        opti_dict = load_state_file(opti_file_path)
 
     return para_dict, opti_dict
@@ -26,7 +26,9 @@ from .static_analysis import AstNodeWrapper, StaticAnalysisVisitor
 
 __all__ = ['DygraphToStaticAst']
 
-DECORATOR_NAME = 'dygraph_to_static_output'
+DECORATOR_NAMES = [
+    'dygraph_to_static_output', 'dygraph_to_static_cached_output'
+]
 
 
 class IfElseTransformer(gast.NodeTransformer):
@@ -121,7 +123,7 @@ class DygraphToStaticAst(gast.NodeTransformer):
         # Remove the decorated name of dygraph_to_static
         if hasattr(node, 'decorator_list'):
             decorator_list = [
-                d for d in node.decorator_list if d.id != DECORATOR_NAME
+                d for d in node.decorator_list if d.id not in DECORATOR_NAMES
             ]
             node.decorator_list = decorator_list
         return node
@@ -157,7 +159,7 @@ class BasicApiTransformer(gast.NodeTransformer):
         self.generic_visit(node)
         if hasattr(node, 'decorator_list'):
             decorator_list = [
-                d for d in node.decorator_list if d.id != DECORATOR_NAME
+                d for d in node.decorator_list if d.id not in DECORATOR_NAMES
             ]
             node.decorator_list = decorator_list
         return node
@@ -19,10 +19,9 @@ import ast
 import gast
 import six
 import copy
-import tempfile
-import imp
-import os
-import atexit
+import itertools
+import linecache
+import types
 from collections import defaultdict
 
 from paddle.fluid import unique_name
@@ -30,6 +29,8 @@ from paddle.fluid import unique_name
 TRUE_FUNC_PREFIX = 'true_fn'
 FALSE_FUNC_PREFIX = 'false_fn'
 
+_GENERATED_MODULE_ID = itertools.count()
+
 
 class IsControlFlowIfVisitor(gast.NodeTransformer):
     """
@@ -342,6 +343,14 @@ def create_cond_node(return_name_ids, pred, true_func, false_func):
 def ast_to_func(ast_root, func_name, delete_on_exit=True):
     """
     Transform modified AST of decorated function into python callable object.
+
+    The AST is compiled in memory into a new module, no file is written. The
+    generated source is registered in linecache under a pseudo file name, so
+    that it shows in tracebacks and can be read by inspect.getsource for
+    debugging.
+
+    Returns the function and the pseudo file name. delete_on_exit is kept
+    for compatibility and has no effect.
     """
     if not isinstance(ast_root, (gast.AST, ast.AST)):
         raise TypeError(
@@ -349,29 +358,25 @@ def ast_to_func(ast_root, func_name, delete_on_exit=True):
             type(ast_root))
     if isinstance(ast_root, gast.AST):
         ast_root = gast.gast_to_ast(ast_root)
+    # compiling the generated source instead of the AST itself, so that the
+    # line numbers in tracebacks match the source registered in linecache
     source = astor.to_source(ast_root)
-    if six.PY2:
-        source = source.encode('utf-8')
-        f = tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False)
-    else:
-        f = tempfile.NamedTemporaryFile(
-            mode='w', suffix='.py', delete=False, encoding='utf-8')
-
-    # TODO(Aurelius84): more elegant way to transform ast into callable object
-    import_str = "import paddle\n" \
-                 "import paddle.fluid as fluid\n" \
-                 "import paddle.fluid.layers as layers\n"
-    with f:
-        module_name = os.path.basename(f.name[:-3])
-        f.write(import_str)
-        f.write(source)
-
-    if delete_on_exit:
-        atexit.register(lambda: os.remove(f.name))
-    module = imp.load_source(module_name, f.name)
+    module_name = '%s_%d' % (func_name, next(_GENERATED_MODULE_ID))
+    file_name = '<dygraph_to_static %s>' % module_name
+    code = compile(source, file_name, 'exec')
+    linecache.cache[file_name] = (len(source), None, source.splitlines(True),
+                                  file_name)
+
+    import paddle
+    import paddle.fluid as fluid
+    import paddle.fluid.layers as layers
+    module = types.ModuleType(module_name)
+    module.__file__ = file_name
+    module.__dict__.update(paddle=paddle, fluid=fluid, layers=layers)
+    six.exec_(code, module.__dict__)
     if not hasattr(module, func_name):
         raise ValueError(
             'Function: %s doesn\'t exist in the Module transformed from AST.' %
             func_name)
 
-    return getattr(module, func_name), f.name
+    return getattr(module, func_name), file_name
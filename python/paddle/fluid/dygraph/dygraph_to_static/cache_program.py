@@ -0,0 +1,224 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import gast
+import inspect
+import numpy as np
+import six
+import textwrap
+
+from paddle.fluid import core
+from paddle.fluid import framework
+from paddle.fluid import unique_name
+from paddle.fluid.data import data
+from paddle.fluid.executor import Executor
+from ..base import to_variable
+from .ast_transformer import DygraphToStaticAst
+from .ast_utils import ast_to_func
+
+__all__ = ['FunctionCache', 'ProgramCache']
+
+
+class FunctionCache(object):
+    """
+    Cache the static functions converted from the dygraph functions, keyed on
+    the code objects of the dygraph functions, so that a function is
+    converted only once however many times it is called.
+    """
+
+    def __init__(self):
+        self._code_to_static_func = dict()
+
+    def get_or_cache_func(self, dygraph_func):
+        code = six.get_function_code(dygraph_func)
+        static_func = self._code_to_static_func.get(code)
+        if static_func is None:
+            static_func = self._convert(dygraph_func)
+            self._code_to_static_func[code] = static_func
+        return static_func
+
+    def _convert(self, dygraph_func):
+        # Get AST from dygraph function
+        dygraph_code = inspect.getsource(dygraph_func)
+        dygraph_code = textwrap.dedent(dygraph_code)
+        root = gast.parse(dygraph_code)
+
+        # Transform AST
+        dygraph_to_static = DygraphToStaticAst()
+        root_wrapper = dygraph_to_static.get_static_ast(root)
+        func_name = dygraph_to_static.get_module_name()
+        static_func, file_name = ast_to_func(root_wrapper.node, func_name)
+        return static_func
+
+    def __len__(self):
+        return len(self._code_to_static_func)
+
+    def clear(self):
+        self._code_to_static_func.clear()
+
+
+def _is_tensor(value):
+    return isinstance(value, (np.ndarray, core.VarBase))
+
+
+def _arg_values(args, kwargs):
+    return list(args) + [kwargs[key] for key in sorted(kwargs)]
+
+
+def _hashable(value):
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+class _CachedProgram(object):
+    def __init__(self, program, feed_names, fetch_names, return_list):
+        self.program = program
+        self.feed_names = feed_names
+        self.fetch_names = fetch_names
+        self.return_list = return_list
+
+
+class ProgramCache(object):
+    """
+    Cache the static Programs built by a static function, keyed on the input
+    signature of a call: the shapes and dtypes of the tensor arguments, the
+    values of the other arguments and whether it's in train or eval mode.
+
+    A Program is built and its startup Program is run on the first call with
+    a signature, the later calls with the same signature just feed the
+    tensors to the built Program and run it by an Executor. The parameters
+    are kept in a scope owned by the cache, and shared by the Programs of all
+    the signatures: every Program is built with the same unique names, and
+    only the parameters not created yet are initialized.
+
+    The tensor arguments can be numpy arrays, or Variables in dygraph mode,
+    whose values are fed. The results are numpy arrays, or Variables in
+    dygraph mode.
+
+    The Program runs detached from the dygraph model. The layers created by
+    the static function have their own parameters in the cache, initialized
+    with the random seeds of the default Programs. The results don't require
+    gradients, and no gradient is propagated back to the Variable arguments,
+    so the ones requiring gradients, whose stop_gradient is False, are
+    rejected.
+
+    Args:
+        static_func (callable): the static function building the Program.
+    """
+
+    def __init__(self, static_func):
+        self._static_func = static_func
+        self._programs = dict()
+        self._scope = core.Scope()
+        self._exe = None
+
+    def __len__(self):
+        return len(self._programs)
+
+    def _signature(self, args, kwargs, is_test):
+        signature = []
+        for value in _arg_values(args, kwargs):
+            if _is_tensor(value):
+                signature.append((tuple(value.shape), str(value.dtype)))
+            else:
+                signature.append(_hashable(value))
+        return tuple(signature), tuple(sorted(kwargs)), is_test
+
+    def _build(self, args, kwargs, is_test):
+        feed_names = []
+
+        def to_feed_var(value):
+            if not _is_tensor(value):
+                return value
+            name = 'feed_%d' % len(feed_names)
+            feed_names.append(name)
+            return data(name=name, shape=list(value.shape), dtype=value.dtype)
+
+        main_program = framework.Program()
+        startup_program = framework.Program()
+        main_program.random_seed = framework.default_main_program().random_seed
+        startup_program.random_seed = \
+            framework.default_startup_program().random_seed
+        with framework.program_guard(main_program, startup_program):
+            with unique_name.guard():
+                feed_args = [to_feed_var(value) for value in args]
+                feed_kwargs = dict(
+                    (key, to_feed_var(kwargs[key])) for key in sorted(kwargs))
+                outputs = self._static_func(*feed_args, **feed_kwargs)
+
+        return_list = isinstance(outputs, (list, tuple))
+        if not return_list:
+            outputs = [outputs]
+        for var in outputs:
+            if not isinstance(var, framework.Variable):
+                raise TypeError(
+                    "The outputs of the function should be Variables, but "
+                    "received %s." % type(var))
+        if is_test:
+            main_program = main_program.clone(for_test=True)
+
+        # the parameters initialized for the former signatures are kept
+        block = startup_program.global_block()
+        for idx in reversed(range(len(block.ops))):
+            if all(
+                    self._scope.find_var(name) is not None
+                    for name in block.ops[idx].output_arg_names):
+                block._remove_op(idx)
+
+        if self._exe is None:
+            self._exe = Executor(framework._current_expected_place())
+        self._exe.run(startup_program, scope=self._scope)
+        return _CachedProgram(main_program, feed_names,
+                              [var.name for var in outputs], return_list)
+
+    def __call__(self, *args, **kwargs):
+        for value in _arg_values(args, kwargs):
+            if isinstance(value, core.VarBase) and not value.stop_gradient:
+                raise ValueError(
+                    "The Variable %s requires gradient, but the cached "
+                    "Program can't propagate gradients back to it. Set its "
+                    "stop_gradient to True, or call the dygraph function "
+                    "directly." % value.name)
+        is_dygraph = framework.in_dygraph_mode()
+        is_test = is_dygraph and not framework._dygraph_tracer()._train_mode
+        signature = self._signature(args, kwargs, is_test)
+        cached = self._programs.get(signature)
+        if cached is None:
+            with framework._dygraph_guard(None):
+                cached = self._build(args, kwargs, is_test)
+            self._programs[signature] = cached
+
+        tensors = [
+            value for value in _arg_values(args, kwargs) if _is_tensor(value)
+        ]
+        feed = dict()
+        for name, value in zip(cached.feed_names, tensors):
+            feed[name] = value.numpy() if isinstance(value,
+                                                     core.VarBase) else value
+        with framework._dygraph_guard(None):
+            results = self._exe.run(
+                cached.program,
+                feed=feed,
+                fetch_list=cached.fetch_names,
+                scope=self._scope)
+        if is_dygraph:
+            results = [to_variable(result) for result in results]
+            for result in results:
+                result.stop_gradient = True
+        return results if cached.return_list else results[0]
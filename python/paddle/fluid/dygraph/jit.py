@@ -14,20 +14,19 @@
 
 from __future__ import print_function
 
-__all__ = ['TracedLayer', 'dygraph_to_static_output']
+__all__ = [
+    'TracedLayer', 'dygraph_to_static_output', 'dygraph_to_static_cached_output'
+]
 
-import gast
-import inspect
-import textwrap
+import six
 
 from ..wrapped_decorator import wrap_decorator
 from .base import program_desc_tracing_guard, switch_to_static_graph
-from .dygraph_to_static import DygraphToStaticAst
-from .dygraph_to_static.ast_utils import ast_to_func
+from .dygraph_to_static import FunctionCache, ProgramCache
 from .layers import Layer
 from paddle.fluid import core
 from paddle.fluid.framework import Program, Block, Variable, _dygraph_tracer, dygraph_only, _dygraph_guard, _current_expected_place, in_dygraph_mode
-from paddle.fluid.executor import Executor, scope_guard
+from paddle.fluid.executor import Executor, scope_guard, as_numpy, _as_lodtensor
 from paddle.fluid.compiler import CompiledProgram
 
 
@@ -54,25 +53,52 @@ def extract_vars(inputs):
     return result_list
 
 
+_FUNCTION_CACHE = FunctionCache()
+# the ProgramCaches of the static functions, keyed on the code objects of the
+# dygraph functions like _FUNCTION_CACHE, because wrap_decorator applies the
+# decorator again on every call
+_PROGRAM_CACHES = dict()
+
+
 def _dygraph_to_static_output_(dygraph_func):
     def __impl__(*args, **kwargs):
-        # Get AST from dygraph function
-        dygraph_code = inspect.getsource(dygraph_func)
-        dygraph_code = textwrap.dedent(dygraph_code)
-        root = gast.parse(dygraph_code)
+        static_func = _FUNCTION_CACHE.get_or_cache_func(dygraph_func)
+        return static_func(*args, **kwargs)
 
-        # Transform AST
-        dygraph_to_static = DygraphToStaticAst()
-        root_wrapper = dygraph_to_static.get_static_ast(root)
-        func_name = dygraph_to_static.get_module_name()
-        static_func, file_name = ast_to_func(root_wrapper.node, func_name)
+    return __impl__
 
-        return static_func(*args, **kwargs)
+
+def _dygraph_to_static_cached_output_(dygraph_func):
+    """
+    Convert the dygraph function into a static function, and run it as a
+    static Program cached for the shapes and dtypes of its tensor inputs.
+    The inputs are numpy arrays or dygraph Variables, and the outputs are
+    numpy arrays, or dygraph Variables in dygraph mode. See ProgramCache.
+
+    The Program is run detached from the dygraph model: the layers created in
+    the function have their own parameters, and no gradient is propagated to
+    the inputs, so the dygraph Variables requiring gradients are rejected.
+    To build the ops into the current Program, use dygraph_to_static_output.
+    """
+
+    def __impl__(*args, **kwargs):
+        code = six.get_function_code(dygraph_func)
+        program_cache = _PROGRAM_CACHES.get(code)
+        if program_cache is None:
+            static_func = _FUNCTION_CACHE.get_or_cache_func(dygraph_func)
+            program_cache = ProgramCache(static_func)
+            _PROGRAM_CACHES[code] = program_cache
+        return program_cache(*args, **kwargs)
 
     return __impl__
 
 
 dygraph_to_static_output = wrap_decorator(_dygraph_to_static_output_)
+dygraph_to_static_cached_output = wrap_decorator(
+    _dygraph_to_static_cached_output_)
+# for fluidDoc
+dygraph_to_static_cached_output.__doc__ = \
+    _dygraph_to_static_cached_output_.__doc__
 
 
 @dygraph_only
@@ -120,6 +146,11 @@ class TracedLayer(object):
     and :code:`CompiledProgram` . The static graph model would share
     parameters with the dygraph model.
 
+    Unless a strategy is set by :code:`set_strategy` , the feed and fetch
+    operators are added and the executor context is prepared on the first
+    call, and the later calls feed the input tensors without copying them
+    and run the prepared context directly.
+
     All TracedLayer objects should not be created by constructor and should
     be created by static method :code:`TracedLayer.trace(layer, inputs)` .
 
@@ -145,6 +176,7 @@ class TracedLayer(object):
         self._compiled_program = None
         self._build_strategy = None
         self._exec_strategy = None
+        self._prepared = None
 
     @property
     def program(self):
@@ -156,6 +188,11 @@ class TracedLayer(object):
             for op in block.ops:
                 if op.has_attr("is_test"):
                     op._set_attr("is_test", is_test)
+        # the prepared context is created from the ops before switching, drop
+        # it with its scope
+        if self._prepared is not None:
+            self._scope._drop_kid(self._prepared[2])
+        self._prepared = None
 
     @staticmethod
     @dygraph_only
@@ -284,7 +321,47 @@ class TracedLayer(object):
                              feed=feed,
                              fetch_list=self._fetch_names)
 
+    @switch_to_static_graph
+    def _prepare(self):
+        program = self._exe._add_feed_fetch_ops(
+            program=self._program,
+            feed=self._feed_names,
+            fetch_list=self._fetch_names,
+            feed_var_name='feed',
+            fetch_var_name='fetch')
+        executor = self._exe._default_executor
+        ctx = executor.prepare(program.desc, 0, self._fetch_names, False)
+        scope = self._scope.new_scope()
+        executor.create_variables(program.desc, scope, 0)
+        self._prepared = (program, ctx, scope)
+
+    def _run_prepared(self, inputs):
+        assert isinstance(inputs, (list, tuple)), \
+            "Inputs should be a list or tuple of variables"
+        assert len(inputs) == len(self._feed_names)
+        if self._prepared is None:
+            self._prepare()
+        _, ctx, scope = self._prepared
+
+        for idx, x in enumerate(inputs):
+            if isinstance(x, core.VarBase):
+                # share the data of the dygraph variable without copying it
+                tensor = x.value().get_tensor()
+            elif isinstance(x, core.LoDTensor):
+                tensor = x
+            else:
+                tensor = _as_lodtensor(x, self._place)
+            core.set_feed_variable(scope, tensor, 'feed', idx)
+
+        self._exe._default_executor.run_prepared_ctx(ctx, scope, False, False,
+                                                     False)
+        tensors = scope.find_var('fetch').get_lod_tensor_array()._move_to_list()
+        return [as_numpy(tensor) for tensor in tensors]
+
     def __call__(self, inputs):
+        if self._build_strategy is None and self._exec_strategy is None:
+            return self._run_prepared(inputs)
+
         with scope_guard(self._scope):
             if self._compiled_program is None:
                 self._compile()
@@ -14,10 +14,12 @@
 
 from __future__ import print_function
 
+import collections
 import logging
 import os
 import multiprocessing
 import sys
+import time
 import warnings
 import numpy as np
 from .wrapped_decorator import signature_safe_contextmanager
@@ -32,6 +34,8 @@ from .trainer_factory import FetchHandlerMonitor
 
 __all__ = ['Executor', 'global_scope', 'scope_guard']
 
+_DEFAULT_PROGRAM_CACHE_CAPACITY = 64
+
 g_scope = core.Scope()
 InferNativeConfig = core.NativeConfig
 InferAnalysisConfig = core.AnalysisConfig
@@ -100,11 +104,15 @@ def scope_guard(scope):
     _switch_scope(ex)
 
 
-def as_numpy(tensor):
+def as_numpy(tensor, copy=True):
     """
     Convert a Tensor to a numpy.ndarray, its only support Tensor without LoD information.
     For higher dimensional sequence data, please use LoDTensor directly.
 
+    If :code:`copy` is False, the returned numpy.ndarray is a read-only view
+    sharing the CPU buffer of the Tensor. The view keeps the Tensor alive, and
+    it is invalidated if the Tensor is set or resized afterwards.
+
     Examples:
         .. code-block:: python
 
@@ -119,14 +127,15 @@ def as_numpy(tensor):
 
     Args:
        tensor(Variable): a instance of Tensor
+       copy(bool): whether to copy the data of the Tensor. Default True.
 
     Returns:
         numpy.ndarray
     """
     if isinstance(tensor, core.LoDTensorArray):
-        return [as_numpy(t) for t in tensor]
+        return [as_numpy(t, copy) for t in tensor]
     if isinstance(tensor, list):
-        return [as_numpy(t) for t in tensor]
+        return [as_numpy(t, copy) for t in tensor]
     assert isinstance(tensor, core.LoDTensor)
     lod = tensor.lod()
     if len(lod) > 0:
@@ -135,11 +144,46 @@ def as_numpy(tensor):
             Please set the parameter 'return_numpy' as 'False' to \
             return LoDTensor itself directly.")
     if tensor._is_initialized():
-        return np.array(tensor)
+        return np.array(tensor) if copy else tensor._as_numpy_view()
     else:
         return None
 
 
+def _fetch_into_buffers(tensors, fetch_list, fetch_buffers, copy=True):
+    """
+    Convert the fetched tensors to numpy.ndarray. The tensors whose names are
+    in :code:`fetch_buffers` are written into the given numpy.ndarray in place,
+    and the numpy.ndarray of the buffer is returned instead of a new one.
+    """
+    results = []
+    for var, tensor in zip(fetch_list, tensors):
+        name = _to_name_str(var)
+        buf = fetch_buffers.get(name, None)
+        if buf is None:
+            results.append(as_numpy(tensor, copy))
+            continue
+        if not isinstance(buf, np.ndarray):
+            raise TypeError(
+                "The fetch buffer of {} should be numpy.ndarray, but received {}."
+                .format(name, type(buf)))
+        if not isinstance(tensor, core.LoDTensor):
+            raise TypeError(
+                "Only LoDTensor can be fetched into buffer, but {} is {}.".
+                format(name, type(tensor)))
+        value = as_numpy(tensor, copy=False)
+        if value is None:
+            raise ValueError(
+                "The fetched variable {} is not initialized.".format(name))
+        if buf.shape != value.shape or buf.dtype != value.dtype:
+            raise ValueError(
+                "The fetch buffer of {} should have shape {} and dtype {}, "
+                "but received shape {} and dtype {}.".format(
+                    name, value.shape, value.dtype, buf.shape, buf.dtype))
+        np.copyto(buf, value)
+        results.append(buf)
+    return results
+
+
 def dtype_is_compatible_with(first, second):
     """
     Returns True if the first dtype can be compatible the second one.
@@ -362,7 +406,10 @@ def _to_name_str(var):
 
 
 def _get_strong_program_cache_key(program, feed, fetch_list):
-    return str(id(program)) + _get_program_cache_key(feed, fetch_list)
+    # the version changes when the program is modified, so a modified
+    # program is prepared again instead of running the stale cached one
+    return "%d_%d_%s" % (program._uid, program._version,
+                         _get_program_cache_key(feed, fetch_list))
 
 
 def _get_program_cache_key(feed, fetch_list):
@@ -372,6 +419,99 @@ def _get_program_cache_key(feed, fetch_list):
     return str(feed_var_names + fetch_var_names)
 
 
+class _ProgramCacheEntry(object):
+    def __init__(self, program, ctx, scope, parent_scope):
+        self.program = program
+        self.ctx = ctx
+        self.scope = scope
+        self.parent_scope = parent_scope
+
+
+class _ProgramCache(object):
+    """
+    A LRU cache of the (program, prepared context, sub-scope) triples used
+    by :code:`Executor.run` when :code:`use_program_cache` is True.
+
+    When the cache is full, the least recently used entry is evicted and
+    its sub-scope is dropped from the parent scope.
+
+    Args:
+        capacity(int): the max number of cached entries.
+    """
+
+    def __init__(self, capacity=_DEFAULT_PROGRAM_CACHE_CAPACITY):
+        self._entries = collections.OrderedDict()
+        self._capacity = 0
+        self.set_capacity(capacity)
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._prepare_time = 0.0
+
+    @property
+    def capacity(self):
+        return self._capacity
+
+    def set_capacity(self, capacity):
+        if not isinstance(capacity, six.integer_types) or capacity <= 0:
+            raise ValueError(
+                "The capacity of program cache should be a positive integer, "
+                "but received %s." % capacity)
+        self._capacity = capacity
+        self._shrink()
+
+    def get(self, key, parent_scope):
+        entry = self._entries.get(key, None)
+        # the cached sub-scope can not be reused under another parent scope
+        if entry is None or entry.parent_scope is not parent_scope:
+            self._misses += 1
+            return None
+        self._hits += 1
+        # move the entry to the most recently used end
+        del self._entries[key]
+        self._entries[key] = entry
+        return entry
+
+    def put(self, key, entry, prepare_time=0.0):
+        if key in self._entries:
+            self._release(self._entries.pop(key))
+        self._entries[key] = entry
+        self._prepare_time += prepare_time
+        self._shrink()
+
+    def clear(self):
+        while self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._release(entry)
+
+    def stats(self):
+        return {
+            'size': len(self._entries),
+            'capacity': self._capacity,
+            'hits': self._hits,
+            'misses': self._misses,
+            'evictions': self._evictions,
+            'prepare_time': self._prepare_time,
+        }
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def _shrink(self):
+        while len(self._entries) > self._capacity:
+            _, entry = self._entries.popitem(last=False)
+            self._release(entry)
+            self._evictions += 1
+
+    def _release(self, entry):
+        entry.parent_scope._drop_kid(entry.scope)
+        entry.ctx = None
+        entry.scope = None
+
+
 def _as_lodtensor(data, place):
     """
         Convert numpy.ndarray to Tensor, its only support Tensor without LoD information.
@@ -494,32 +634,57 @@ class Executor(object):
 
     def __init__(self, place):
         self.place = place
-        self.program_caches = dict()
-        self.ctx_caches = dict()
-        self.scope_caches = dict()
+        self._program_cache = _ProgramCache()
         self.var_caches = dict()
         p = core.Place()
         p.set_place(self.place)
         self._default_executor = core.Executor(p)
         self._closed = False
 
-    def _get_scope_cache(self, program_cache_key):
-        return self.scope_caches.get(program_cache_key, None)
+    def set_program_cache_capacity(self, capacity):
+        """
+        Set the max number of programs cached by :code:`Executor.run` with
+        :code:`use_program_cache=True`. Each distinct combination of program,
+        feed names and fetch list takes one entry. When the cache is full,
+        the least recently used entry and its sub-scope are released.
+
+        Args:
+            capacity(int): the max number of cached programs, it should be
+                a positive integer. The default capacity is 64.
+
+        Returns:
+            None
 
-    def _get_ctx_cache(self, program_cache_key):
-        return self.ctx_caches.get(program_cache_key, None)
+        Examples:
+            .. code-block:: python
 
-    def _get_program_cache(self, program_cache_key):
-        return self.program_caches.get(program_cache_key, None)
+              import paddle.fluid as fluid
 
-    def _add_program_cache(self, program_cache_key, program):
-        self.program_caches[program_cache_key] = program
+              exe = fluid.Executor(fluid.CPUPlace())
+              exe.set_program_cache_capacity(16)
+        """
+        self._program_cache.set_capacity(capacity)
 
-    def _add_ctx_cache(self, ctx_cache_key, ctx):
-        self.ctx_caches[ctx_cache_key] = ctx
+    def program_cache_stats(self):
+        """
+        Get the statistics of the program cache used by :code:`Executor.run`
+        with :code:`use_program_cache=True`.
+
+        Returns:
+            dict: a dict with the following keys, :code:`size` (the number of
+            cached programs), :code:`capacity`, :code:`hits`, :code:`misses`,
+            :code:`evictions` and :code:`prepare_time` (the total seconds
+            spent on preparing the cached programs).
 
-    def _add_scope_cache(self, scope_cache_key, scope):
-        self.scope_caches[scope_cache_key] = scope
+        Examples:
+            .. code-block:: python
+
+              import paddle.fluid as fluid
+
+              exe = fluid.Executor(fluid.CPUPlace())
+              print(exe.program_cache_stats()['hits'])
+        """
+        return self._program_cache.stats()
 
     def _add_feed_fetch_ops(self, program, feed, fetch_list, feed_var_name,
                             fetch_var_name):
@@ -616,11 +781,12 @@ class Executor(object):
               exe.close()
         """
         if not self._closed:
+            self._program_cache.clear()
             self._default_executor.close()
             self._closed = True
 
     def _run_parallel(self, program, scope, feed, fetch_list, fetch_var_name,
-                      return_numpy):
+                      return_numpy, zero_copy_fetch, fetch_buffers):
         exe = program._executor
         # TODO(zhenghuihuang): quantization uses Graph in CompiledProgram
         # instead of program. We will add support for checking Vars in Graph
@@ -675,7 +841,17 @@ class Executor(object):
 
         fetch_var_names = list(map(_to_name_str, fetch_list))
         tensors = exe.run(fetch_var_names)._move_to_list()
-        return as_numpy(tensors) if return_numpy else tensors
+        return self._convert_fetch_results(tensors, fetch_list, return_numpy,
+                                           zero_copy_fetch, fetch_buffers)
+
+    def _convert_fetch_results(self, tensors, fetch_list, return_numpy,
+                               zero_copy_fetch, fetch_buffers):
+        if not return_numpy:
+            return tensors
+        copy = not zero_copy_fetch
+        if fetch_buffers:
+            return _fetch_into_buffers(tensors, fetch_list, fetch_buffers, copy)
+        return as_numpy(tensors, copy)
 
     def run(self,
             program=None,
@@ -685,7 +861,9 @@ class Executor(object):
             fetch_var_name='fetch',
             scope=None,
             return_numpy=True,
-            use_program_cache=False):
+            use_program_cache=False,
+            zero_copy_fetch=False,
+            fetch_buffers=None):
         """
         Run the specified :code:`Program` or :code:`CompiledProgram`. It should be noted that the executor
         will execute all the operators in :code:`Program` or :code:`CompiledProgram` without pruning some
@@ -724,6 +902,17 @@ class Executor(object):
                 the input program is :code:`fluid.Program`, and the parameters(program, feed variable name
                 and fetch_list variable) of this interface remains unchanged during running.
                 The default is False.
+            zero_copy_fetch(bool): This parameter indicates whether the fetched variables are
+                returned as read-only numpy.ndarray sharing the buffers of the fetched
+                :code:`LoDTensor` without copy. It only works when :code:`return_numpy` is True.
+                Each returned array keeps its buffer alive, and the buffer is never reused
+                by the following runs, so the array stays valid until it is released.
+                The default is False.
+            fetch_buffers(dict): A dict mapping the names of fetched variables to numpy.ndarray.
+                The values of these variables are written into the given numpy.ndarray in place,
+                and the given numpy.ndarray are returned in the fetched result list. The shape
+                and dtype of each numpy.ndarray should be the same as the fetched variable.
+                It only works when :code:`return_numpy` is True. The default is None.
                 
         Returns:
 
@@ -775,18 +964,38 @@ class Executor(object):
                 fetch_var_name=fetch_var_name,
                 scope=scope,
                 return_numpy=return_numpy,
-                use_program_cache=use_program_cache)
+                use_program_cache=use_program_cache,
+                zero_copy_fetch=zero_copy_fetch,
+                fetch_buffers=fetch_buffers)
         except Exception as e:
             if not isinstance(e, core.EOFException):
                 warnings.warn(
                     "The following exception is not an EOF exception.")
             six.reraise(*sys.exc_info())
 
-    def _run_impl(self, program, feed, fetch_list, feed_var_name,
-                  fetch_var_name, scope, return_numpy, use_program_cache):
+    def _run_impl(self,
+                  program,
+                  feed,
+                  fetch_list,
+                  feed_var_name,
+                  fetch_var_name,
+                  scope,
+                  return_numpy,
+                  use_program_cache,
+                  zero_copy_fetch=False,
+                  fetch_buffers=None):
         if self._closed:
             raise RuntimeError("Attempted to use a closed Executor")
 
+        if fetch_buffers is not None:
+            if not isinstance(fetch_buffers, dict):
+                raise TypeError(
+                    "fetch_buffers requires dict as its Parameter. But you passed in %s"
+                    % (type(fetch_buffers)))
+            if not return_numpy:
+                raise ValueError(
+                    "fetch_buffers only works when return_numpy is True.")
+
         use_default_main_program = program is None
         if program is None:
             program = default_main_program()
@@ -828,7 +1037,9 @@ class Executor(object):
                 fetch_var_name=fetch_var_name,
                 scope=scope,
                 return_numpy=return_numpy,
-                use_program_cache=use_program_cache)
+                use_program_cache=use_program_cache,
+                zero_copy_fetch=zero_copy_fetch,
+                fetch_buffers=fetch_buffers)
 
         program._compile(scope, self.place)
         if program._is_inference:
@@ -840,10 +1051,21 @@ class Executor(object):
                 feed=feed,
                 fetch_list=fetch_list,
                 fetch_var_name=fetch_var_name,
-                return_numpy=return_numpy)
-
-    def _run_program(self, program, feed, fetch_list, feed_var_name,
-                     fetch_var_name, scope, return_numpy, use_program_cache):
+                return_numpy=return_numpy,
+                zero_copy_fetch=zero_copy_fetch,
+                fetch_buffers=fetch_buffers)
+
+    def _run_program(self,
+                     program,
+                     feed,
+                     fetch_list,
+                     feed_var_name,
+                     fetch_var_name,
+                     scope,
+                     return_numpy,
+                     use_program_cache,
+                     zero_copy_fetch=False,
+                     fetch_buffers=None):
 
         if feed is None:
             feed = {}
@@ -864,33 +1086,29 @@ class Executor(object):
 
         if use_program_cache:
             cache_key = _get_strong_program_cache_key(program, feed, fetch_list)
-            cached_program = self._get_program_cache(cache_key)
-            cached_ctx = self._get_ctx_cache(cache_key)
-            cached_scope = self._get_scope_cache(cache_key)
-            if cached_program is None:
+            entry = self._program_cache.get(cache_key, scope)
+            if entry is None:
+                begin = time.time()
                 cached_program = self._add_feed_fetch_ops(
                     program=program,
                     feed=feed,
                     fetch_list=fetch_list,
                     feed_var_name=feed_var_name,
                     fetch_var_name=fetch_var_name)
-                self._add_program_cache(cache_key, cached_program)
                 fetch_list_str = list(map(_to_name_str, fetch_list))
                 cached_ctx = self._default_executor.prepare(
                     cached_program.desc, 0, fetch_list_str, False)
-                # currently, we cache program, vars, sub_scope here
-                # we suppose that in a life cycle of training, a user
-                # will not create many programs. So, here the basic
-                # rule of caching is to cache all unseen (program, var, scope)
-                # when a user use use_program_cache.
+                # we cache program, ctx and sub_scope here, the least
+                # recently used entry is released when the cache is full.
                 cached_scope = scope.new_scope()
                 self._default_executor.create_variables(cached_program.desc,
                                                         cached_scope, 0)
-                self._add_ctx_cache(cache_key, cached_ctx)
-                self._add_scope_cache(cache_key, cached_scope)
-            program = cached_program
-            ctx = cached_ctx
-            scope = cached_scope
+                entry = _ProgramCacheEntry(cached_program, cached_ctx,
+                                           cached_scope, scope)
+                self._program_cache.put(cache_key, entry, time.time() - begin)
+            program = entry.program
+            ctx = entry.ctx
+            scope = entry.scope
         else:
             program = self._add_feed_fetch_ops(
                 program=program,
@@ -908,10 +1126,8 @@ class Executor(object):
                                                     False)
         arr = scope.find_var(fetch_var_name).get_lod_tensor_array()
         tensors = arr._move_to_list()
-        if return_numpy:
-            return as_numpy(tensors)
-        else:
-            return tensors
+        return self._convert_fetch_results(tensors, fetch_list, return_numpy,
+                                           zero_copy_fetch, fetch_buffers)
 
     def _run_inference(self, exe, feed):
         return exe.run(feed)
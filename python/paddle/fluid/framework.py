@@ -18,6 +18,8 @@ import collections
 from collections import defaultdict
 from collections import Iterable
 import contextlib
+import hashlib
+import itertools
 from .wrapped_decorator import signature_safe_contextmanager, wrap_decorator
 import os
 import re
@@ -51,6 +53,7 @@ __all__ = [
     'Variable',
     'load_op_library',
     'require_version',
+    'set_op_callstack_mode',
 ]
 
 EMPTY_VAR_NAME = core.kEmptyVarName()
@@ -61,6 +64,13 @@ CONTROL_DEP_VAR_PREFIX = core.kControlDepVarName()
 
 _dygraph_tracer_ = None
 _dygraph_current_expected_place_ = None
+_program_uid_generator_ = itertools.count()
+_op_callstack_mode_ = 'full'
+_op_callstack_sample_interval_ = 1
+_op_callstack_max_depth_ = None
+_op_callstack_counter_ = itertools.count()
+# formatted frame strings of the interned mode, keyed by (file, line, func)
+_op_callstack_frames_ = {}
 
 
 def require_version(min_version, max_version=None):
@@ -475,6 +485,87 @@ def _full_name_scope():
     return name
 
 
+def set_op_callstack_mode(mode, sample_interval=100, max_depth=None):
+    """
+    Set how the Python call stack is recorded when an operator is created in
+    static graph mode. The call stack is shown in the error message when the
+    operator fails at runtime, but recording it takes most of the time of
+    building a large network and makes the serialized program much larger.
+
+    Args:
+        mode(str): One of the following modes.
+            'full': record the formatted call stack with the source code of
+            every frame for every operator, which is the default mode.
+            'off': do not record the call stack.
+            'sampled': record the formatted call stack for one operator in
+            every :code:`sample_interval` created operators.
+            'interned': record the file name, line number and function name
+            of every frame without the source code. The frame strings are
+            formatted once and shared by all the operators.
+        sample_interval(int, optional): The sample interval of the 'sampled'
+            mode. Default: 100.
+        max_depth(int, optional): The max number of the innermost frames to
+            record. Default: None, record all the frames.
+
+    Returns:
+        None
+
+    Examples:
+        .. code-block:: python
+
+            import paddle.fluid as fluid
+
+            fluid.set_op_callstack_mode('interned', max_depth=10)
+            x = fluid.data(name='x', shape=[None, 13], dtype='float32')
+            y = fluid.layers.fc(input=x, size=1)
+            fluid.set_op_callstack_mode('full')
+    """
+    global _op_callstack_mode_
+    global _op_callstack_sample_interval_
+    global _op_callstack_max_depth_
+    if mode not in ['full', 'off', 'sampled', 'interned']:
+        raise ValueError(
+            "mode should be one of 'full', 'off', 'sampled' and 'interned', "
+            "but received %s" % mode)
+    if sample_interval < 1:
+        raise ValueError("sample_interval should be greater than 0, but "
+                         "received %d" % sample_interval)
+    if max_depth is not None and max_depth < 1:
+        raise ValueError("max_depth should be greater than 0, but received "
+                         "%d" % max_depth)
+    _op_callstack_mode_ = mode
+    _op_callstack_sample_interval_ = sample_interval
+    _op_callstack_max_depth_ = max_depth
+
+
+def _op_callstack(frame):
+    """
+    Get the call stack to record for an operator created in frame, innermost
+    frame first. Return None if the call stack should not be recorded.
+    """
+    mode = _op_callstack_mode_
+    if mode == 'off':
+        return None
+    if mode == 'sampled' and next(
+            _op_callstack_counter_) % _op_callstack_sample_interval_ != 0:
+        return None
+    if mode == 'interned':
+        callstack = []
+        while frame is not None and (_op_callstack_max_depth_ is None or
+                                     len(callstack) < _op_callstack_max_depth_):
+            code = frame.f_code
+            key = (code.co_filename, frame.f_lineno, code.co_name)
+            line = _op_callstack_frames_.get(key)
+            if line is None:
+                line = '  File "%s", line %d, in %s\n' % key
+                _op_callstack_frames_[key] = line
+            callstack.append(line)
+            frame = frame.f_back
+        return callstack
+    return list(
+        reversed(traceback.format_stack(frame, _op_callstack_max_depth_)))
+
+
 def generate_control_dev_var_name():
     import random
     return CONTROL_DEP_VAR_PREFIX + "@" + str(random.random())
@@ -1288,6 +1379,7 @@ class Variable(object):
                 "you can just do it by hold it as normal Python variable")
         else:
             self.desc.set_persistable(p)
+            self.block.program._bump_version()
 
     @property
     def name(self):
@@ -1338,6 +1430,7 @@ class Variable(object):
             pass
         else:
             self.desc.set_name(new_name)
+            self.block.program._bump_version()
 
     @property
     def shape(self):
@@ -1792,9 +1885,10 @@ class Operator(object):
                 raise ValueError(
                     "`type` to initialized an Operator can not be None.")
             else:
-                callstack_var_name = op_maker.kOpCreationCallstackAttrName()
-                op_attrs[callstack_var_name] = list(
-                    reversed(traceback.format_stack()))[1:]
+                callstack = _op_callstack(sys._getframe(1))
+                if callstack is not None:
+                    callstack_var_name = op_maker.kOpCreationCallstackAttrName()
+                    op_attrs[callstack_var_name] = callstack
 
             self.desc.set_type(type)
             proto = OpProtoHolder.instance().get_op_proto(type)
@@ -1938,6 +2032,7 @@ class Operator(object):
             None
         """
         self.desc._rename_input(old_name, new_name)
+        self.block.program._bump_version()
 
     def _rename_output(self, old_name, new_name):
         """
@@ -1951,6 +2046,7 @@ class Operator(object):
             None
         """
         self.desc._rename_output(old_name, new_name)
+        self.block.program._bump_version()
 
     @property
     def input_names(self):
@@ -2029,6 +2125,7 @@ class Operator(object):
 
     def _remove_attr(self, name):
         self.desc.remove_attr(name)
+        self.block.program._bump_version()
 
     def _update_desc_attr(self, name, val):
         """
@@ -2051,6 +2148,7 @@ class Operator(object):
             self.desc.set_serialized_attr(name, val.serialize_to_string())
         else:
             self.desc._set_attr(name, val)
+        self.block.program._bump_version()
 
     @property
     def attr_names(self):
@@ -2185,7 +2283,10 @@ class Block(object):
     def __init__(self, program, idx):
         self.desc = program.desc.block(idx)
         self.vars = collections.OrderedDict()  # var_name --> var
-        self.ops = list()  # operator list
+        self._ops = list()  # operator list
+        # False if the python Operators have not been created from the op
+        # descs yet, see the ops property
+        self._ops_materialized = True
         self.program = program
         self.removed_vars = collections.OrderedDict()
 
@@ -2247,6 +2348,7 @@ class Block(object):
             None
         """
         self.desc._set_forward_block_idx(idx)
+        self.program._bump_version()
 
     @property
     def backward_block_idx(self):
@@ -2260,6 +2362,18 @@ class Block(object):
     def idx(self):
         return self.desc.id
 
+    @property
+    def ops(self):
+        """
+        The list of Operators in this block. The Operators of a block whose
+        op creation is deferred are created from the op descs on the first
+        access.
+        """
+        if not self._ops_materialized:
+            self._ops_materialized = True
+            self._sync_ops_with_cpp()
+        return self._ops
+
     def var(self, name):
         """
         Get a Variable by name from this block.
@@ -2351,6 +2465,7 @@ class Block(object):
             var = _varbase_creator(*args, **kwargs)
         else:
             var = Variable(block=self, *args, **kwargs)
+            self.program._bump_version()
             if 'initializer' in kwargs:
                 kwargs['initializer'](var, self)
         return var
@@ -2443,6 +2558,7 @@ class Block(object):
         self._sync_with_cpp()
         self.desc._remove_var(cpt.to_bytes(name))
         del self.vars[name]
+        self.program._bump_version()
 
     def create_parameter(self, *args, **kwargs):
         global_block = self.program.global_block()
@@ -2451,6 +2567,7 @@ class Block(object):
             param = ParamBase(*args, **kwargs)
         else:
             param = Parameter(global_block, *args, **kwargs)
+            self.program._bump_version()
         if 'initializer' in kwargs:
 
             def _is_inited_by(block, var):
@@ -2528,6 +2645,7 @@ class Block(object):
                 attrs=kwargs.get("attrs", None))
 
             self.ops.append(op)
+            self.program._bump_version()
 
         return op
 
@@ -2545,6 +2663,7 @@ class Block(object):
         op_desc = self.desc._insert_op(index)
         op = Operator(block=self, desc=op_desc, *args, **kwargs)
         self.ops.insert(index, op)
+        self.program._bump_version()
         return op
 
     def _remove_op(self, index):
@@ -2560,6 +2679,7 @@ class Block(object):
         self._sync_with_cpp()
         self.desc._remove_op(index, index + 1)
         del self.ops[index]
+        self.program._bump_version()
 
     def _slice_ops(self, start, end):
         """
@@ -2596,6 +2716,7 @@ class Block(object):
                 outputs=kwargs.get("outputs", None),
                 attrs=kwargs.get("attrs", None))
             self.ops.insert(0, op)
+            self.program._bump_version()
 
         return op
 
@@ -2614,56 +2735,29 @@ class Block(object):
             if not self.desc.find_var(cpt.to_bytes(var)):
                 self.vars.pop(var)
 
-        # sync operators from cpp
-        ops_in_cpp = []
-        for op_idx in range(0, self.desc.op_size()):
-            ops_in_cpp.append(self.desc.op(op_idx))
-
-        if len(self.ops) != 0:
-            first_op_in_python = self.ops[0].desc
-            last_op_in_python = self.ops[len(self.ops) - 1].desc
-            start_index = None
-            end_index = None
-            for index in range(len(ops_in_cpp)):
-                if first_op_in_python == ops_in_cpp[index]:
-                    start_index = index
-                if last_op_in_python == ops_in_cpp[index]:
-                    end_index = index
-            assert start_index is not None
-            assert end_index is not None
-            assert start_index <= end_index
-        else:
-            start_index = 0
-            end_index = -1
-
-        # sync ops append to the head of cpp_ops
-        for index in range((start_index - 1 - 1), -1, -1):
-            op_desc = ops_in_cpp[index]
-            op = Operator(self, op_desc)
-            self.ops.insert(0, op)
-
-        # sync ops append to the end of cpp_ops
-        for index in range((end_index + 1), len(ops_in_cpp)):
-            op_desc = ops_in_cpp[index]
-            op = Operator(self, op_desc)
-            self.ops.append(op)
+        # the desc may have been modified on the c++ end
+        self.program._bump_version()
 
-        # sync ops removed from c++ end
-        if end_index != -1 and end_index < len(self.ops):
-            ops_in_cpp_index = 0
-            ops_in_python_index = 0
-            while ops_in_python_index < len(
-                    self.ops) and ops_in_cpp_index < len(ops_in_cpp):
-                if self.ops[ops_in_python_index].desc != ops_in_cpp[
-                        ops_in_cpp_index]:
-                    del self.ops[ops_in_python_index]
-                else:
-                    ops_in_cpp_index += 1
-                    ops_in_python_index += 1
+        # deferred Operators are created from the op descs on first access
+        if self._ops_materialized:
+            self._sync_ops_with_cpp()
 
-        assert len(self.ops) == len(ops_in_cpp)
-        for index in range(len(self.ops)):
-            assert self.ops[index].desc == ops_in_cpp[index]
+    def _sync_ops_with_cpp(self):
+        """
+        Sync the Operators from the op descs on the c++ end. The op descs are
+        indexed by identity, so the python Operator of an op desc still in
+        the block is reused, ops inserted in c++ are created and ops removed
+        in c++ are dropped in a single pass over the c++ ops.
+        """
+        ops_in_python = dict((op.desc, op) for op in self._ops)
+        ops = []
+        for op_idx in six.moves.range(self.desc.op_size()):
+            op_desc = self.desc.op(op_idx)
+            op = ops_in_python.get(op_desc)
+            if op is None:
+                op = Operator(self, op_desc)
+            ops.append(op)
+        self._ops[:] = ops
 
     def _copy_param_info_from(self, other):
         """
@@ -3576,6 +3670,39 @@ class IrGraph(object):
             desc._set_attr(name, val)
 
 
+def _inference_optimize_desc(desc, prune_read_op=True):
+    """
+    Copy the program desc, remove the readers and the read_op from the copy
+    if prune_read_op is True, and set all the `is_test` attributes of it to
+    True. See Program._inference_optimize.
+    """
+    res = core.ProgramDesc(desc)
+
+    # remove all readers and the read_op if exist
+    read_op_idx = 0
+    root_block = res.block(0)
+    if prune_read_op:
+        while True:
+            if read_op_idx >= root_block.op_size() or root_block.op(
+                    read_op_idx).type() == 'read':
+                break
+            read_op_idx += 1
+        if read_op_idx < root_block.op_size():
+            root_block._remove_op(0, read_op_idx + 1)
+        for var in root_block.all_vars():
+            if var.type() == core.VarDesc.VarType.READER:
+                root_block._remove_var(cpt.to_bytes(var.name()))
+
+    # change all `is_test` attributes to True
+    for i in six.moves.range(res.num_blocks()):
+        block = res.block(i)
+        for j in six.moves.range(block.op_size()):
+            op = block.op(j)
+            if op.has_attr('is_test'):
+                op._set_attr('is_test', True)
+    return res
+
+
 class Program(object):
     """
     Create Python Program.  It has at least one :ref:`api_guide_Block_en`, when the
@@ -3622,9 +3749,17 @@ class Program(object):
 
     def __init__(self):
         self.desc = core.ProgramDesc()
+        # increased on every mutation made through the python API, see
+        # _bump_version
+        self._version = 0
+        # (desc fingerprint, program desc) of the last clone(for_test=True)
+        self._test_clone_cache = None
         self.blocks = [Block(self, 0)]
         self.current_block_idx = 0
         self._seed = 0
+        # unlike id(), the uid is never reused after the program is released,
+        # so it can safely identify the program in caches
+        self._uid = next(_program_uid_generator_)
         self._current_role = core.op_proto_and_checker_maker.OpRole.Forward
         self.__op_role_var = []
 
@@ -3992,17 +4127,24 @@ class Program(object):
         The two code snippets above will generate and print same programs.
         """
         if for_test:
-            if self._appending_grad_times > 0:
-                forward_prog = Program()
-                forward_prog.desc = core.prune_backward(self.desc)
-                forward_prog.blocks = [
-                    Block(forward_prog, i)
-                    for i in six.moves.range(forward_prog.desc.num_blocks())
-                ]
-                forward_prog._sync_with_cpp()
-                p = forward_prog._inference_optimize(prune_read_op=False)
-            else:
-                p = self._inference_optimize(prune_read_op=False)
+            # the pruned and optimized desc is reused until the program is
+            # modified, and the Operators of the clone are created lazily.
+            # The cache is keyed on the serialized desc rather than _version,
+            # so that the desc edits made on the c++ end are seen as well.
+            fingerprint = hashlib.md5(
+                self.desc.serialize_to_string()).hexdigest()
+            if self._test_clone_cache is None or \
+                    self._test_clone_cache[0] != fingerprint:
+                if self._appending_grad_times > 0:
+                    forward_desc = core.prune_backward(self.desc)
+                else:
+                    forward_desc = self.desc
+                self._test_clone_cache = (fingerprint,
+                                          _inference_optimize_desc(
+                                              forward_desc,
+                                              prune_read_op=False))
+            p = Program._construct_from_desc(
+                core.ProgramDesc(self._test_clone_cache[1]), lazy_ops=True)
         else:
             p = Program()
             p.current_block_idx = self.current_block_idx
@@ -4158,36 +4300,8 @@ class Program(object):
         Returns:
             Program: The new program.
         """
-        res = Program()
-        res.desc = core.ProgramDesc(self.desc)
-
-        # remove all readers and the read_op if exist
-        read_op_idx = 0
-        root_block = res.desc.block(0)
-        if prune_read_op:
-            while True:
-                if read_op_idx >= root_block.op_size() or root_block.op(
-                        read_op_idx).type() == 'read':
-                    break
-                read_op_idx += 1
-            if read_op_idx < root_block.op_size():
-                root_block._remove_op(0, read_op_idx + 1)
-            for var in root_block.all_vars():
-                if var.type() == core.VarDesc.VarType.READER:
-                    root_block._remove_var(cpt.to_bytes(var.name()))
-
-        # change all `is_test` attributes to True
-        for i in six.moves.range(res.desc.num_blocks()):
-            block = res.desc.block(i)
-            for j in six.moves.range(block.op_size()):
-                op = block.op(j)
-                if op.has_attr('is_test'):
-                    op._set_attr('is_test', True)
-        res.blocks = [
-            Block(res, i) for i in six.moves.range(res.desc.num_blocks())
-        ]
-        res._sync_with_cpp()
-        return res
+        return Program._construct_from_desc(
+            _inference_optimize_desc(self.desc, prune_read_op))
 
     @staticmethod
     def parse_from_string(binary_str):
@@ -4236,12 +4350,14 @@ class Program(object):
         return p
 
     @staticmethod
-    def _construct_from_desc(desc):
+    def _construct_from_desc(desc, lazy_ops=False):
         """
         Construct a program from program desc.
 
         Args:
             desc(core.ProgramDesc): The program desc for constructing.
+            lazy_ops(bool): If True, the Operators of a block are only created
+                when the ops of the block are accessed. Default: False.
 
         Returns:
             Program: A program.
@@ -4249,6 +4365,9 @@ class Program(object):
         p = Program()
         p.desc = desc
         p.blocks = [Block(p, i) for i in six.moves.range(p.desc.num_blocks())]
+        if lazy_ops:
+            for block in p.blocks:
+                block._ops_materialized = False
         p._sync_with_cpp()
         return p
 
@@ -4402,6 +4521,7 @@ class Program(object):
         self.desc.append_block(parent.desc)
         self.current_block_idx = new_block_idx
         self.blocks.append(Block(self, self.current_block_idx))
+        self._bump_version()
         return self.current_block()
 
     def _rollback(self):
@@ -4428,6 +4548,22 @@ class Program(object):
         for block in self.blocks:
             block._sync_with_cpp()
 
+    def _bump_version(self):
+        """
+        Record a modification of the program, so that the program cache of
+        Executor, which is keyed on the version, prepares the program again.
+        Modifications made through the Python API bump it; after modifying
+        the desc directly on the c++ end, call _sync_with_cpp, which bumps it
+        as well.
+
+        Notes: This is a very low level API. Users should not invoke it
+        directly.
+
+        Returns:
+            None
+        """
+        self._version += 1
+
     def _copy_param_info_from(self, other):
         """
         Copy the information of parameters from other program.
@@ -16,17 +16,37 @@
 import os
 import sys
 import subprocess
-import multiprocessing
 from datetime import datetime
 
 import re
 import copy
 import errno
 import time
+import json
+import random
+import hashlib
 import logging
+import posixpath
+import threading
+import collections
+
+from six.moves import queue
 
 __all__ = ["HDFSClient"]
 
+# the sleep before the n-th retry of a failed hadoop command is
+# min(_RETRY_SLEEP_MAX_SECOND, _RETRY_SLEEP_BASE_SECOND * 2^n), with jitter
+_RETRY_SLEEP_BASE_SECOND = 0.5
+_RETRY_SLEEP_MAX_SECOND = 30
+
+# the max number of paths given to one `hadoop fs -stat`
+_STAT_BATCH_SIZE = 256
+
+# the checksums of the files copied by download and upload are recorded here
+# by default, so that an interrupted transfer can be resumed
+_MANIFEST_HOME = os.path.expanduser(
+    os.path.join('~', '.cache', 'paddle', 'hdfs_transfer'))
+
 
 def get_logger(name, level, fmt):
     logger = logging.getLogger(name)
@@ -42,14 +62,323 @@ _logger = get_logger(
     __name__, logging.INFO, fmt='%(asctime)s-%(levelname)s: %(message)s')
 
 
+def _retry_sleep_second(retry):
+    sleep_second = min(_RETRY_SLEEP_MAX_SECOND,
+                       _RETRY_SLEEP_BASE_SECOND * (2**retry))
+    return sleep_second * random.uniform(0.5, 1.0)
+
+
+def _strip_scheme(hdfs_path):
+    return re.sub(r'^[a-zA-Z][a-zA-Z0-9+.-]*://[^/]*', '', hdfs_path)
+
+
+def _relative_path(hdfs_path, root):
+    """
+    The path of hdfs_path relative to the listed root, or the base name if
+    hdfs_path is the root itself.
+    """
+    hdfs_path = _strip_scheme(hdfs_path)
+    root = _strip_scheme(root).rstrip('/')
+    index = hdfs_path.find(root + '/') if root else -1
+    if hdfs_path == root or index < 0:
+        return posixpath.basename(hdfs_path)
+    return hdfs_path[index + len(root) + 1:]
+
+
+def _cache_key(hdfs_path):
+    return _strip_scheme(hdfs_path).rstrip('/') or '/'
+
+
+def _parse_ls_line(line):
+    """
+    Parse a line printed by `hadoop fs -ls` or `-lsr`, which looks like
+
+        -rw-r--r--   3 user group   1024 2020-01-01 12:00 /path/to/file
+
+    Returns:
+        (path, size, modification time, is directory), or None for the lines
+        that do not describe a path.
+    """
+    # the path is the rest of the line, which may contain spaces
+    fields = line.strip().split(None, 7)
+    if len(fields) != 8:
+        return None
+    try:
+        size = int(fields[4])
+    except ValueError:
+        return None
+    return fields[7], size, fields[5] + " " + fields[6], fields[0][0] == "d"
+
+
+def _file_md5(file_path, chunk_size=1 << 20):
+    md5 = hashlib.md5()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+# a file to copy from src to dst; rel is its path relative to the copied
+# directory, mtime its modification time on HDFS when downloading
+_TransferFile = collections.namedtuple('_TransferFile',
+                                       ['src', 'dst', 'size', 'rel', 'mtime'])
+
+
+class _TransferManifest(object):
+    """
+    The size and md5 of every file a transfer between a HDFS path and a local
+    path has completed, saved after every finished batch. A file is skipped
+    when the transfer is resumed only if its local copy still has the size
+    and md5 recorded here, and the HDFS side has the same size.
+
+    The manifest is a file under manifest_dir, ~/.cache/paddle/hdfs_transfer
+    if it is None.
+    """
+
+    def __init__(self, direction, hdfs_path, local_path, manifest_dir=None):
+        key = "\0".join(
+            [direction,
+             _strip_scheme(hdfs_path),
+             os.path.abspath(local_path)])
+        self._dir = manifest_dir or _MANIFEST_HOME
+        self._path = os.path.join(self._dir,
+                                  hashlib.md5(key.encode('utf-8')).hexdigest())
+        self._entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(self._path):
+            try:
+                with open(self._path) as f:
+                    self._entries = json.load(f)
+            except ValueError:
+                _logger.warn("Ignore broken transfer manifest: {}".format(
+                    self._path))
+
+    def is_complete(self, rel, local_file, size, mtime=None):
+        entry = self._entries.get(rel)
+        if entry is None or entry['size'] != size or \
+                entry.get('mtime') != mtime:
+            return False
+        if not os.path.isfile(local_file) or \
+                os.path.getsize(local_file) != size:
+            return False
+        return _file_md5(local_file) == entry['md5']
+
+    def add(self, transfer_files, local_files):
+        entries = {}
+        for f, local_file in zip(transfer_files, local_files):
+            entries[f.rel] = {
+                'size': f.size,
+                'mtime': f.mtime,
+                'md5': _file_md5(local_file)
+            }
+        with self._lock:
+            self._entries.update(entries)
+            HDFSClient.make_local_dirs(self._dir)
+            tmp_path = "{}.{}.tmp".format(self._path,
+                                          threading.current_thread().ident)
+            with open(tmp_path, 'w') as f:
+                json.dump(self._entries, f)
+            os.rename(tmp_path, self._path)
+
+    def clear(self):
+        with self._lock:
+            self._entries = {}
+            if os.path.exists(self._path):
+                os.remove(self._path)
+
+
+class _TransferEngine(object):
+    """
+    Copy files between HDFS and the local disk by `hadoop fs -get` or `-put`.
+
+    The files are grouped by destination directory into batches of at most
+    max_batch_files files and max_batch_bytes bytes, so that one hadoop
+    process, and its JVM startup, copies many small files. The batches are
+    put into a shared queue, largest first, and every worker thread drives
+    its own hadoop process and takes the next batch as soon as it is idle,
+    so one large file does not hold up the files assigned to the others.
+    A failed batch is retried file by file with exponential backoff.
+
+    Args:
+        run_cmd(callable): run a hadoop fs command given as a list of
+            arguments, returns (return code, stdout, stderr).
+        direction(str): 'download' or 'upload'.
+        workers(int): the number of hadoop processes run at the same time.
+        retry_times(int): the retry times of a failed file.
+        max_batch_files(int): the max number of files copied by one command.
+        max_batch_bytes(int): the max bytes copied by one command. A larger
+            file is copied alone.
+        manifest(_TransferManifest): records the completed files.
+    """
+
+    def __init__(self,
+                 run_cmd,
+                 direction,
+                 workers=5,
+                 retry_times=5,
+                 max_batch_files=32,
+                 max_batch_bytes=1 << 30,
+                 manifest=None):
+        assert direction in ['download', 'upload']
+        self._run_cmd = run_cmd
+        self._direction = direction
+        self._workers = max(1, workers)
+        self._retry_times = retry_times
+        self._max_batch_files = max(1, max_batch_files)
+        self._max_batch_bytes = max_batch_bytes
+        self._manifest = manifest
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+
+    def _dirname(self, path):
+        if self._direction == 'download':
+            return os.path.dirname(path)
+        return posixpath.dirname(path)
+
+    def _make_batches(self, files):
+        groups = collections.OrderedDict()
+        for f in sorted(files, key=lambda f: f.size, reverse=True):
+            groups.setdefault(self._dirname(f.dst), []).append(f)
+
+        batches = []
+        for group in groups.values():
+            batch, batch_bytes = [], 0
+            for f in group:
+                if batch and (len(batch) >= self._max_batch_files
+                              or batch_bytes + f.size > self._max_batch_bytes):
+                    batches.append(batch)
+                    batch, batch_bytes = [], 0
+                batch.append(f)
+                batch_bytes += f.size
+            if batch:
+                batches.append(batch)
+        return sorted(
+            batches, key=lambda batch: sum(f.size for f in batch), reverse=True)
+
+    def _run(self, commands):
+        with self._lock:
+            self._stats['commands'] += 1
+        returncode, _, _ = self._run_cmd(commands, retry_times=0)
+        return returncode == 0
+
+    def _copy(self, batch, retry):
+        dst_dir = self._dirname(batch[0].dst)
+        if self._direction == 'download':
+            HDFSClient.make_local_dirs(dst_dir)
+            # hadoop fs -get does not overwrite, the local file is stale
+            for f in batch:
+                if os.path.exists(f.dst):
+                    os.remove(f.dst)
+            self._run(["-get"] + [f.src for f in batch] + [dst_dir])
+            return [
+                f for f in batch
+                if os.path.isfile(f.dst) and os.path.getsize(f.dst) == f.size
+            ]
+        else:
+            if retry > 0:
+                # the file may have been put before the batch failed
+                self._run(["-rm"] + [f.dst for f in batch])
+            # a single file is put as its destination, which may be named
+            # differently from the local file, see HDFSClient.upload
+            target = batch[0].dst if len(batch) == 1 else dst_dir
+            if self._run(["-put"] + [f.src for f in batch] + [target]):
+                return batch
+            return []
+
+    def _work(self):
+        while True:
+            try:
+                batch, retry = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                done = self._copy(batch, retry)
+                if done and self._manifest is not None:
+                    local_files = [
+                        f.dst if self._direction == 'download' else f.src
+                        for f in done
+                    ]
+                    self._manifest.add(done, local_files)
+            except Exception:
+                # the worker goes on with the other batches
+                _logger.exception("Transfer files failed: {}".format(
+                    [f.src for f in batch]))
+                with self._lock:
+                    self._stats['failed'].extend(f.src for f in batch)
+                continue
+
+            done_srcs = set(f.src for f in done)
+            failed = [f for f in batch if f.src not in done_srcs]
+            with self._lock:
+                self._stats['transferred'] += len(done)
+                self._stats['bytes'] += sum(f.size for f in done)
+            if not failed:
+                continue
+            if retry >= self._retry_times:
+                _logger.error(
+                    "Transfer files failed after {} retries: {}".format(
+                        retry, [f.src for f in failed]))
+                with self._lock:
+                    self._stats['failed'].extend(f.src for f in failed)
+                continue
+            time.sleep(_retry_sleep_second(retry))
+            for f in failed:
+                self._queue.put(([f], retry + 1))
+
+    def run(self, files, skipped=0):
+        """
+        Copy the files, a list of _TransferFile.
+
+        Returns:
+            dict: the statistics of the transfer, including the number of
+            the transferred, skipped and failed files, the transferred bytes,
+            the number of hadoop commands, the seconds and the throughput in
+            bytes per second.
+        """
+        self._stats = {
+            'files': len(files) + skipped,
+            'transferred': 0,
+            'skipped': skipped,
+            'failed': [],
+            'bytes': 0,
+            'commands': 0,
+        }
+        start = time.time()
+        for batch in self._make_batches(files):
+            self._queue.put((batch, 0))
+        threads = [
+            threading.Thread(target=self._work)
+            for _ in range(min(self._workers, self._queue.qsize()))
+        ]
+        for t in threads:
+            t.daemon = True
+            t.start()
+        for t in threads:
+            t.join()
+
+        seconds = time.time() - start
+        self._stats['seconds'] = seconds
+        self._stats['throughput'] = self._stats['bytes'] / seconds \
+            if seconds > 0 else 0.0
+        return self._stats
+
+
 class HDFSClient(object):
     """
     A tool of HDFS
 
+    The results of is_exist, is_dir, is_file, stat, ls and lsr are cached
+    for metadata_ttl seconds, and the cached results of a path are dropped
+    when the path is changed by delete, rename, makedirs, upload or
+    upload_dir of the client. Changes made by others are seen after at most
+    metadata_ttl seconds.
+
     Args:
         hadoop_home (string): hadoop_home
         configs (dict): hadoop config, it is a dict, please contain \
             key "fs.default.name" and "hadoop.job.ugi"
+        metadata_ttl (float): the seconds the metadata of HDFS paths are
+            cached, 0 to disable the cache. Default: 0.
         Can be a float value
     Examples:
         hadoop_home = "/home/client/hadoop-client/hadoop/"
@@ -65,17 +394,69 @@ class HDFSClient(object):
         files = client.lsr("/user/com/train-25/models")
     """
 
-    def __init__(self, hadoop_home, configs):
+    def __init__(self, hadoop_home, configs, metadata_ttl=0):
         self.pre_commands = []
         hadoop_bin = '%s/bin/hadoop' % hadoop_home
         self.pre_commands.append(hadoop_bin)
         dfs = 'fs'
         self.pre_commands.append(dfs)
 
-        for k, v in configs.iteritems():
+        for k, v in configs.items():
             config_command = '-D%s=%s' % (k, v)
             self.pre_commands.append(config_command)
 
+        # the statistics of the last download or upload
+        self.last_transfer_stats = None
+
+        # (kind, path) -> (expire time, value), where kind is 'stat', 'ls'
+        # or 'lsr', see __get_cache
+        self.metadata_ttl = metadata_ttl
+        self.__metadata_cache = {}
+        self.__metadata_lock = threading.Lock()
+
+    def __get_cache(self, kind, hdfs_path):
+        """
+        Returns:
+            (hit, value): hit is False if the value is not cached or expired.
+        """
+        key = (kind, _cache_key(hdfs_path))
+        with self.__metadata_lock:
+            entry = self.__metadata_cache.get(key)
+            if entry is None:
+                return False, None
+            if entry[0] < time.time():
+                del self.__metadata_cache[key]
+                return False, None
+            return True, entry[1]
+
+    def __set_cache(self, kind, hdfs_path, value):
+        if self.metadata_ttl <= 0:
+            return
+        with self.__metadata_lock:
+            self.__metadata_cache[(kind, _cache_key(hdfs_path))] = (
+                time.time() + self.metadata_ttl, value)
+
+    def __invalidate(self, hdfs_path):
+        """
+        Drop the cached metadata of hdfs_path, of the paths under it, and the
+        listings and stats of its ancestors.
+        """
+        path = _cache_key(hdfs_path)
+        with self.__metadata_lock:
+            for key in list(self.__metadata_cache.keys()):
+                cached = key[1]
+                if cached == path or cached == '/' or \
+                        cached.startswith(path + '/') or \
+                        path.startswith(cached + '/'):
+                    del self.__metadata_cache[key]
+
+    def clear_metadata_cache(self):
+        """
+        Drop all the cached metadata of HDFS paths.
+        """
+        with self.__metadata_lock:
+            self.__metadata_cache.clear()
+
     def __run_hdfs_cmd(self, commands, retry_times=5):
         whole_commands = copy.deepcopy(self.pre_commands)
         whole_commands.extend(commands)
@@ -83,27 +464,65 @@ class HDFSClient(object):
         ret_code = 0
         ret_out = None
         ret_err = None
-        retry_sleep_second = 3
-        whole_commands = " ".join(whole_commands)
         for x in range(retry_times + 1):
+            if x > 0:
+                time.sleep(_retry_sleep_second(x - 1))
+            # the arguments are passed to hadoop as they are, without a shell
             proc = subprocess.Popen(
                 whole_commands,
                 stdout=subprocess.PIPE,
                 stderr=subprocess.PIPE,
-                shell=True)
+                universal_newlines=True)
             (output, errors) = proc.communicate()
             ret_code, ret_out, ret_err = proc.returncode, output, errors
 
             _logger.info(
                 'Times: %d, Running command: %s. Return code: %d, Msg: %s' %
-                (x, whole_commands, proc.returncode, errors))
+                (x, " ".join(whole_commands), proc.returncode, errors))
 
             if ret_code == 0:
                 break
-            time.sleep(retry_sleep_second)
 
         return ret_code, ret_out, ret_err
 
+    def __list_files(self, hdfs_path):
+        """
+        List the files and directories under hdfs_path recursively by one
+        `hadoop fs -lsr`.
+
+        Returns:
+            (files, dirs): files is a list of (path, size, modification time),
+            dirs is a list of paths. None if hdfs_path does not exist or the
+            listing fails.
+        """
+        returncode, output, errors = self.__run_hdfs_cmd(['-lsr', hdfs_path],
+                                                         retry_times=1)
+        if returncode:
+            _logger.info("HDFS list all files: {} failed".format(hdfs_path))
+            return None
+
+        files, dirs = [], []
+        for line in output.strip().split("\n"):
+            parsed = _parse_ls_line(line)
+            if parsed is None:
+                continue
+            path, size, mtime, is_dir = parsed
+            if is_dir:
+                dirs.append(path)
+            else:
+                files.append((path, size, mtime))
+        return files, dirs
+
+    def __log_transfer_stats(self, stats, src, dst):
+        self.last_transfer_stats = stats
+        _logger.info(
+            "Transfer {} to {}: {} files, {} transferred, {} skipped, {} "
+            "failed, {} bytes by {} commands in {:.2f}s, {:.2f} MB/s".format(
+                src, dst,
+                stats['files'], stats['transferred'], stats['skipped'],
+                len(stats['failed']), stats['bytes'], stats['commands'],
+                stats['seconds'], stats['throughput'] / (1 << 20)))
+
     def cat(self, hdfs_path=None):
         """
         cat hdfs file
@@ -126,6 +545,83 @@ class HDFSClient(object):
         else:
             return ""
 
+    def stat(self, hdfs_paths):
+        """
+        Get the metadata of many HDFS paths, by one `hadoop fs -stat` for
+        every 256 paths that are not cached. The paths sharing a base name
+        are stat one by one.
+
+        Args:
+            hdfs_paths(list): the hdfs paths
+
+        Returns:
+            dict: the map from every path in hdfs_paths to its metadata, a
+            dict with the keys is_dir, size and mtime (milliseconds since the
+            epoch), or None if the path does not exist or its stat failed.
+        """
+        result = {}
+        missed = []
+        for hdfs_path in hdfs_paths:
+            hit, value = self.__get_cache('stat', hdfs_path)
+            if hit:
+                result[hdfs_path] = value
+            elif hdfs_path not in result:
+                result[hdfs_path] = None
+                missed.append(hdfs_path)
+
+        # the output only names a path by its base name, so the paths whose
+        # base names collide are stat one per command
+        basenames = collections.Counter(
+            posixpath.basename(_cache_key(p)) for p in missed)
+        unique = [
+            p for p in missed
+            if basenames[posixpath.basename(_cache_key(p))] == 1
+        ]
+        batches = [
+            unique[i:i + _STAT_BATCH_SIZE]
+            for i in range(0, len(unique), _STAT_BATCH_SIZE)
+        ]
+        batches.extend([p] for p in missed
+                       if basenames[posixpath.basename(_cache_key(p))] > 1)
+
+        for batch in batches:
+            # a missing path fails the command too, so it is retried only
+            # if nothing is reported
+            for _ in range(2):
+                returncode, output, errors = self.__run_hdfs_cmd(
+                    ['-stat', '%F\t%b\t%Y\t%n'] + batch, retry_times=0)
+                output, errors = output or "", errors or ""
+                # the missing paths are reported in errors as `path'
+                missing = set(
+                    _cache_key(p) for p in re.findall(r"`([^']*)'", errors))
+                if returncode == 0 or output.strip() or missing:
+                    break
+
+            # the existing paths are printed by their base names
+            existing = dict((posixpath.basename(_cache_key(p)), p)
+                            for p in batch if _cache_key(p) not in missing)
+            for line in output.strip().split("\n"):
+                fields = line.split("\t", 3)
+                if len(fields) != 4 or fields[3] not in existing:
+                    continue
+                hdfs_path = existing.pop(fields[3])
+                value = {
+                    'is_dir': fields[0].startswith('directory'),
+                    'size': int(fields[1]),
+                    'mtime': int(fields[2])
+                }
+                result[hdfs_path] = value
+                self.__set_cache('stat', hdfs_path, value)
+
+            for hdfs_path in batch:
+                if result[hdfs_path] is None and \
+                        _cache_key(hdfs_path) in missing:
+                    self.__set_cache('stat', hdfs_path, None)
+        return result
+
+    def __stat(self, hdfs_path):
+        return self.stat([hdfs_path])[hdfs_path]
+
     def is_exist(self, hdfs_path=None):
         """
         whether the remote HDFS path exists
@@ -136,11 +632,7 @@ class HDFSClient(object):
         Returns:
             True or False
         """
-        exist_cmd = ['-test', '-e', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(
-            exist_cmd, retry_times=1)
-
-        if returncode:
+        if self.__stat(hdfs_path) is None:
             _logger.error("HDFS is_exist HDFS path: {} failed".format(
                 hdfs_path))
             return False
@@ -159,14 +651,8 @@ class HDFSClient(object):
         Returns:
             True or False
         """
-
-        if not self.is_exist(hdfs_path):
-            return False
-
-        dir_cmd = ['-test', '-d', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(dir_cmd, retry_times=1)
-
-        if returncode:
+        status = self.__stat(hdfs_path)
+        if status is None or not status['is_dir']:
             _logger.error("HDFS path: {} failed is not a directory".format(
                 hdfs_path))
             return False
@@ -185,14 +671,8 @@ class HDFSClient(object):
         Returns:
             True or False
         """
-
-        if not self.is_exist(hdfs_path):
-            return False
-
-        dir_cmd = ['-test', '-d', hdfs_path]
-        returncode, output, errors = self.__run_hdfs_cmd(dir_cmd, retry_times=1)
-
-        if returncode == 0:
+        status = self.__stat(hdfs_path)
+        if status is None or status['is_dir']:
             _logger.error("HDFS path: {} failed is not a file".format(
                 hdfs_path))
             return False
@@ -227,6 +707,7 @@ class HDFSClient(object):
             del_cmd = ['-rm', hdfs_path]
 
         returncode, output, errors = self.__run_hdfs_cmd(del_cmd, retry_times=0)
+        self.__invalidate(hdfs_path)
 
         if returncode:
             _logger.error("HDFS path: {} delete files failure".format(
@@ -261,6 +742,8 @@ class HDFSClient(object):
         rename_command = ['-mv', hdfs_src_path, hdfs_dst_path]
         returncode, output, errors = self.__run_hdfs_cmd(
             rename_command, retry_times=1)
+        self.__invalidate(hdfs_src_path)
+        self.__invalidate(hdfs_dst_path)
 
         if returncode:
             _logger.error("HDFS rename path: {} to {} failed".format(
@@ -306,6 +789,7 @@ class HDFSClient(object):
         mkdirs_commands = ['-mkdir', hdfs_path]
         returncode, output, errors = self.__run_hdfs_cmd(
             mkdirs_commands, retry_times=1)
+        self.__invalidate(hdfs_path)
 
         if returncode:
             _logger.error("HDFS mkdir path: {} failed".format(hdfs_path))
@@ -326,6 +810,10 @@ class HDFSClient(object):
         """
         assert hdfs_path is not None
 
+        hit, ret_lines = self.__get_cache('ls', hdfs_path)
+        if hit:
+            return list(ret_lines)
+
         if not self.is_exist(hdfs_path):
             return []
 
@@ -346,6 +834,7 @@ class HDFSClient(object):
                 re_line = regex.split(line)
                 if len(re_line) == 8:
                     ret_lines.append(re_line[7])
+            self.__set_cache('ls', hdfs_path, list(ret_lines))
             return ret_lines
 
     def lsr(self, hdfs_path, excludes=[]):
@@ -362,6 +851,11 @@ class HDFSClient(object):
 
         assert hdfs_path is not None
 
+        # all the files are cached, the excludes are applied to the cache
+        hit, all_files = self.__get_cache('lsr', hdfs_path)
+        if hit:
+            return [f for f in all_files if f not in excludes]
+
         if not self.is_exist(hdfs_path):
             return []
 
@@ -383,13 +877,13 @@ class HDFSClient(object):
                 if len(re_line) == 8:
                     if re_line[0][0] == "d":
                         continue
-                    if re_line[7] in excludes:
-                        continue
                     else:
                         lines.append((re_line[7], re_line[5] + " " + re_line[6],
                                       line_id))
             lines = sorted(lines, key=lambda line: line[2])
-            ret_lines = [ret[0] for ret in lines]
+            all_files = [ret[0] for ret in lines]
+            self.__set_cache('lsr', hdfs_path, all_files)
+            ret_lines = [f for f in all_files if f not in excludes]
             return ret_lines
 
     @staticmethod
@@ -425,70 +919,69 @@ class HDFSClient(object):
                  local_path,
                  multi_processes=5,
                  overwrite=False,
-                 retry_times=5):
+                 retry_times=5,
+                 max_batch_files=32,
+                 resume=True,
+                 manifest_dir=None):
         """
         Download files from HDFS using multi process.
 
+        The files are copied in batches by multi_processes hadoop processes
+        that take the batches from a shared queue. A file whose local copy
+        has been completed by a former download, as checked by size and md5,
+        is skipped unless overwrite is True, so an interrupted download can
+        be resumed. The statistics of the download, including the
+        throughput, are logged and kept in last_transfer_stats.
+
         Args:
             hdfs_path(str): path on hdfs
             local_path(str): path on local
             multi_processes(int|5): the download data process at the same time, default=5
             overwrite(bool): is overwrite
             retry_times(int): retry times
+            max_batch_files(int|32): the max number of files downloaded by
+                one hadoop command
+            resume(bool|True): record the completed files in a manifest and
+                skip them in the next download. Nothing is recorded or
+                skipped if False.
+            manifest_dir(str|None): the directory of the manifests, None for
+                ~/.cache/paddle/hdfs_transfer
 
         Returns:
             List:
             Download files in local folder.
         """
-
-        def __subprocess_download(local_path, datas):
-            """
-            download file from HDFS
-
-            Args:
-                hdfs_path(str): the hdfs file path
-                local_path(str): the local file path
-                overwrite(bool|None): will overwrite the file on HDFS or not
-                retry_times(int|5): retry times
-
-            Returns:
-                True or False
-            """
-            for data in datas:
-                download_commands = ["-get", data, local_path]
-
-                returncode, output, errors = self.__run_hdfs_cmd(
-                    download_commands, retry_times=retry_times)
-
-                if returncode:
-                    _logger.error(
-                        "Get local path: {} from HDFS path: {} failed".format(
-                            local_path, hdfs_path))
-                    return False
-            return True
-
         self.make_local_dirs(local_path)
 
-        all_files = self.ls(hdfs_path)
-
-        procs = []
-        for i in range(multi_processes):
-            process_datas = HDFSClient.split_files(all_files, i,
-                                                   multi_processes)
-            p = multiprocessing.Process(
-                target=__subprocess_download,
-                args=(
-                    local_path,
-                    process_datas, ))
-            procs.append(p)
-            p.start()
-
-        # complete the processes
-        for proc in procs:
-            proc.join()
-
-        _logger.info("Finish {} multi process to download datas".format(
-            multi_processes))
+        listed = self.__list_files(hdfs_path)
+        remote_files = listed[0] if listed is not None else []
+
+        manifest = None
+        if resume:
+            manifest = _TransferManifest('download', hdfs_path, local_path,
+                                         manifest_dir)
+            if overwrite:
+                manifest.clear()
+        files = []
+        skipped = 0
+        for path, size, mtime in remote_files:
+            rel = _relative_path(path, hdfs_path)
+            dst = os.path.join(local_path, *rel.split('/'))
+            if manifest is not None and not overwrite and \
+                    manifest.is_complete(rel, dst, size, mtime):
+                skipped += 1
+                continue
+            files.append(_TransferFile(path, dst, size, rel, mtime))
+
+        engine = _TransferEngine(
+            self.__run_hdfs_cmd,
+            'download',
+            workers=multi_processes,
+            retry_times=retry_times,
+            max_batch_files=max_batch_files,
+            manifest=manifest)
+        stats = engine.run(files, skipped)
+        self.__log_transfer_stats(stats, hdfs_path, local_path)
 
         local_downloads = []
         for dirname, folder, files in os.walk(local_path):
@@ -502,33 +995,42 @@ class HDFSClient(object):
                local_path,
                multi_processes=5,
                overwrite=False,
-               retry_times=5):
+               retry_times=5,
+               max_batch_files=32,
+               resume=True,
+               manifest_dir=None):
         """
         Upload files to HDFS using multi process.
 
+        The files are copied in batches by multi_processes hadoop processes
+        that take the batches from a shared queue. A file that a former
+        upload has completed, as checked by the size on HDFS and the md5 of
+        the local file, is skipped unless overwrite is True, so an
+        interrupted upload can be resumed. The statistics of the upload,
+        including the throughput, are logged and kept in
+        last_transfer_stats.
+
+        Like `hadoop fs -put`, if local_path is a file and hdfs_path is not a
+        directory, the file is uploaded as hdfs_path.
+
         Args:
             hdfs_path(str): path on hdfs
             local_path(str): path on local
             multi_processes(int|5): the upload data process at the same time, default=5
             overwrite(bool|False): will overwrite file on HDFS or not
             retry_times(int): upload file max retry time.
+            max_batch_files(int|32): the max number of files uploaded by one
+                hadoop command
+            resume(bool|True): record the completed files in a manifest and
+                skip them in the next upload. Nothing is recorded or skipped
+                if False.
+            manifest_dir(str|None): the directory of the manifests, None for
+                ~/.cache/paddle/hdfs_transfer
 
         Returns:
             None
         """
 
-        def __subprocess_upload(hdfs_path_single, datas):
-            for data in datas:
-                put_commands = ["-put", data, hdfs_path_single]
-                returncode, output, errors = self.__run_hdfs_cmd(put_commands,
-                                                                 retry_times)
-
-                if returncode:
-                    _logger.error("Put local path: {} to HDFS path: {} failed".
-                                  format(data, hdfs_path_single))
-                    return False
-            return True
-
         def get_local_files(path):
             """
             get local files
@@ -537,22 +1039,30 @@ class HDFSClient(object):
                 path(str): local path
 
             Returns:
-                list of local files
+                list of (local file, path relative to path), and the list of
+                local directories relative to path
             """
             rlist = []
+            dirs = []
 
             if not os.path.exists(path):
-                return rlist
+                return rlist, dirs
 
             if os.path.isdir(path):
-                for file in os.listdir(path):
-                    t = os.path.join(path, file)
-                    rlist.append(t)
+                for dirname, folders, files in os.walk(path):
+                    rel_dir = os.path.relpath(dirname, path)
+                    rel_dir = "" if rel_dir == os.curdir else \
+                        rel_dir.replace(os.sep, '/') + '/'
+                    for folder in folders:
+                        dirs.append(rel_dir + folder)
+                    for file in files:
+                        rlist.append((os.path.join(dirname, file),
+                                      rel_dir + file))
             else:
-                rlist.append(path)
-            return rlist
+                rlist.append((path, os.path.basename(path)))
+            return rlist, dirs
 
-        all_files = get_local_files(local_path)
+        all_files, local_dirs = get_local_files(local_path)
         if not all_files:
             _logger.info("there are nothing need to upload, exit")
             return
@@ -561,23 +1071,72 @@ class HDFSClient(object):
             self.delete(hdfs_path)
             self.makedirs(hdfs_path)
 
-        procs = []
-        for i in range(multi_processes):
-            process_datas = HDFSClient.split_files(all_files, i,
-                                                   multi_processes)
-            p = multiprocessing.Process(
-                target=__subprocess_upload, args=(
-                    hdfs_path,
-                    process_datas, ))
-            procs.append(p)
-            p.start()
-
-        # complete the processes
-        for proc in procs:
-            proc.join()
-
-        _logger.info("Finish upload datas from {} to {}".format(local_path,
-                                                                hdfs_path))
+        hdfs_root = hdfs_path.rstrip("/")
+        # like `hadoop fs -put`, a single file is uploaded as hdfs_path itself
+        # unless hdfs_path is a directory
+        status = self.__stat(hdfs_path)
+        as_target = os.path.isfile(local_path) and \
+            (status is None or not status['is_dir'])
+        if as_target:
+            all_files = [(local_path,
+                          posixpath.basename(_strip_scheme(hdfs_root)))]
+
+        listed = self.__list_files(hdfs_path)
+        remote_sizes = {}
+        remote_dirs = set()
+        if listed is not None:
+            remote_dirs.add(_strip_scheme(hdfs_root))
+            for path, size, _ in listed[0]:
+                remote_sizes[_relative_path(path, hdfs_path)] = size
+            remote_dirs.update(_strip_scheme(path) for path in listed[1])
+
+        manifest = None
+        if resume:
+            manifest = _TransferManifest('upload', hdfs_path, local_path,
+                                         manifest_dir)
+            if overwrite:
+                manifest.clear()
+        files = []
+        stale = []
+        skipped = 0
+        for local_file, rel in all_files:
+            size = os.path.getsize(local_file)
+            dst = hdfs_root if as_target else hdfs_root + "/" + rel
+            if rel in remote_sizes:
+                if manifest is not None and not overwrite and \
+                        remote_sizes[rel] == size and \
+                        manifest.is_complete(rel, local_file, size):
+                    skipped += 1
+                    continue
+                # hadoop fs -put does not overwrite, the file on HDFS is stale
+                stale.append(dst)
+            files.append(_TransferFile(local_file, dst, size, rel, None))
+
+        # create the missing directories, parents first, and remove the stale
+        # files, each by one command
+        missing_dirs = []
+        if not as_target:
+            missing_dirs = [hdfs_root] + [
+                hdfs_root + "/" + d for d in sorted(local_dirs)
+            ] + [posixpath.dirname(f.dst) for f in files]
+        missing_dirs = sorted(
+            set(d for d in missing_dirs if _strip_scheme(d) not in remote_dirs),
+            key=lambda d: (d.count('/'), d))
+        if missing_dirs:
+            self.__run_hdfs_cmd(['-mkdir'] + missing_dirs, retry_times=1)
+        if stale:
+            self.__run_hdfs_cmd(['-rm'] + stale, retry_times=1)
+
+        engine = _TransferEngine(
+            self.__run_hdfs_cmd,
+            'upload',
+            workers=multi_processes,
+            retry_times=retry_times,
+            max_batch_files=max_batch_files,
+            manifest=manifest)
+        stats = engine.run(files, skipped)
+        self.__invalidate(hdfs_path)
+        self.__log_transfer_stats(stats, local_path, hdfs_path)
 
     def upload_dir(self, dest_dir, local_dir, overwrite=False):
         """
@@ -598,6 +1157,7 @@ class HDFSClient(object):
             self.makedirs(dest_dir)
         put_command = ["-put", local_dir, dest_dir]
         returncode, output, errors = self.__run_hdfs_cmd(put_command)
+        self.__invalidate(dest_dir)
         if returncode != 0:
             _logger.error("Put local dir: {} to HDFS dir: {} failed".format(
                 local_dir, dest_dir))
@@ -16,10 +16,12 @@ from __future__ import print_function
 
 import os
 import errno
+import json
+import shutil
+import threading
 import warnings
 import six
 import logging
-import pickle
 import contextlib
 from functools import reduce
 
@@ -39,6 +41,7 @@ from . import reader
 from .reader import *
 from . import core
 from .. import compat as cpt
+from .checkpoint_file import write_checkpoint, load_state_file
 
 batch = paddle.batch
 
@@ -46,6 +49,7 @@ __all__ = [
     'save_vars',
     'save_params',
     'save_persistables',
+    'save_persistables_async',
     'load_vars',
     'load_params',
     'load_persistables',
@@ -618,6 +622,231 @@ def save_persistables(executor, dirname, main_program=None, filename=None):
             filename=filename)
 
 
+_ASYNC_CHECKPOINT_META_FILE = "__checkpoint_meta__"
+_ASYNC_CHECKPOINT_SHARD_FILE = "__shard_%d__"
+
+
+class AsyncCheckpoint(object):
+    """
+    The handle of a checkpoint being written by save_persistables_async.
+
+    The checkpoint is written on background threads, call :code:`wait` to
+    block until it is published in :code:`dirname`. An exception raised by
+    the background threads is re-raised by :code:`wait`.
+    """
+
+    def __init__(self, dirname, snapshot, shard_num):
+        self.dirname = dirname
+        self._snapshot = snapshot
+        self._shard_num = shard_num
+        self._error = None
+        self._thread = threading.Thread(target=self._write)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def _split_shards(self):
+        # put the largest tensor into the lightest shard first, so that
+        # shards have nearly the same size
+        shards = [[] for _ in six.moves.range(self._shard_num)]
+        shard_bytes = [0] * self._shard_num
+        for name, array in sorted(
+                self._snapshot, key=lambda item: -item[1].nbytes):
+            idx = shard_bytes.index(min(shard_bytes))
+            shards[idx].append((name, array))
+            shard_bytes[idx] += array.nbytes
+        return [shard for shard in shards if shard]
+
+    def _write(self):
+        dirname = os.path.normpath(self.dirname)
+        tmp_dirname = "%s.tmp.%d.%d" % (dirname, os.getpid(), id(self))
+        try:
+            if os.path.exists(tmp_dirname):
+                shutil.rmtree(tmp_dirname)
+            os.makedirs(tmp_dirname)
+
+            shards = self._split_shards()
+            errors = []
+
+            def write_shard(idx, shard):
+                try:
+                    write_checkpoint(
+                        os.path.join(tmp_dirname,
+                                     _ASYNC_CHECKPOINT_SHARD_FILE % idx),
+                        shard,
+                        sync=True)
+                except Exception as e:
+                    errors.append(e)
+
+            workers = [
+                threading.Thread(target=write_shard, args=(idx, shard))
+                for idx, shard in enumerate(shards)
+            ]
+            for w in workers:
+                w.start()
+            for w in workers:
+                w.join()
+            if errors:
+                raise errors[0]
+            # the snapshot is not needed anymore once written
+            self._snapshot = None
+
+            meta = {
+                'shards': [
+                    _ASYNC_CHECKPOINT_SHARD_FILE % idx
+                    for idx in six.moves.range(len(shards))
+                ]
+            }
+            with open(
+                    os.path.join(tmp_dirname, _ASYNC_CHECKPOINT_META_FILE),
+                    'w') as f:
+                json.dump(meta, f)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # publish the checkpoint by renaming, the previous checkpoint in
+            # dirname is kept until the new one is in place
+            old_dirname = None
+            if os.path.exists(dirname):
+                _check_async_checkpoint_dir(dirname)
+                old_dirname = "%s.old.%d.%d" % (dirname, os.getpid(), id(self))
+                os.rename(dirname, old_dirname)
+            try:
+                os.rename(tmp_dirname, dirname)
+            except Exception:
+                if old_dirname is not None:
+                    os.rename(old_dirname, dirname)
+                raise
+            if old_dirname is not None:
+                shutil.rmtree(old_dirname)
+        except Exception as e:
+            self._error = e
+            shutil.rmtree(tmp_dirname, ignore_errors=True)
+
+    def done(self):
+        """
+        Whether the checkpoint has been written or failed.
+        """
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """
+        Wait for the checkpoint to be published.
+
+        Args:
+            timeout(float, optional): The max seconds to wait. Default: None,
+                                      wait until finished.
+
+        Returns:
+            bool: True if the checkpoint is finished, False if timeout.
+        """
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            return False
+        if self._error is not None:
+            raise self._error
+        return True
+
+
+def _is_async_checkpoint(dirname):
+    return os.path.isfile(os.path.join(dirname, _ASYNC_CHECKPOINT_META_FILE))
+
+
+def _check_async_checkpoint_dir(dirname):
+    # only an empty directory or a previous checkpoint is replaced, so that
+    # no other file is removed with it
+    if os.path.isdir(dirname) and (not os.listdir(dirname)
+                                   or _is_async_checkpoint(dirname)):
+        return
+    raise ValueError(
+        "%s exists and is not a checkpoint saved by save_persistables_async, "
+        "it will not be replaced" % dirname)
+
+
+def _load_async_checkpoint(dirname, var_names=None):
+    with open(os.path.join(dirname, _ASYNC_CHECKPOINT_META_FILE)) as f:
+        meta = json.load(f)
+    state_dict = {}
+    for shard_file in meta['shards']:
+        state_dict.update(
+            load_state_file(os.path.join(dirname, shard_file), var_names))
+    return state_dict
+
+
+def save_persistables_async(dirname, main_program=None, scope=None,
+                            shard_num=4):
+    """
+    Save all persistable variables of :code:`main_program` to the folder
+    :code:`dirname` without blocking training.
+
+    The persistable tensors are copied into host memory when this function
+    is called, so the training can go on right after it returns. They are
+    then written on background threads into :code:`shard_num` files of
+    nearly the same size. The files are written into a temporary folder
+    that is renamed to :code:`dirname` when all of them are finished, so
+    :code:`dirname` never holds a partially written checkpoint. The saved
+    checkpoint can be loaded by :code:`fluid.load_program_state(dirname)`.
+
+    The whole :code:`dirname` is replaced by the new checkpoint, so it should
+    be empty, or hold a checkpoint saved by this function before. Otherwise
+    ValueError is raised, rather than removing the other files in it.
+
+    Args:
+        dirname(str): The saving directory path.
+        main_program(Program, optional): The program whose persistable
+                                         variables will be saved. If it is
+                                         None, the default main program will
+                                         be used. Default: None.
+        scope(Scope, optional): The scope holding the variables. If it is
+                                None, the global scope will be used.
+                                Default: None.
+        shard_num(int, optional): The number of files to write in parallel.
+                                  Default: 4.
+
+    Returns:
+        AsyncCheckpoint: the handle to wait for the checkpoint.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle.fluid as fluid
+
+            x = fluid.data(name="x", shape=[10, 10], dtype='float32')
+            y = fluid.layers.fc(x, 10)
+            exe = fluid.Executor(fluid.CPUPlace())
+            exe.run(fluid.default_startup_program())
+
+            handle = fluid.io.save_persistables_async("./my_paddle_model")
+            # go on training here
+            handle.wait()
+
+            program_state = fluid.load_program_state("./my_paddle_model")
+            fluid.set_program_state(fluid.default_main_program(), program_state)
+    """
+    if shard_num < 1:
+        raise ValueError("shard_num should be greater than 0, but received "
+                         "%d" % shard_num)
+    if os.path.exists(dirname):
+        _check_async_checkpoint_dir(dirname)
+    main_program = _get_valid_program(main_program)
+    if scope is None:
+        scope = global_scope()
+
+    snapshot = []
+    for var in filter(is_persistable, main_program.list_vars()):
+        if var.type != core.VarDesc.VarType.LOD_TENSOR:
+            _logger.warning(
+                "variable [ %s ] is not a LoDTensor, skip saving it" % var.name)
+            continue
+        scope_var = scope.find_var(var.name)
+        if scope_var is None:
+            raise ValueError(
+                "variable [ %s ] is not found in scope, please make sure the "
+                "startup program has been run" % var.name)
+        snapshot.append((var.name, np.array(scope_var.get_tensor())))
+
+    return AsyncCheckpoint(dirname, snapshot, shard_num)
+
+
 def load_vars(executor,
               dirname,
               main_program=None,
@@ -1508,6 +1737,7 @@ def save(program, model_path):
     The parameters contains all the trainable Variable, will save to a file with suffix ".pdparams".
     The optimizer information contains all the variable used by optimizer. For Adam optimizer, contains beta1, beta2, momentum etc. All the information will save to a file with suffix ".pdopt". (If the optimizer have no variable need to save (like SGD), the fill will not generated).
     The network description is the description of the program. It's only used for deployment. The description  will save to a file with a suffix ".pdmodel".
+    The ".pdparams" and ".pdopt" files are binary checkpoint files made of an index and the raw data of every tensor, tensors are written one by one from the scope and can be loaded lazily by mmap.
     
     Args:
         program(Program) : The program to saved.
@@ -1534,21 +1764,22 @@ def save(program, model_path):
     if dir_name and not os.path.exists(dir_name):
         os.makedirs(dir_name)
 
-    def get_tensor(var):
-        t = global_scope().find_var(var.name).get_tensor()
-        return np.array(t)
+    def iter_tensors(var_list):
+        # tensors are streamed to the file one by one, CPU tensors are
+        # written from their own buffer without an intermediate copy
+        for var in var_list:
+            t = global_scope().find_var(var.name).get_tensor()
+            if t._place().is_cpu_place():
+                yield var.name, t._as_numpy_view()
+            else:
+                yield var.name, np.array(t)
 
     parameter_list = list(filter(is_parameter, program.list_vars()))
-    param_dict = {p.name: get_tensor(p) for p in parameter_list}
-    with open(model_path + ".pdparams", 'wb') as f:
-        pickle.dump(param_dict, f, protocol=2)
+    write_checkpoint(model_path + ".pdparams", iter_tensors(parameter_list))
 
     optimizer_var_list = list(
         filter(is_belong_to_optimizer, program.list_vars()))
-
-    opt_dict = {p.name: get_tensor(p) for p in optimizer_var_list}
-    with open(model_path + ".pdopt", 'wb') as f:
-        pickle.dump(opt_dict, f, protocol=2)
+    write_checkpoint(model_path + ".pdopt", iter_tensors(optimizer_var_list))
 
     main_program = program.clone()
     program.desc.flush()
@@ -1694,9 +1925,8 @@ def load(program, model_path, executor=None, var_list=None):
         paddle.fluid.core._create_loaded_parameter(parameter_list,
                                                    global_scope(),
                                                    executor._default_executor)
-    with open(parameter_file_name, 'rb') as f:
-        load_dict = pickle.load(f) if six.PY2 else pickle.load(
-            f, encoding='latin1')
+    load_dict = load_state_file(parameter_file_name,
+                                [v.name for v in parameter_list])
     for v in parameter_list:
         assert v.name in load_dict, \
             "Can not find [{}] in model file [{}]".format(
@@ -1715,9 +1945,8 @@ def load(program, model_path, executor=None, var_list=None):
             paddle.fluid.core._create_loaded_parameter(
                 optimizer_var_list, global_scope(), executor._default_executor)
 
-        with open(opt_file_name, 'rb') as f:
-            load_dict = pickle.load(f) if six.PY2 else pickle.load(
-                f, encoding='latin1')
+        load_dict = load_state_file(opt_file_name,
+                                    [v.name for v in optimizer_var_list])
         for v in optimizer_var_list:
             assert v.name in load_dict, \
                 "Can not find [{}] in model file [{}]".format(
@@ -1730,12 +1959,16 @@ def load_program_state(model_path, var_list=None):
     Load program state from local file
     
     Args:
-        model_path(str): The file prefix store the program
+        model_path(str): The file prefix store the program, or the directory
+                         saved by save_persistables_async
         var_list(list, optional): The variable list to load saved with 
                                   [ save_params, save_persistables, save_vars ]. 
                                   Default: None.
                                   The var_list is only used to get name, 
                                   will not be modified.
+                                  For files saved with fluid.save or
+                                  save_persistables_async, only the
+                                  variables in var_list are loaded.
     Returns:
         state_dict(dict): the dict store Parameter and optimizer information
 
@@ -1764,6 +1997,16 @@ def load_program_state(model_path, var_list=None):
     elif model_prefix.endswith(".pdmodel"):
         model_prefix = model_prefix[:-8]
 
+    var_names = None
+    if var_list is not None:
+        var_names = [
+            var if isinstance(var, six.string_types) else var.name
+            for var in var_list
+        ]
+
+    if os.path.isdir(model_path) and _is_async_checkpoint(model_path):
+        return _load_async_checkpoint(model_path, var_names)
+
     parameter_file_name = model_prefix + ".pdparams"
     if not os.path.exists(parameter_file_name):
         # model file saved with fluid.save is not found, try to load model file saved with
@@ -1840,15 +2083,11 @@ def load_program_state(model_path, var_list=None):
     assert os.path.exists(parameter_file_name), \
         "Parameter file [{}] not exits".format(parameter_file_name)
 
-    with open(parameter_file_name, 'rb') as f:
-        para_dict = pickle.load(f) if six.PY2 else pickle.load(
-            f, encoding='latin1')
+    para_dict = load_state_file(parameter_file_name, var_names)
 
     opt_file_name = model_prefix + ".pdopt"
     if os.path.exists(opt_file_name):
-        with open(opt_file_name, 'rb') as f:
-            opti_dict = pickle.load(f) if six.PY2 else pickle.load(
-                f, encoding='latin1')
+        opti_dict = load_state_file(opt_file_name, var_names)
 
         para_dict.update(opti_dict)
 
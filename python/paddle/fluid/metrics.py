@@ -82,6 +82,9 @@ class MetricBase(object):
 
     3. reset(): empty the memory.
 
+    4. merge(other): add the memory of another metric instance, so that the
+    metrics updated in different threads or workers can be combined.
+
     """
 
     def __init__(self, name):
@@ -156,6 +159,41 @@ class MetricBase(object):
         config.update({"name": self._name, "states": copy.deepcopy(states)})
         return config
 
+    def merge(self, other):
+        """
+        Merge the evaluation memory of another metric instance of the same
+        class into this one, as if all the mini-batches updated to other had
+        been updated to this one. It is used to combine the metric instances
+        updated by different threads, or the ones pickled from different
+        workers.
+
+        Args:
+            other(MetricBase): the metric instance to be merged.
+
+        Returns:
+            MetricBase: this metric instance.
+
+        Return types:
+            MetricBase
+        """
+        if type(other) is not type(self):
+            raise TypeError("Can not merge %s into %s." % (type(other).__name__,
+                                                           type(self).__name__))
+        states = {
+            attr: value
+            for attr, value in six.iteritems(self.__dict__)
+            if not attr.startswith("_")
+        }
+        for attr, value in six.iteritems(states):
+            other_value = getattr(other, attr)
+            if other_value is None:
+                continue
+            if value is None:
+                setattr(self, attr, copy.deepcopy(other_value))
+            else:
+                setattr(self, attr, value + other_value)
+        return self
+
     def update(self, preds, labels):
         """
         Given the prediction results (preds) and the labels (labels)
@@ -255,6 +293,23 @@ class CompositeMetric(MetricBase):
         for m in self._metrics:
             m.update(preds, labels)
 
+    def merge(self, other):
+        """
+        Merge the metrics of another container into the metrics of this
+        container one by one.
+
+        Args:
+            other(CompositeMetric): a container with the same kinds of
+                                    metrics added in the same order.
+        """
+        if not isinstance(other, CompositeMetric) or len(other._metrics) != len(
+                self._metrics):
+            raise TypeError(
+                "Can only merge a CompositeMetric with the same metrics.")
+        for m, other_m in zip(self._metrics, other._metrics):
+            m.merge(other_m)
+        return self
+
     def eval(self):
         """
         Calculate the results of all metrics sequentially.
@@ -326,17 +381,11 @@ class Precision(MetricBase):
             raise ValueError("The 'preds' must be a numpy ndarray.")
         if not _is_numpy_(labels):
             raise ValueError("The 'labels' must be a numpy ndarray.")
-        sample_num = labels.shape[0]
-        preds = np.rint(preds).astype("int32")
-
-        for i in range(sample_num):
-            pred = preds[i]
-            label = labels[i]
-            if pred == 1:
-                if pred == label:
-                    self.tp += 1
-                else:
-                    self.fp += 1
+        pred_pos = np.rint(preds).astype("int32").reshape(-1) == 1
+        label_pos = labels.reshape(-1) == 1
+        tp = int(np.count_nonzero(pred_pos & label_pos))
+        self.tp += tp
+        self.fp += int(np.count_nonzero(pred_pos)) - tp
 
     def eval(self):
         """
@@ -409,17 +458,11 @@ class Recall(MetricBase):
             raise ValueError("The 'preds' must be a numpy ndarray.")
         if not _is_numpy_(labels):
             raise ValueError("The 'labels' must be a numpy ndarray.")
-        sample_num = labels.shape[0]
-        preds = np.rint(preds).astype("int32")
-
-        for i in range(sample_num):
-            pred = preds[i]
-            label = labels[i]
-            if label == 1:
-                if pred == label:
-                    self.tp += 1
-                else:
-                    self.fn += 1
+        pred_pos = np.rint(preds).astype("int32").reshape(-1) == 1
+        label_pos = labels.reshape(-1) == 1
+        tp = int(np.count_nonzero(pred_pos & label_pos))
+        self.tp += tp
+        self.fn += int(np.count_nonzero(label_pos)) - tp
 
     def eval(self):
         """
@@ -700,7 +743,7 @@ class Auc(MetricBase):
     """
     The auc metric is for binary classification.
     Refer to https://en.wikipedia.org/wiki/Receiver_operating_characteristic#Area_under_the_curve.
-    Please notice that the auc metric is implemented with python, which may be a little bit slow.
+    Please notice that the auc metric is implemented with numpy, the predictions have to be fetched to host.
     If you concern the speed, please use the fluid.layers.auc instead.
 
     The `auc` function creates four local variables, `true_positives`,
@@ -749,8 +792,8 @@ class Auc(MetricBase):
         self._num_thresholds = num_thresholds
 
         _num_pred_buckets = num_thresholds + 1
-        self._stat_pos = [0] * _num_pred_buckets
-        self._stat_neg = [0] * _num_pred_buckets
+        self._stat_pos = np.zeros(_num_pred_buckets, dtype='int64')
+        self._stat_neg = np.zeros(_num_pred_buckets, dtype='int64')
 
     def update(self, preds, labels):
         """
@@ -765,14 +808,34 @@ class Auc(MetricBase):
         if not _is_numpy_(preds):
             raise ValueError("The 'predictions' must be a numpy ndarray.")
 
-        for i, lbl in enumerate(labels):
-            value = preds[i, 1]
-            bin_idx = int(value * self._num_thresholds)
-            assert bin_idx <= self._num_thresholds
-            if lbl:
-                self._stat_pos[bin_idx] += 1.0
-            else:
-                self._stat_neg[bin_idx] += 1.0
+        bin_idx = (preds[:, 1] * self._num_thresholds).astype('int64')
+        assert bin_idx.size == 0 or bin_idx.max() <= self._num_thresholds
+        is_pos = labels.reshape(-1) != 0
+        num_buckets = self._num_thresholds + 1
+        self._stat_pos += np.bincount(bin_idx[is_pos], minlength=num_buckets)
+        self._stat_neg += np.bincount(bin_idx[~is_pos], minlength=num_buckets)
+
+    def reset(self):
+        super(Auc, self).reset()
+        self._stat_pos = np.zeros_like(self._stat_pos)
+        self._stat_neg = np.zeros_like(self._stat_neg)
+
+    def merge(self, other):
+        """
+        Merge the buckets of another Auc metric with the same num_thresholds
+        into this one.
+
+        Args:
+            other(Auc): the Auc metric to be merged.
+        """
+        super(Auc, self).merge(other)
+        if other._num_thresholds != self._num_thresholds:
+            raise ValueError(
+                "Can not merge Auc metrics with different num_thresholds "
+                "%d and %d." % (other._num_thresholds, self._num_thresholds))
+        self._stat_pos = self._stat_pos + other._stat_pos
+        self._stat_neg = self._stat_neg + other._stat_neg
+        return self
 
     @staticmethod
     def trapezoid_area(x1, x2, y1, y2):
@@ -785,20 +848,18 @@ class Auc(MetricBase):
         Return:
             float: the area under auc curve
         """
-        tot_pos = 0.0
-        tot_neg = 0.0
-        auc = 0.0
-
-        idx = self._num_thresholds
-        while idx >= 0:
-            tot_pos_prev = tot_pos
-            tot_neg_prev = tot_neg
-            tot_pos += self._stat_pos[idx]
-            tot_neg += self._stat_neg[idx]
-            auc += self.trapezoid_area(tot_neg, tot_neg_prev, tot_pos,
-                                       tot_pos_prev)
-            idx -= 1
-
+        # accumulate the buckets from the highest threshold to the lowest one
+        tot_pos = np.cumsum(self._stat_pos[::-1], dtype='float64')
+        tot_neg = np.cumsum(self._stat_neg[::-1], dtype='float64')
+        tot_pos_prev = np.concatenate(([0.0], tot_pos[:-1]))
+        tot_neg_prev = np.concatenate(([0.0], tot_neg[:-1]))
+        auc = float(
+            np.sum(
+                self.trapezoid_area(tot_neg, tot_neg_prev, tot_pos,
+                                    tot_pos_prev)))
+
+        tot_pos = tot_pos[-1]
+        tot_neg = tot_neg[-1]
         return auc / tot_pos / tot_neg if tot_pos > 0.0 and tot_neg > 0.0 else 0.0
 
 
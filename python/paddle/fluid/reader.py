@@ -38,6 +38,11 @@ else:
 QUEUE_GET_TIMEOUT = 5
 MAX_GET_FAILED_TIME = 12
 
+# NOTE: besides the batches in the blocking queue, the double buffer reader
+# caches some batches and the executor holds the batch being consumed, so the
+# staging pool keeps a few more tensors than the queue capacity
+_STAGING_POOL_EXTRA_SIZE = 4
+
 __all__ = ['PyReader', 'DataLoader']
 
 data_loader_unique_name_generator = UniqueNameGenerator()
@@ -58,7 +63,66 @@ def _convert_places(places):
     return ret
 
 
+class _TensorStagingPool(object):
+    """
+    A pool of reusable host tensors for each feed slot.
+
+    Converting a numpy batch into a new LoDTensor allocates host memory for
+    every batch. The pool keeps at most pool_size LoDTensors per slot and
+    copies the next batch into one whose memory is not shared by the blocking
+    queue, the double buffer reader or the executor any more, so that its
+    memory is reused instead of being allocated again.
+    """
+
+    def __init__(self, pool_size, place=None):
+        self._pool_size = pool_size
+        self.place = core.CPUPlace() if place is None else place
+        self._slots = []
+        self._hits = 0
+        self._misses = 0
+
+    def stage(self, slot, item):
+        while len(self._slots) <= slot:
+            self._slots.append([])
+        tensors = self._slots[slot]
+        for t in tensors:
+            # only the pool holds the memory of t, it is safe to overwrite
+            if t._holder_use_count() <= 1:
+                t.set(item, self.place)
+                self._hits += 1
+                return t
+
+        self._misses += 1
+        t = core.LoDTensor()
+        t.set(item, self.place)
+        if len(tensors) < self._pool_size:
+            tensors.append(t)
+        return t
+
+    def size(self):
+        return sum(len(tensors) for tensors in self._slots)
+
+    def stats(self):
+        return {
+            'pool_size': self.size(),
+            'pool_capacity': self._pool_size * len(self._slots),
+            'hits': self._hits,
+            'misses': self._misses,
+        }
+
+
+def _staging_place(places, use_double_buffer):
+    # the double buffer reader copies pinned memory to GPU asynchronously
+    # without an extra staging copy
+    if use_double_buffer and core.is_compiled_with_cuda() and places and any(
+            p.is_gpu_place() for p in places):
+        return core.CUDAPinnedPlace()
+    return core.CPUPlace()
+
+
 class DataLoaderBase(object):
+    _staging_pool = None
+
     def __init__(self):
         self._places = None
 
@@ -80,6 +144,39 @@ class DataLoaderBase(object):
     def __next__(self):
         raise NotImplementedError()
 
+    def _stage_tensor(self, slot, item):
+        if self._staging_pool is not None:
+            return self._staging_pool.stage(slot, item)
+        tmp = core.LoDTensor()
+        tmp.set(item, core.CPUPlace())
+        return tmp
+
+    def staging_stats(self):
+        """
+        Get the metrics of feeding data, which contain the number of batches
+        in the queue and the size of the host tensor staging pool.
+
+        Returns:
+            dict: a dict with keys queue_size, queue_capacity, pool_size,
+                  pool_capacity, hits and misses. hits and misses count the
+                  batches converted into a pooled tensor or a new tensor.
+        """
+        queue = self.queue
+        stats = {
+            'queue_size': queue.size() if queue is not None else 0,
+            'queue_capacity': queue.capacity() if queue is not None else 0,
+        }
+        if self._staging_pool is not None:
+            stats.update(self._staging_pool.stats())
+        else:
+            stats.update({
+                'pool_size': 0,
+                'pool_capacity': 0,
+                'hits': 0,
+                'misses': 0
+            })
+        return stats
+
 
 class DataLoader(object):
     @staticmethod
@@ -340,6 +437,8 @@ class DygraphGeneratorLoader(DataLoaderBase):
             raise ValueError("Please give value to capacity.")
         self._capacity = capacity
         self._use_double_buffer = use_double_buffer
+        self._staging_pool = _TensorStagingPool(capacity +
+                                                _STAGING_POOL_EXTRA_SIZE)
 
         if not iterable:
             logging.warning(
@@ -413,6 +512,8 @@ class DygraphGeneratorLoader(DataLoaderBase):
             self._need_check_feed, self._places, self._use_double_buffer)
 
     def _start(self):
+        self._staging_pool.place = _staging_place(self._places,
+                                                  self._use_double_buffer)
         if self._use_multiprocess:
             # Set data_queue and process
             self._data_queue = multiprocessing.Queue(self._capacity)
@@ -546,12 +647,10 @@ class DygraphGeneratorLoader(DataLoaderBase):
                 if sample is not None:
                     try:
                         array = core.LoDTensorArray()
-                        for item in sample:
+                        for i, item in enumerate(sample):
                             if not isinstance(item, core.LoDTensor):
                                 self._check_input_array(item)
-                                tmp = core.LoDTensor()
-                                tmp.set(item, core.CPUPlace())
-                                item = tmp
+                                item = self._stage_tensor(i, item)
                             array.append(item)
                         if not self._blocking_queue.push(array):
                             self._blocking_queue.close()
@@ -565,12 +664,10 @@ class DygraphGeneratorLoader(DataLoaderBase):
         try:
             for sample in self._batch_reader():
                 array = core.LoDTensorArray()
-                for item in sample:
+                for i, item in enumerate(sample):
                     if not isinstance(item, core.LoDTensor):
                         self._check_input_array(item)
-                        tmp = core.LoDTensor()
-                        tmp.set(item, core.CPUPlace())
-                        item = tmp
+                        item = self._stage_tensor(i, item)
 
                     array.append(item)
 
@@ -642,6 +739,8 @@ class GeneratorLoader(DataLoaderBase):
             raise Exception("Feed list must be given under static mode.")
         self._use_double_buffer = use_double_buffer
         self._capacity = capacity
+        self._staging_pool = _TensorStagingPool(capacity +
+                                                _STAGING_POOL_EXTRA_SIZE)
         if not self._iterable:
             self._init_non_iterable()
 
@@ -780,16 +879,17 @@ class GeneratorLoader(DataLoaderBase):
                 "'fluid.create_lod_tensor' to convert it to a LoD-Tensor."))
 
     def _start(self):
+        self._staging_pool.place = _staging_place(self._places,
+                                                  self._use_double_buffer)
+
         def __thread_main__():
             try:
                 for tensors in self._tensor_reader():
                     array = core.LoDTensorArray()
-                    for item in tensors:
+                    for i, item in enumerate(tensors):
                         if not isinstance(item, core.LoDTensor):
                             self._check_input_array(item)
-                            tmp = core.LoDTensor()
-                            tmp.set(item, core.CPUPlace())
-                            item = tmp
+                            item = self._stage_tensor(i, item)
 
                         array.append(item)
 
@@ -1053,6 +1153,9 @@ class PyReader(DataLoaderBase):
     def iterable(self):
         return self._loader.iterable
 
+    def staging_stats(self):
+        return self._loader.staging_stats()
+
     def __iter__(self):
         return self._loader.__iter__()
 
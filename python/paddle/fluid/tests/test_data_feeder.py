@@ -14,7 +14,9 @@
 
 from __future__ import print_function
 
+import numpy as np
 import paddle.fluid as fluid
+from paddle.fluid.data_feeder import BatchedTensorProvider
 import unittest
 
 
@@ -76,6 +78,62 @@ class TestDataFeeder(unittest.TestCase):
                          [[2, 1], [3, 2, 4]])
         self.assertEqual(result['label'].recursive_sequence_lengths(), [])
 
+    def test_reuse_batch_buffer(self):
+        img = fluid.data(name='image', shape=[None, 2, 3], dtype='float32')
+        feeder = fluid.DataFeeder([img], fluid.CPUPlace())
+
+        def reader(batch_size, value):
+            for _ in range(batch_size):
+                yield np.full([6], value, dtype='float32'),
+
+        # the buffer grows when the generator yields more samples than
+        # the default capacity, and is reused by the following batches
+        buffers = []
+        for batch_size, value in [(50, 1), (3, 2), (70, 3), (10, 4)]:
+            result = feeder.feed(reader(batch_size, value))
+            arr = np.array(result['image'])
+            self.assertEqual(arr.shape, (batch_size, 2, 3))
+            self.assertTrue(np.all(arr == value))
+            buffers.append(feeder._converters[0]._buffer)
+        self.assertIs(buffers[0], buffers[1])
+        self.assertIs(buffers[2], buffers[3])
+
+    def test_mixed_sample_shapes(self):
+        img = fluid.data(name='image', shape=[None, 2, 3], dtype='float32')
+        feeder = fluid.DataFeeder([img], fluid.CPUPlace())
+        # samples with the same number of elements are reshaped
+        result = feeder.feed([(np.ones([6]), ), (np.ones([6]), )])
+        self.assertEqual(result['image'].shape(), [2, 2, 3])
+        # the batch containing samples of different shapes fails as before
+        self.assertRaises(ValueError, feeder.feed, [(np.ones([2, 3]), ),
+                                                    (np.ones([6]), )])
+        self.assertRaises(ValueError, feeder.feed, [(np.ones([2, 3]), ),
+                                                    (np.ones([5]), )])
+        result = feeder.feed([(np.zeros([2, 3]), )])
+        self.assertTrue(np.all(np.array(result['image']) == 0))
+
+    def test_batched_tensor_provider(self):
+        x = fluid.data(name='x', shape=[None, 4], dtype='float32')
+        y = fluid.data(name='y', shape=[None, 1], dtype='int64')
+
+        def generator():
+            for i in range(10):
+                yield np.full([4], i, dtype='float32'), [i]
+
+        provider = BatchedTensorProvider(
+            feed_list=[x, y],
+            place=fluid.CPUPlace(),
+            batch_size=4,
+            generator=generator,
+            drop_last=False)
+        batches = [[np.array(t) for t in batch] for batch in provider()]
+        self.assertEqual([len(b[0]) for b in batches], [4, 4, 2])
+        self.assertTrue(
+            np.array_equal(
+                np.concatenate([b[1] for b in batches]).flatten(),
+                np.arange(10)))
+        self.assertTrue(np.array_equal(batches[1][0][:, 0], [4, 5, 6, 7]))
+
 
 if __name__ == '__main__':
     unittest.main()
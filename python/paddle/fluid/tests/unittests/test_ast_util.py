@@ -17,7 +17,13 @@ from __future__ import print_function
 import unittest
 import textwrap
 import gast
+import imp
 import inspect
+import os
+import tempfile
+import time
+import traceback
+import astor
 import numpy as np
 import paddle.fluid as fluid
 from paddle.fluid.dygraph.dygraph_to_static.ast_utils import get_name_ids, ast_to_func, is_control_flow_if
@@ -181,6 +187,28 @@ class TestAST2Func(unittest.TestCase):
             ret = exe.run(main_program, fetch_list=[true_ret, test_ret])
             self.assertTrue((ret[0] == ret[1]).all())
 
+    def test_ast2func_in_memory(self):
+        def func(x, y):
+            z = x + y
+            return z / y
+
+        source = textwrap.dedent(inspect.getsource(func))
+        transformed_func, file_name = ast_to_func(
+            gast.parse(source), func.__name__)
+        self.assertFalse(os.path.exists(file_name))
+        self.assertEqual(inspect.getsource(transformed_func), source)
+        with self.assertRaises(ZeroDivisionError) as ctx:
+            transformed_func(1, 0)
+        stack = traceback.extract_tb(ctx.exception.__traceback__)
+        self.assertEqual(stack[-1][0], file_name)
+        self.assertEqual(stack[-1][3], 'return z / y')
+
+        # a new module for every call
+        other_func, other_file_name = ast_to_func(
+            gast.parse(source), func.__name__)
+        self.assertNotEqual(file_name, other_file_name)
+        self.assertFalse(other_func.__globals__ is transformed_func.__globals__)
+
     def test_ast2func_error(self):
         with self.assertRaises(Exception) as e:
             self.assertRaises(TypeError, ast_to_func("x = a + b", 'foo'))
@@ -188,5 +216,46 @@ class TestAST2Func(unittest.TestCase):
                         str(e.exception))
 
 
+class TestAST2FuncBenchmark(unittest.TestCase):
+    def large_forward_source(self, layer_num):
+        lines = ["def forward(x):"]
+        for i in range(layer_num):
+            lines.append("    x = fluid.layers.fc(x, size=16)")
+            lines.append("    if fluid.layers.mean(x).numpy()[0] > %d:" % i)
+            lines.append("        x = fluid.layers.relu(x)")
+        lines.append("    return x")
+        return "\n".join(lines) + "\n"
+
+    def load_from_temp_file(self, ast_root, func_name):
+        # the former implementation of ast_to_func, as the baseline
+        source = astor.to_source(gast.gast_to_ast(ast_root))
+        with tempfile.NamedTemporaryFile(
+                mode='w', suffix='.py', delete=False) as f:
+            f.write("import paddle\n"
+                    "import paddle.fluid as fluid\n"
+                    "import paddle.fluid.layers as layers\n")
+            f.write(source)
+        module = imp.load_source(os.path.basename(f.name[:-3]), f.name)
+        os.remove(f.name)
+        return getattr(module, func_name)
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_benchmark(self):
+        ast_root = gast.parse(self.large_forward_source(500))
+        repeat = 5
+        start = time.time()
+        for _ in range(repeat):
+            ast_to_func(ast_root, 'forward')
+        memory_time = (time.time() - start) / repeat
+
+        start = time.time()
+        for _ in range(repeat):
+            self.load_from_temp_file(ast_root, 'forward')
+        file_time = (time.time() - start) / repeat
+        print("ast_to_func of 1500 lines: in memory %.4fs, temp file %.4fs" %
+              (memory_time, file_time))
+
+
 if __name__ == '__main__':
     unittest.main()
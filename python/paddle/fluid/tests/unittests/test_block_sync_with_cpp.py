@@ -0,0 +1,123 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import time
+import unittest
+
+import paddle.fluid as fluid
+from simple_nets import simple_fc_net
+
+
+class TestBlockSyncWithCpp(unittest.TestCase):
+    def setUp(self):
+        self.program = fluid.Program()
+        with fluid.program_guard(self.program, fluid.Program()):
+            simple_fc_net()
+
+    def check_synced(self, block):
+        self.assertEqual(len(block.ops), block.desc.op_size())
+        for index, op in enumerate(block.ops):
+            self.assertTrue(op.desc is block.desc.op(index))
+            self.assertEqual(op.type, block.desc.op(index).type())
+
+    def test_insert_and_prepend(self):
+        block = self.program.global_block()
+        ops = list(block.ops)
+
+        block.desc._prepend_op().set_type('scale')
+        block.desc._insert_op(3).set_type('scale')
+        block.desc._insert_op(block.desc.op_size() - 1).set_type('scale')
+        block.desc.append_op().set_type('scale')
+        block._sync_with_cpp()
+
+        self.check_synced(block)
+        self.assertEqual(len(block.ops), len(ops) + 4)
+        # the python operators of the untouched op descs are reused
+        kept = [op for op in block.ops if op.type != 'scale']
+        self.assertEqual(len(kept), len(ops))
+        for old_op, new_op in zip(ops, kept):
+            self.assertTrue(old_op is new_op)
+
+    def test_remove(self):
+        block = self.program.global_block()
+        ops = list(block.ops)
+
+        block.desc._remove_op(len(ops) - 1, len(ops))
+        block.desc._remove_op(2, 4)
+        block.desc._remove_op(0, 1)
+        block._sync_with_cpp()
+
+        self.check_synced(block)
+        self.assertEqual(block.ops, ops[1:2] + ops[4:-1])
+
+    def test_remove_and_insert(self):
+        block = self.program.global_block()
+        ops = list(block.ops)
+
+        block.desc._remove_op(0, 2)
+        block.desc._prepend_op().set_type('scale')
+        block.desc._insert_op(4).set_type('scale')
+        block._sync_with_cpp()
+
+        self.check_synced(block)
+        self.assertEqual([op for op in block.ops if op.type != 'scale'],
+                         ops[2:])
+
+    def test_remove_all(self):
+        block = self.program.global_block()
+        block.desc._remove_op(0, block.desc.op_size())
+        block._sync_with_cpp()
+        self.assertEqual(len(block.ops), 0)
+
+
+class TestBlockSyncWithCppBenchmark(unittest.TestCase):
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_benchmark(self):
+        layer_num = 500
+        program = fluid.Program()
+        with fluid.program_guard(program, fluid.Program()):
+            hidden = fluid.data(name='x', shape=[None, 16], dtype='float32')
+            for _ in range(layer_num):
+                hidden = fluid.layers.fc(input=hidden, size=16, act='relu')
+            loss = fluid.layers.mean(hidden)
+
+        start = time.time()
+        with fluid.program_guard(program):
+            fluid.backward.append_backward(loss)
+        backward_time = time.time() - start
+
+        start = time.time()
+        test_program = program.clone(for_test=True)
+        clone_time = time.time() - start
+
+        start = time.time()
+        pruned = program._prune(targets=[loss])
+        prune_time = time.time() - start
+
+        print("%d ops: append_backward %.3fs, clone %.3fs, _prune %.3fs" % (len(
+            program.global_block().ops), backward_time, clone_time, prune_time))
+        self.assertEqual(
+            len(test_program.global_block().ops),
+            test_program.desc.block(0).op_size())
+        self.assertEqual(
+            len(pruned.global_block().ops),
+            pruned.desc.block(0).op_size())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+from paddle.fluid.checkpoint_file import write_checkpoint, is_checkpoint_file, \
+    CheckpointReader, load_state_file
+
+
+class TestCheckpointFile(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.dirname, 'model.pdparams')
+        self.state = {
+            'fc_0.w_0': np.random.random((13, 7)).astype('float32'),
+            'fc_0.b_0': np.random.random((7, )).astype('float64'),
+            'step': np.array([3], dtype='int64'),
+            'empty': np.zeros((0, 4), dtype='float32'),
+            # not C-contiguous
+            'transposed': np.random.random((5, 3)).astype('float32').T,
+        }
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_round_trip(self):
+        write_checkpoint(self.file_name, self.state.items())
+        self.assertTrue(is_checkpoint_file(self.file_name))
+
+        reader = CheckpointReader(self.file_name)
+        self.assertEqual(sorted(reader.keys()), sorted(self.state.keys()))
+        for name, value in self.state.items():
+            loaded = reader.get(name)
+            self.assertEqual(loaded.dtype, value.dtype)
+            self.assertEqual(loaded.shape, value.shape)
+            self.assertTrue(np.array_equal(loaded, value))
+
+    def test_load_subset(self):
+        write_checkpoint(self.file_name, self.state.items())
+        state = load_state_file(self.file_name, ['fc_0.w_0', 'not_exist'])
+        self.assertEqual(list(state.keys()), ['fc_0.w_0'])
+        self.assertTrue(
+            np.array_equal(state['fc_0.w_0'], self.state['fc_0.w_0']))
+
+    def test_loaded_array_is_private(self):
+        write_checkpoint(self.file_name, self.state.items())
+        loaded = load_state_file(self.file_name)['fc_0.w_0']
+        loaded[...] = 0
+        reloaded = load_state_file(self.file_name)['fc_0.w_0']
+        self.assertTrue(np.array_equal(reloaded, self.state['fc_0.w_0']))
+
+    def test_write_from_generator(self):
+        def gen():
+            for name in sorted(self.state.keys()):
+                yield name, self.state[name]
+
+        write_checkpoint(self.file_name, gen())
+        state = load_state_file(self.file_name)
+        for name, value in self.state.items():
+            self.assertTrue(np.array_equal(state[name], value))
+
+    def test_load_pickle_file(self):
+        with open(self.file_name, 'wb') as f:
+            pickle.dump(self.state, f, protocol=2)
+        self.assertFalse(is_checkpoint_file(self.file_name))
+        self.assertRaises(ValueError, CheckpointReader, self.file_name)
+
+        state = load_state_file(self.file_name)
+        self.assertEqual(sorted(state.keys()), sorted(self.state.keys()))
+        state = load_state_file(self.file_name, ['step'])
+        self.assertEqual(list(state.keys()), ['step'])
+
+
+class TestSaveLoadProgramState(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_save_load(self):
+        main_program = fluid.Program()
+        startup_program = fluid.Program()
+        with fluid.program_guard(main_program, startup_program):
+            x = fluid.data(name="x", shape=[-1, 10], dtype='float32')
+            y = fluid.layers.fc(x, 10)
+            loss = fluid.layers.reduce_mean(y)
+            fluid.optimizer.Adam(learning_rate=0.01).minimize(loss)
+
+        scope = fluid.core.Scope()
+        with fluid.scope_guard(scope):
+            exe = fluid.Executor(fluid.CPUPlace())
+            exe.run(startup_program)
+            model_path = os.path.join(self.dirname, 'model')
+            fluid.save(main_program, model_path)
+            self.assertTrue(is_checkpoint_file(model_path + '.pdparams'))
+            self.assertTrue(is_checkpoint_file(model_path + '.pdopt'))
+
+            base_map = {}
+            for var in main_program.list_vars():
+                if var.persistable:
+                    base_map[var.name] = np.array(
+                        scope.find_var(var.name).get_tensor())
+                    t = scope.find_var(var.name).get_tensor()
+                    t.set(np.zeros_like(base_map[var.name]), fluid.CPUPlace())
+
+            fluid.load(main_program, model_path, exe)
+            for name, value in base_map.items():
+                new_t = np.array(scope.find_var(name).get_tensor())
+                self.assertTrue(np.array_equal(new_t, value))
+
+            params = fluid.io.get_program_parameter(main_program)
+            program_state = fluid.load_program_state(
+                model_path, var_list=params[:1])
+            self.assertEqual(list(program_state.keys()), [params[0].name])
+            self.assertTrue(
+                np.array_equal(program_state[params[0].name],
+                               base_map[params[0].name]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import paddle.fluid as fluid
+import numpy as np
+import unittest
+
+BATCH_NUM = 50
+CAPACITY = 4
+
+
+def batch_reader():
+    for num in range(BATCH_NUM):
+        yield (np.ones([8, 32]) * num).astype('float32'), \
+            (np.ones([8, 1]) * num).astype('int64')
+
+
+class TestDataLoaderStagingPool(unittest.TestCase):
+    def setUp(self):
+        self.use_double_buffer = True
+
+    def get_place(self):
+        if fluid.is_compiled_with_cuda():
+            return fluid.CUDAPlace(0)
+        else:
+            return fluid.CPUPlace()
+
+    def test_main(self):
+        with fluid.program_guard(fluid.Program(), fluid.Program()):
+            with fluid.scope_guard(fluid.Scope()):
+                self.run_network()
+
+    def run_network(self):
+        x = fluid.data(name='x', shape=[None, 32], dtype='float32')
+        label = fluid.data(name='label', shape=[None, 1], dtype='int64')
+        loader = fluid.io.DataLoader.from_generator(
+            feed_list=[x, label],
+            capacity=CAPACITY,
+            use_double_buffer=self.use_double_buffer,
+            iterable=True)
+        y = fluid.layers.fc(x, size=10)
+        loss = fluid.layers.reduce_mean(y)
+        fluid.optimizer.SGD(learning_rate=1e-3).minimize(loss)
+
+        exe = fluid.Executor(self.get_place())
+        exe.run(fluid.default_startup_program())
+        prog = fluid.default_main_program()
+
+        loader.set_batch_generator(batch_reader, places=self.get_place())
+        for epoch_id in range(2):
+            batch_id = 0
+            for data in loader():
+                x_val, label_val = exe.run(
+                    prog, feed=data, fetch_list=[x, label])
+                # the reused tensors must not overwrite the batches in use
+                self.assertTrue(np.all(x_val == batch_id))
+                self.assertTrue(np.all(label_val == batch_id))
+                batch_id += 1
+
+                stats = loader.staging_stats()
+                self.assertLessEqual(stats['queue_size'], CAPACITY)
+                self.assertEqual(stats['queue_capacity'], CAPACITY)
+                self.assertLessEqual(stats['pool_size'], stats['pool_capacity'])
+            self.assertEqual(batch_id, BATCH_NUM)
+
+        stats = loader.staging_stats()
+        self.assertEqual(stats['hits'] + stats['misses'], 2 * 2 * BATCH_NUM)
+        self.assertGreater(stats['hits'], 0)
+
+
+class TestDataLoaderStagingPoolNoDoubleBuffer(TestDataLoaderStagingPool):
+    def setUp(self):
+        self.use_double_buffer = False
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import time
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+from paddle.fluid.dygraph import jit
+from paddle.fluid.dygraph.jit import dygraph_to_static_output, dygraph_to_static_cached_output
+from paddle.fluid.dygraph.dygraph_to_static import FunctionCache
+
+if fluid.is_compiled_with_cuda():
+    place = fluid.CUDAPlace(0)
+else:
+    place = fluid.CPUPlace()
+
+
+def dyfunc_with_if_else(x_v, label=None):
+    if fluid.layers.mean(x_v).numpy()[0] > 5:
+        x_v = x_v - 1
+    else:
+        x_v = x_v + 1
+    # plain if in python
+    if label is not None:
+        loss = fluid.layers.cross_entropy(x_v, label)
+        return loss
+    return x_v
+
+
+def dyfunc_with_dropout(x_v):
+    y = fluid.layers.dropout(x_v, dropout_prob=0.5)
+    return fluid.layers.relu(y), fluid.layers.mean(y)
+
+
+def dyfunc_with_fc(x_v):
+    return fluid.layers.fc(x_v, size=8)
+
+
+class TestFunctionCache(unittest.TestCase):
+    def test_convert_once(self):
+        cache = FunctionCache()
+        static_func = cache.get_or_cache_func(dyfunc_with_if_else)
+        self.assertTrue(
+            cache.get_or_cache_func(dyfunc_with_if_else) is static_func)
+        self.assertEqual(len(cache), 1)
+        cache.get_or_cache_func(dyfunc_with_dropout)
+        self.assertEqual(len(cache), 2)
+
+    def test_static_mode(self):
+        x = np.random.random([10, 16]).astype('float32')
+        func = dygraph_to_static_output(dyfunc_with_if_else)
+        for _ in range(3):
+            main_program = fluid.Program()
+            with fluid.program_guard(main_program):
+                x_v = fluid.layers.assign(x)
+                out = func(x_v)
+                ret, = fluid.Executor(place).run(main_program, fetch_list=[out])
+            self.assertTrue(np.allclose(ret, x + 1))
+        self.assertIn(dyfunc_with_if_else.__code__,
+                      jit._FUNCTION_CACHE._code_to_static_func)
+
+
+class TestProgramCache(unittest.TestCase):
+    def test_numpy_inputs(self):
+        jit._PROGRAM_CACHES.pop(dyfunc_with_if_else.__code__, None)
+        func = dygraph_to_static_cached_output(dyfunc_with_if_else)
+        x = np.random.random([10, 16]).astype('float32')
+        self.assertTrue(np.allclose(func(x), x + 1))
+        self.assertTrue(np.allclose(func(x + 10), x + 9))
+        # a new signature builds a new Program
+        y = np.random.random([4, 16]).astype('float32')
+        self.assertTrue(np.allclose(func(y), y + 1))
+        program_cache = jit._PROGRAM_CACHES[dyfunc_with_if_else.__code__]
+        self.assertEqual(len(program_cache), 2)
+
+    def test_signature(self):
+        cache = jit.ProgramCache(
+            jit._FUNCTION_CACHE.get_or_cache_func(dyfunc_with_if_else))
+        x = np.random.random([10, 16]).astype('float32')
+        for _ in range(3):
+            self.assertTrue(np.allclose(cache(x), x + 1))
+        self.assertEqual(len(cache), 1)
+        cache(np.random.random([4, 16]).astype('float32'))
+        self.assertEqual(len(cache), 2)
+        cache(x.astype('float64'))
+        self.assertEqual(len(cache), 3)
+
+    def test_dygraph_train_and_eval(self):
+        cache = jit.ProgramCache(
+            jit._FUNCTION_CACHE.get_or_cache_func(dyfunc_with_dropout))
+        x = np.ones([8, 16]).astype('float32')
+        with fluid.dygraph.guard(place):
+            x_v = fluid.dygraph.to_variable(x)
+            out, mean = cache(x_v)
+            self.assertTrue(isinstance(out, fluid.core.VarBase))
+            self.assertEqual(len(cache), 1)
+
+            fluid.framework._dygraph_tracer().eval_mode()
+            out, mean = cache(x_v)
+            self.assertEqual(len(cache), 2)
+            # dropout is downgraded in the test program
+            self.assertTrue(np.allclose(out.numpy(), x * 0.5))
+            fluid.framework._dygraph_tracer().train_mode()
+
+    def test_reject_gradient(self):
+        cache = jit.ProgramCache(
+            jit._FUNCTION_CACHE.get_or_cache_func(dyfunc_with_dropout))
+        x = np.ones([8, 16]).astype('float32')
+        with fluid.dygraph.guard(place):
+            x_v = fluid.dygraph.to_variable(x)
+            x_v.stop_gradient = False
+            with self.assertRaises(ValueError):
+                cache(x_v)
+            self.assertEqual(len(cache), 0)
+
+            # the results are detached from the inputs
+            x_v.stop_gradient = True
+            out, mean = cache(x_v)
+            self.assertTrue(out.stop_gradient)
+            self.assertTrue(mean.stop_gradient)
+
+    def test_shared_parameters(self):
+        cache = jit.ProgramCache(
+            jit._FUNCTION_CACHE.get_or_cache_func(dyfunc_with_fc))
+        x = np.random.random([8, 16]).astype('float32')
+        with fluid.dygraph.guard(place):
+            out = cache(fluid.dygraph.to_variable(x)).numpy()
+            # the Programs of the other batch size and of the eval mode
+            # compute with the same parameters
+            small_out = cache(fluid.dygraph.to_variable(x[:4])).numpy()
+            fluid.framework._dygraph_tracer().eval_mode()
+            eval_out = cache(fluid.dygraph.to_variable(x)).numpy()
+            fluid.framework._dygraph_tracer().train_mode()
+        self.assertEqual(len(cache), 3)
+        self.assertTrue(np.allclose(small_out, out[:4]))
+        self.assertTrue(np.allclose(eval_out, out))
+
+
+@unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                 "set RUN_BENCHMARK to run the benchmark")
+class TestProgramCacheBenchmark(unittest.TestCase):
+    def test_benchmark(self):
+        x = np.random.random([10, 16]).astype('float32')
+        func = dygraph_to_static_cached_output(dyfunc_with_if_else)
+        jit._FUNCTION_CACHE.clear()
+        jit._PROGRAM_CACHES.clear()
+
+        start = time.time()
+        func(x)
+        first_time = time.time() - start
+
+        repeat = 20
+        start = time.time()
+        for _ in range(repeat):
+            func(x)
+        cached_time = (time.time() - start) / repeat
+        print("dygraph_to_static_cached_output: first call %.4fs, cached "
+              "call %.4fs" % (first_time, cached_time))
+
+
+if __name__ == '__main__':
+    unittest.main()
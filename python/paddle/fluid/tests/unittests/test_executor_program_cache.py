@@ -0,0 +1,132 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import unittest
+
+import numpy
+import paddle.fluid as fluid
+import paddle.fluid.core as core
+from paddle.fluid.executor import _ProgramCache, _ProgramCacheEntry
+
+
+class FakeScope(object):
+    def __init__(self):
+        self.dropped = []
+
+    def _drop_kid(self, kid):
+        self.dropped.append(kid)
+
+
+class TestProgramCacheLRU(unittest.TestCase):
+    def put(self, cache, key, scope):
+        cache.put(key, _ProgramCacheEntry(None, None, key + "_scope", scope))
+
+    def test_evict_least_recently_used(self):
+        scope = FakeScope()
+        cache = _ProgramCache(capacity=2)
+        self.put(cache, "a", scope)
+        self.put(cache, "b", scope)
+        self.assertIsNotNone(cache.get("a", scope))
+        self.put(cache, "c", scope)
+
+        self.assertTrue("a" in cache)
+        self.assertFalse("b" in cache)
+        self.assertTrue("c" in cache)
+        self.assertEqual(scope.dropped, ["b_scope"])
+
+        stats = cache.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['evictions'], 1)
+
+    def test_other_parent_scope_misses(self):
+        scope = FakeScope()
+        cache = _ProgramCache(capacity=2)
+        self.put(cache, "a", scope)
+        self.assertIsNone(cache.get("a", FakeScope()))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_shrink_and_clear(self):
+        scope = FakeScope()
+        cache = _ProgramCache(capacity=3)
+        for key in ["a", "b", "c"]:
+            self.put(cache, key, scope)
+        cache.set_capacity(1)
+        self.assertEqual(len(cache), 1)
+        self.assertTrue("c" in cache)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(len(scope.dropped), 3)
+        self.assertRaises(ValueError, cache.set_capacity, 0)
+
+
+class TestExecutorProgramCache(unittest.TestCase):
+    def test_lru_with_fetch_lists(self):
+        main_program = fluid.Program()
+        startup_program = fluid.Program()
+        with fluid.program_guard(main_program, startup_program):
+            x = fluid.data(name='x', shape=[None, 4], dtype='float32')
+            y = fluid.layers.scale(x, scale=2.0)
+            z = fluid.layers.scale(x, scale=3.0)
+
+        place = core.CPUPlace()
+        exe = fluid.Executor(place)
+        exe.set_program_cache_capacity(1)
+        x_np = numpy.random.random((2, 4)).astype('float32')
+        scope = fluid.Scope()
+        with fluid.scope_guard(scope):
+            for fetch_list, scale in [([y], 2.0), ([y], 2.0), ([z], 3.0),
+                                      ([y], 2.0)]:
+                out, = exe.run(
+                    main_program,
+                    feed={'x': x_np},
+                    fetch_list=fetch_list,
+                    use_program_cache=True)
+                self.assertTrue(numpy.allclose(out, x_np * scale))
+
+        stats = exe.program_cache_stats()
+        self.assertEqual(stats['size'], 1)
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual(len(scope._kids()), 1)
+        self.assertGreater(stats['prepare_time'], 0.0)
+
+    def test_modified_program(self):
+        main_program = fluid.Program()
+        startup_program = fluid.Program()
+        with fluid.program_guard(main_program, startup_program):
+            x = fluid.data(name='x', shape=[None, 4], dtype='float32')
+            y = fluid.layers.scale(x, scale=2.0)
+
+        exe = fluid.Executor(core.CPUPlace())
+        x_np = numpy.random.random((2, 4)).astype('float32')
+        scope = fluid.Scope()
+        with fluid.scope_guard(scope):
+            for scale in [2.0, 3.0]:
+                # the program modified after the first run is prepared again
+                main_program.global_block().ops[0]._set_attr('scale', scale)
+                out, = exe.run(
+                    main_program,
+                    feed={'x': x_np},
+                    fetch_list=[y],
+                    use_program_cache=True)
+                self.assertTrue(numpy.allclose(out, x_np * scale))
+        self.assertEqual(exe.program_cache_stats()['misses'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+import paddle.fluid.core as core
+
+
+class TestExecutorZeroCopyFetch(unittest.TestCase):
+    def setUp(self):
+        self.main_program = fluid.Program()
+        startup_program = fluid.Program()
+        with fluid.program_guard(self.main_program, startup_program):
+            x = fluid.data(name='x', shape=[None, 8], dtype='float32')
+            self.y = fluid.layers.scale(x, scale=2.0)
+            self.z = fluid.layers.scale(x, scale=3.0)
+        self.exe = fluid.Executor(core.CPUPlace())
+
+    def run_program(self, x_np, **kwargs):
+        return self.exe.run(
+            self.main_program,
+            feed={'x': x_np},
+            fetch_list=[self.y, self.z],
+            **kwargs)
+
+    def test_zero_copy_fetch(self):
+        x_np = np.random.random((4, 8)).astype('float32')
+        y, z = self.run_program(x_np, zero_copy_fetch=True)
+        self.assertFalse(y.flags.writeable)
+        self.assertTrue(np.allclose(y, x_np * 2.0))
+        self.assertTrue(np.allclose(z, x_np * 3.0))
+
+        # the views of the previous run are not overwritten
+        x_np2 = np.random.random((4, 8)).astype('float32')
+        y2, _ = self.run_program(x_np2, zero_copy_fetch=True)
+        self.assertTrue(np.allclose(y, x_np * 2.0))
+        self.assertTrue(np.allclose(y2, x_np2 * 2.0))
+
+    def test_fetch_buffers(self):
+        x_np = np.random.random((4, 8)).astype('float32')
+        buf = np.zeros((4, 8), dtype='float32')
+        y, z = self.run_program(
+            x_np, fetch_buffers={self.y.name: buf}, use_program_cache=True)
+        self.assertTrue(y is buf)
+        self.assertTrue(np.allclose(buf, x_np * 2.0))
+        self.assertTrue(np.allclose(z, x_np * 3.0))
+
+    def test_fetch_buffers_mismatch(self):
+        x_np = np.random.random((4, 8)).astype('float32')
+        buf = np.zeros((2, 8), dtype='float32')
+        self.assertRaises(
+            ValueError,
+            self.run_program,
+            x_np,
+            fetch_buffers={self.y.name: buf})
+        self.assertRaises(
+            ValueError,
+            self.run_program,
+            x_np,
+            return_numpy=False,
+            fetch_buffers={self.y.name: buf})
+
+
+if __name__ == '__main__':
+    unittest.main()
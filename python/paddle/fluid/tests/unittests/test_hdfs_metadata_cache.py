@@ -0,0 +1,145 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import time
+import unittest
+
+from paddle.fluid.incubate.fleet.utils.hdfs import HDFSClient
+from test_hdfs_transfer import HDFSTestBase
+
+
+class TestHDFSMetadataCache(HDFSTestBase):
+    def setUp(self):
+        super(TestHDFSMetadataCache, self).setUp()
+        self.client = HDFSClient(
+            self.hadoop_home, {
+                'fs.default.name': self.fs_root,
+                'fake.log': self.log
+            },
+            metadata_ttl=10)
+
+    def write(self, rel, content='0'):
+        path = os.path.join(self.fs_root, *rel.strip('/').split('/'))
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write(content)
+
+    def test_stat(self):
+        self.write('/model/donefile.txt', 'abc')
+        self.write('/model/part/file')
+        result = self.client.stat(
+            ['/model', '/model/donefile.txt', '/not_exist', '/model/part/'])
+        self.assertEqual(self.commands('-stat'), 1)
+        self.assertTrue(result['/model']['is_dir'])
+        self.assertFalse(result['/model/donefile.txt']['is_dir'])
+        self.assertEqual(result['/model/donefile.txt']['size'], 3)
+        self.assertIsNone(result['/not_exist'])
+        self.assertTrue(result['/model/part/']['is_dir'])
+
+        # all the answers are cached, the missing path too
+        self.assertTrue(self.client.is_dir('/model'))
+        self.assertTrue(self.client.is_file('/model/donefile.txt'))
+        self.assertFalse(self.client.is_file('/model'))
+        self.assertFalse(self.client.is_exist('/not_exist'))
+        self.assertTrue(self.client.is_exist('/model/part'))
+        self.assertEqual(self.commands(), 1)
+
+    def test_stat_same_basename(self):
+        self.write('/b/x', 'abc')
+        self.write('/c/y', 'abcd')
+        self.write('/d/x/y', 'abcde')
+        result = self.client.stat(['/a/x', '/b/x', '/c/y'])
+        self.assertIsNone(result['/a/x'])
+        self.assertEqual(result['/b/x']['size'], 3)
+        self.assertEqual(result['/c/y']['size'], 4)
+
+        self.client.clear_metadata_cache()
+        result = self.client.stat(['/b/x', '/d/x', '/c/y', '/d/x/y'])
+        self.assertEqual(result['/b/x']['size'], 3)
+        self.assertTrue(result['/d/x']['is_dir'])
+        self.assertEqual(result['/c/y']['size'], 4)
+        self.assertEqual(result['/d/x/y']['size'], 5)
+
+    def test_list_cache(self):
+        self.write('/model/a')
+        self.write('/model/sub/b')
+        self.assertEqual(
+            sorted(self.client.ls('/model')), ['/model/a', '/model/sub'])
+        self.assertEqual(
+            sorted(self.client.lsr('/model')), ['/model/a', '/model/sub/b'])
+        commands = self.commands()
+        self.assertEqual(
+            sorted(self.client.ls('/model')), ['/model/a', '/model/sub'])
+        self.assertEqual(
+            self.client.lsr('/model', excludes=['/model/a']), ['/model/sub/b'])
+        self.assertEqual(self.commands(), commands)
+
+    def test_invalidate(self):
+        self.write('/model/a')
+        self.write('/model/sub/b')
+        self.assertTrue(self.client.is_file('/model/sub/b'))
+        self.assertEqual(len(self.client.lsr('/model')), 2)
+
+        self.client.delete('/model/sub')
+        self.assertFalse(self.client.is_exist('/model/sub/b'))
+        self.assertEqual(self.client.lsr('/model'), ['/model/a'])
+
+        self.assertFalse(self.client.is_exist('/model/c'))
+        self.client.rename('/model/a', '/model/c')
+        self.assertTrue(self.client.is_file('/model/c'))
+        self.assertFalse(self.client.is_exist('/model/a'))
+
+        self.assertFalse(self.client.is_exist('/output'))
+        self.client.makedirs('/output')
+        self.assertTrue(self.client.is_dir('/output'))
+
+        local_file = os.path.join(self.tmp_dir, 'donefile.txt')
+        with open(local_file, 'w') as f:
+            f.write('20200101\t0\n')
+        self.assertEqual(self.client.ls('/output'), [])
+        self.client.upload('/output', local_file)
+        self.assertEqual(self.client.ls('/output'), ['/output/donefile.txt'])
+        self.assertEqual(self.client.cat('/output/donefile.txt'), '20200101\t0')
+
+    def test_ttl(self):
+        client = HDFSClient(
+            self.hadoop_home, {
+                'fs.default.name': self.fs_root,
+                'fake.log': self.log
+            },
+            metadata_ttl=0.5)
+        self.assertFalse(client.is_exist('/model'))
+        # changed by others
+        self.write('/model/a')
+        self.assertFalse(client.is_exist('/model'))
+        time.sleep(0.6)
+        self.assertTrue(client.is_exist('/model'))
+
+        # the metadata is not cached by default
+        client = HDFSClient(self.hadoop_home, {
+            'fs.default.name': self.fs_root,
+            'fake.log': self.log
+        })
+        commands = self.commands()
+        self.assertTrue(client.is_exist('/model'))
+        self.assertTrue(client.is_exist('/model'))
+        self.assertEqual(self.commands(), commands + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,367 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import shutil
+import stat
+import sys
+import tempfile
+import time
+import unittest
+
+import paddle.fluid.incubate.fleet.utils.hdfs as hdfs
+from paddle.fluid.incubate.fleet.utils.hdfs import HDFSClient
+
+# A fake `hadoop fs` serving the HDFS paths from a local directory, the
+# fs.default.name config. Every command is appended to the fake.log config.
+# The first -get or -put of a file named flaky* fails after copying the files
+# before it.
+FAKE_HADOOP = '''
+import os
+import shutil
+import sys
+import time
+
+conf = {}
+args = []
+for arg in sys.argv[2:]:
+    if arg.startswith('-D') and not args:
+        key, value = arg[2:].split('=', 1)
+        conf[key] = value
+    else:
+        args.append(arg)
+root = conf['fs.default.name']
+with open(conf['fake.log'], 'a') as f:
+    f.write(' '.join(args) + '\\n')
+
+
+def local(path):
+    return os.path.join(root, path.lstrip('/'))
+
+
+def ls_line(path):
+    st = os.stat(local(path))
+    is_dir = os.path.isdir(local(path))
+    return '%s   3 user group %d %s %s' % (
+        'drwxr-xr-x' if is_dir else '-rw-r--r--', 0 if is_dir else st.st_size,
+        time.strftime('%Y-%m-%d %H:%M', time.localtime(st.st_mtime)), path)
+
+
+def copy(src, dst, sources, target):
+    for path in sources:
+        if os.path.basename(path).startswith('flaky'):
+            marker = os.path.join(root, '..', 'flaky_' + os.path.basename(path))
+            if not os.path.exists(marker):
+                open(marker, 'w').close()
+                sys.exit(1)
+        s = src(path)
+        d = dst(target)
+        if os.path.isdir(d):
+            d = os.path.join(d, os.path.basename(s))
+        if os.path.exists(d):
+            sys.stderr.write('File exists: %s\\n' % d)
+            sys.exit(1)
+        if os.path.isdir(s):
+            shutil.copytree(s, d)
+        else:
+            shutil.copy2(s, d)
+
+
+cmd, paths = args[0], args[1:]
+if cmd == '-test':
+    flag, path = paths
+    ok = os.path.isdir(local(path)) if flag == '-d' else \\
+        os.path.exists(local(path))
+    sys.exit(0 if ok else 1)
+elif cmd in ['-ls', '-lsr']:
+    path = paths[0].rstrip('/') or '/'
+    if not os.path.exists(local(path)):
+        sys.exit(1)
+    if not os.path.isdir(local(path)):
+        print(ls_line(path))
+    elif cmd == '-ls':
+        print('Found %d items' % len(os.listdir(local(path))))
+        for name in sorted(os.listdir(local(path))):
+            print(ls_line(path + '/' + name))
+    else:
+        for dirname, folders, files in os.walk(local(path)):
+            rel = os.path.relpath(dirname, local(path))
+            prefix = path if rel == '.' else path + '/' + rel
+            for name in sorted(folders + files):
+                print(ls_line(prefix + '/' + name))
+elif cmd == '-get':
+    copy(local, lambda p: p, paths[:-1], paths[-1])
+elif cmd == '-put':
+    copy(lambda p: p, local, paths[:-1], paths[-1])
+elif cmd == '-mkdir':
+    for path in paths:
+        if path != '-p' and not os.path.isdir(local(path)):
+            os.makedirs(local(path))
+elif cmd in ['-rm', '-rmr']:
+    code = 0
+    for path in paths:
+        if os.path.isdir(local(path)):
+            shutil.rmtree(local(path))
+        elif os.path.exists(local(path)):
+            os.remove(local(path))
+        else:
+            code = 1
+    sys.exit(code)
+elif cmd == '-mv':
+    os.rename(local(paths[0]), local(paths[1]))
+elif cmd == '-stat':
+    code = 0
+    for path in paths[1:]:
+        if not os.path.exists(local(path)):
+            sys.stderr.write("stat: `%s': No such file or directory\\n" % path)
+            code = 1
+            continue
+        st = os.stat(local(path))
+        is_dir = os.path.isdir(local(path))
+        print(paths[0].replace('%F', 'directory' if is_dir else 'regular file')
+              .replace('%b', str(0 if is_dir else st.st_size))
+              .replace('%Y', str(int(st.st_mtime * 1000)))
+              .replace('%n', os.path.basename(path.rstrip('/'))))
+    sys.exit(code)
+elif cmd == '-cat':
+    with open(local(paths[0])) as f:
+        sys.stdout.write(f.read())
+else:
+    sys.exit(255)
+'''
+
+
+class HDFSTestBase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.hadoop_home = os.path.join(self.tmp_dir, 'hadoop')
+        os.makedirs(os.path.join(self.hadoop_home, 'bin'))
+        hadoop_bin = os.path.join(self.hadoop_home, 'bin', 'hadoop')
+        with open(hadoop_bin, 'w') as f:
+            f.write('#!%s\n' % sys.executable)
+            f.write(FAKE_HADOOP)
+        os.chmod(hadoop_bin, os.stat(hadoop_bin).st_mode | stat.S_IEXEC)
+
+        self.fs_root = os.path.join(self.tmp_dir, 'fs')
+        os.makedirs(self.fs_root)
+        self.log = os.path.join(self.tmp_dir, 'calls.log')
+        self.client = HDFSClient(self.hadoop_home, {
+            'fs.default.name': self.fs_root,
+            'fake.log': self.log
+        })
+
+        self.manifest_home = hdfs._MANIFEST_HOME
+        hdfs._MANIFEST_HOME = os.path.join(self.tmp_dir, 'manifest')
+        self.retry_sleep = hdfs._RETRY_SLEEP_BASE_SECOND
+        hdfs._RETRY_SLEEP_BASE_SECOND = 0.01
+
+    def tearDown(self):
+        hdfs._MANIFEST_HOME = self.manifest_home
+        hdfs._RETRY_SLEEP_BASE_SECOND = self.retry_sleep
+        shutil.rmtree(self.tmp_dir)
+
+    def make_tree(self, root, file_num=20, prefix='part'):
+        files = {}
+        for i in range(file_num):
+            rel = '%s-%05d' % (prefix, i)
+            if i % 3 == 0:
+                rel = 'sub/' + rel
+            files[rel] = os.urandom(100 + i * 10)
+        files['big'] = os.urandom(1 << 16)
+        for rel, content in files.items():
+            path = os.path.join(root, *rel.split('/'))
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(content)
+        return files
+
+    def check_tree(self, root, files):
+        for rel, content in files.items():
+            with open(os.path.join(root, *rel.split('/')), 'rb') as f:
+                self.assertEqual(f.read(), content)
+
+    def commands(self, cmd=None):
+        if not os.path.exists(self.log):
+            return 0
+        with open(self.log) as f:
+            return len([l for l in f if cmd is None or l.startswith(cmd + ' ')])
+
+
+class TestHDFSTransfer(HDFSTestBase):
+    def test_download_and_resume(self):
+        files = self.make_tree(os.path.join(self.fs_root, 'model'))
+        local_path = os.path.join(self.tmp_dir, 'local')
+
+        downloads = self.client.download(
+            '/model', local_path, multi_processes=3, max_batch_files=4)
+        self.check_tree(local_path, files)
+        self.assertEqual(len(downloads), len(files))
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['transferred'], len(files))
+        self.assertEqual(stats['bytes'], sum(len(c) for c in files.values()))
+        self.assertEqual(stats['failed'], [])
+        self.assertGreater(stats['throughput'], 0)
+        # the files are batched into much fewer commands
+        self.assertEqual(self.commands('-get'), stats['commands'])
+        self.assertLess(stats['commands'], len(files) // 2)
+
+        # nothing to do when resumed
+        self.client.download('/model', local_path, multi_processes=3)
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['skipped'], len(files))
+        self.assertEqual(stats['commands'], 0)
+
+        # a corrupted file of the same size and a missing file are copied
+        with open(os.path.join(local_path, 'big'), 'wb') as f:
+            f.write(b'\0' * len(files['big']))
+        os.remove(os.path.join(local_path, 'sub', 'part-00003'))
+        self.client.download('/model', local_path, multi_processes=3)
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['transferred'], 2)
+        self.assertEqual(stats['skipped'], len(files) - 2)
+        self.check_tree(local_path, files)
+
+        self.client.download('/model', local_path, overwrite=True)
+        self.assertEqual(self.client.last_transfer_stats['transferred'],
+                         len(files))
+        self.check_tree(local_path, files)
+
+    def test_download_retry(self):
+        files = self.make_tree(os.path.join(self.fs_root, 'model'))
+        files.update(
+            self.make_tree(
+                os.path.join(self.fs_root, 'model'), 2, prefix='flaky'))
+        local_path = os.path.join(self.tmp_dir, 'local')
+        self.client.download('/model', local_path, multi_processes=2)
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['failed'], [])
+        self.assertEqual(stats['transferred'], len(files))
+        self.check_tree(local_path, files)
+
+    def test_upload_and_resume(self):
+        local_path = os.path.join(self.tmp_dir, 'local')
+        files = self.make_tree(local_path)
+
+        self.client.upload(
+            '/output/model', local_path, multi_processes=3, max_batch_files=4)
+        self.check_tree(os.path.join(self.fs_root, 'output', 'model'), files)
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['transferred'], len(files))
+        self.assertEqual(self.commands('-put'), stats['commands'])
+        self.assertLess(stats['commands'], len(files) // 2)
+
+        self.client.upload('/output/model', local_path)
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['skipped'], len(files))
+        self.assertEqual(stats['commands'], 0)
+
+        files['big'] = os.urandom(len(files['big']))
+        with open(os.path.join(local_path, 'big'), 'wb') as f:
+            f.write(files['big'])
+        self.client.upload('/output/model', local_path)
+        self.assertEqual(self.client.last_transfer_stats['transferred'], 1)
+        self.check_tree(os.path.join(self.fs_root, 'output', 'model'), files)
+
+    def test_upload_single_file(self):
+        local_file = os.path.join(self.tmp_dir, 'donefile.txt')
+        with open(local_file, 'w') as f:
+            f.write('20200101\t0\n')
+        self.client.makedirs('/output')
+        self.client.upload('/output', local_file, multi_processes=1)
+        self.assertEqual(self.client.cat('/output/donefile.txt'), '20200101\t0')
+
+        # uploaded as the path that does not exist
+        self.client.upload('/output/done', local_file, multi_processes=1)
+        self.assertTrue(self.client.is_file('/output/done'))
+        self.assertEqual(self.client.cat('/output/done'), '20200101\t0')
+
+    def test_paths_with_spaces(self):
+        self.assertEqual(
+            hdfs._parse_ls_line(
+                '-rw-r--r--   3 user group 12 2020-01-01 12:00 /a/my file'),
+            ('/a/my file', 12, '2020-01-01 12:00', False))
+        files = {'my file': b'1234', 'sub dir/part 0': b'5678'}
+        for rel, content in files.items():
+            path = os.path.join(self.fs_root, 'model', *rel.split('/'))
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(content)
+        local_path = os.path.join(self.tmp_dir, 'local')
+        self.client.download('/model', local_path)
+        self.assertEqual(self.client.last_transfer_stats['transferred'], 2)
+        self.check_tree(local_path, files)
+
+    def test_worker_error(self):
+        files = self.make_tree(os.path.join(self.fs_root, 'model'), 4)
+        local_path = os.path.join(self.tmp_dir, 'local')
+        file_md5 = hdfs._file_md5
+
+        def broken_md5(path):
+            if os.path.basename(path) == 'big':
+                raise IOError("broken md5")
+            return file_md5(path)
+
+        hdfs._file_md5 = broken_md5
+        try:
+            self.client.download(
+                '/model', local_path, multi_processes=2, max_batch_files=1)
+        finally:
+            hdfs._file_md5 = file_md5
+        # the error fails the batch only, the other batches are copied
+        stats = self.client.last_transfer_stats
+        self.assertEqual(stats['failed'], ['/model/big'])
+        self.assertEqual(stats['transferred'], len(files) - 1)
+
+    def test_manifest_dir(self):
+        files = self.make_tree(os.path.join(self.fs_root, 'model'), 4)
+        local_path = os.path.join(self.tmp_dir, 'local')
+        manifest_dir = os.path.join(self.tmp_dir, 'my_manifest')
+        self.client.download('/model', local_path, manifest_dir=manifest_dir)
+        self.assertEqual(len(os.listdir(manifest_dir)), 1)
+        self.assertFalse(os.path.exists(hdfs._MANIFEST_HOME))
+        self.client.download('/model', local_path, manifest_dir=manifest_dir)
+        self.assertEqual(self.client.last_transfer_stats['skipped'], len(files))
+
+        # nothing is recorded or skipped without resume
+        shutil.rmtree(manifest_dir)
+        for _ in range(2):
+            self.client.download(
+                '/model', local_path, resume=False, manifest_dir=manifest_dir)
+            self.assertEqual(self.client.last_transfer_stats['transferred'],
+                             len(files))
+        self.assertFalse(os.path.exists(manifest_dir))
+        self.check_tree(local_path, files)
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_download_benchmark(self):
+        self.make_tree(os.path.join(self.fs_root, 'model'), file_num=200)
+        for batch in [1, 32]:
+            local_path = os.path.join(self.tmp_dir, 'local_%d' % batch)
+            start = time.time()
+            self.client.download(
+                '/model', local_path, multi_processes=4, max_batch_files=batch)
+            stats = self.client.last_transfer_stats
+            print("max_batch_files %d: %d files by %d commands in %.2fs, "
+                  "%.2f MB/s" % (batch, stats['transferred'], stats['commands'],
+                                 time.time() - start, stats['throughput'] /
+                                 (1 << 20)))
+
+
+if __name__ == '__main__':
+    unittest.main()
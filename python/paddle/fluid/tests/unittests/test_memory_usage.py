@@ -65,5 +65,77 @@ class TestMemoryUsage(unittest.TestCase):
                 yield
 
 
+class TestEstimatePeakMemory(unittest.TestCase):
+    def build_program(self):
+        main_program = fluid.Program()
+        startup_program = fluid.Program()
+        with fluid.program_guard(main_program, startup_program):
+            x = fluid.data(name='x', shape=[None, 13], dtype='float32')
+            y = fluid.data(name='y', shape=[None, 1], dtype='float32')
+            hidden = fluid.layers.fc(input=x, size=64, act='relu')
+            hidden = fluid.layers.fc(input=hidden, size=64, act='relu')
+            y_predict = fluid.layers.fc(input=hidden, size=1)
+            cost = fluid.layers.square_error_cost(input=y_predict, label=y)
+            avg_cost = fluid.layers.mean(cost)
+            fluid.optimizer.Adam(learning_rate=0.001).minimize(avg_cost)
+        return main_program
+
+    def test_peak_memory(self):
+        program = self.build_program()
+        info = fluid.contrib.estimate_peak_memory(
+            program, batch_size=128, top_k=3)
+
+        # parameters of fc layers in float32
+        param_memory = (13 * 64 + 64 + 64 * 64 + 64 + 64 + 1) * 4
+        self.assertGreaterEqual(info['persistable_memory'], param_memory)
+        self.assertGreater(info['peak_memory'], info['persistable_memory'])
+        self.assertEqual(info['peak_op_type'],
+                         program.global_block().ops[info['peak_step']].type)
+        self.assertIn(info['peak_op_role'], ['forward', 'backward'])
+        self.assertEqual(
+            max(info['role_peak_memory'].values()), info['peak_memory'])
+        self.assertIn('optimize', info['role_peak_memory'])
+        self.assertEqual(len(info['top_vars']), 3)
+        memories = [memory for _, memory in info['top_vars']]
+        self.assertEqual(memories, sorted(memories, reverse=True))
+
+        larger = fluid.contrib.estimate_peak_memory(program, batch_size=1024)
+        self.assertGreater(larger['peak_memory'], info['peak_memory'])
+
+    def test_sub_block(self):
+        main_program = fluid.Program()
+        startup_program = fluid.Program()
+        with fluid.program_guard(main_program, startup_program):
+            x = fluid.data(name='x', shape=[None, 16], dtype='float32')
+            i = fluid.layers.fill_constant(shape=[1], dtype='int64', value=0)
+            n = fluid.layers.fill_constant(shape=[1], dtype='int64', value=4)
+            cond = fluid.layers.less_than(x=i, y=n)
+            while_op = fluid.layers.While(cond=cond)
+            with while_op.block():
+                hidden = fluid.layers.fc(input=x, size=256)
+                fluid.layers.increment(x=i, value=1, in_place=True)
+                fluid.layers.less_than(x=i, y=n, cond=cond)
+
+        info = fluid.contrib.estimate_peak_memory(main_program, batch_size=64)
+        self.assertEqual(info['peak_op_type'], 'while')
+        # the fc output inside the loop lives during the while op
+        self.assertGreaterEqual(
+            info['peak_memory'] - info['persistable_memory'], 64 * 256 * 4)
+
+    def test_find_max_batch_size(self):
+        program = self.build_program()
+        memory_limit = fluid.contrib.estimate_peak_memory(
+            program, batch_size=300)['peak_memory']
+        batch_size = fluid.contrib.find_max_batch_size(program, memory_limit)
+        self.assertGreaterEqual(batch_size, 300)
+        self.assertLessEqual(
+            fluid.contrib.estimate_peak_memory(
+                program, batch_size)['peak_memory'], memory_limit)
+        self.assertGreater(
+            fluid.contrib.estimate_peak_memory(
+                program, batch_size + 1)['peak_memory'], memory_limit)
+        self.assertEqual(fluid.contrib.find_max_batch_size(program, 0), 0)
+
+
 if __name__ == '__main__':
     unittest.main()
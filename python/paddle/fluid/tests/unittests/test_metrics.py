@@ -12,8 +12,12 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import pickle
+import time
 import unittest
 
+import numpy as np
 import paddle.fluid as fluid
 from paddle.fluid.framework import Program, program_guard
 
@@ -45,5 +49,129 @@ class TestMetricsDetectionMap(unittest.TestCase):
         print(str(program))
 
 
+def reference_auc(preds, labels, num_thresholds=4095):
+    stat_pos = [0] * (num_thresholds + 1)
+    stat_neg = [0] * (num_thresholds + 1)
+    for i, lbl in enumerate(labels):
+        bin_idx = int(preds[i, 1] * num_thresholds)
+        if lbl:
+            stat_pos[bin_idx] += 1.0
+        else:
+            stat_neg[bin_idx] += 1.0
+
+    tot_pos = 0.0
+    tot_neg = 0.0
+    auc = 0.0
+    idx = num_thresholds
+    while idx >= 0:
+        tot_pos_prev = tot_pos
+        tot_neg_prev = tot_neg
+        tot_pos += stat_pos[idx]
+        tot_neg += stat_neg[idx]
+        auc += abs(tot_neg - tot_neg_prev) * (tot_pos + tot_pos_prev) / 2.0
+        idx -= 1
+    return auc / tot_pos / tot_neg if tot_pos > 0.0 and tot_neg > 0.0 else 0.0
+
+
+def random_batch(batch_size):
+    class0_preds = np.random.random(size=(batch_size, 1))
+    preds = np.concatenate((class0_preds, 1 - class0_preds), axis=1)
+    labels = np.random.randint(2, size=(batch_size, 1))
+    return preds, labels
+
+
+class TestMetricsVectorized(unittest.TestCase):
+    def test_precision_recall(self):
+        preds = np.array([[0.1], [0.7], [0.8], [0.9], [0.2], [0.2], [0.3],
+                          [0.5], [0.8], [0.6]])
+        labels = np.array([[0], [1], [1], [1], [1], [0], [0], [0], [0], [0]])
+        precision = fluid.metrics.Precision()
+        recall = fluid.metrics.Recall()
+        precision.update(preds=preds, labels=labels)
+        recall.update(preds=preds, labels=labels)
+        self.assertEqual((precision.tp, precision.fp), (3, 2))
+        self.assertEqual((recall.tp, recall.fn), (3, 1))
+        self.assertAlmostEqual(precision.eval(), 3.0 / 5.0)
+        self.assertAlmostEqual(recall.eval(), 3.0 / 4.0)
+
+    def test_auc(self):
+        auc = fluid.metrics.Auc("ROC")
+        all_preds, all_labels = [], []
+        for _ in range(5):
+            preds, labels = random_batch(1000)
+            auc.update(preds=preds, labels=labels)
+            all_preds.append(preds)
+            all_labels.append(labels)
+        expected = reference_auc(
+            np.concatenate(all_preds), np.concatenate(all_labels))
+        self.assertAlmostEqual(auc.eval(), expected)
+
+        auc.reset()
+        self.assertEqual(auc.eval(), 0.0)
+
+    def test_merge(self):
+        preds, labels = random_batch(2000)
+
+        def create_metrics():
+            composite = fluid.metrics.CompositeMetric()
+            composite.add_metric(fluid.metrics.Precision())
+            composite.add_metric(fluid.metrics.Recall())
+            return composite, fluid.metrics.Auc("ROC")
+
+        total, total_auc = create_metrics()
+        total.update(preds=preds[:, 1:], labels=labels)
+        total_auc.update(preds=preds, labels=labels)
+
+        merged, merged_auc = create_metrics()
+        for begin in range(0, 2000, 500):
+            part, part_auc = create_metrics()
+            part.update(
+                preds=preds[begin:begin + 500, 1:],
+                labels=labels[begin:begin + 500])
+            part_auc.update(
+                preds=preds[begin:begin + 500],
+                labels=labels[begin:begin + 500])
+            # the states of workers are sent by pickle
+            merged.merge(pickle.loads(pickle.dumps(part)))
+            merged_auc.merge(pickle.loads(pickle.dumps(part_auc)))
+
+        for expected, result in zip(total.eval(), merged.eval()):
+            self.assertAlmostEqual(expected, result)
+        self.assertAlmostEqual(total_auc.eval(), merged_auc.eval())
+
+        accuracy = fluid.metrics.Accuracy()
+        accuracy.update(value=0.5, weight=10)
+        other = fluid.metrics.Accuracy()
+        other.update(value=1.0, weight=30)
+        self.assertAlmostEqual(accuracy.merge(other).eval(), 0.875)
+
+        self.assertRaises(TypeError, accuracy.merge, fluid.metrics.Recall())
+        self.assertRaises(ValueError,
+                          fluid.metrics.Auc("ROC").merge,
+                          fluid.metrics.Auc("ROC", num_thresholds=255))
+
+
+class TestMetricsBenchmark(unittest.TestCase):
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_auc_update_eval(self):
+        batch_size = 100000
+        preds, labels = random_batch(batch_size)
+
+        auc = fluid.metrics.Auc("ROC")
+        start = time.time()
+        auc.update(preds=preds, labels=labels)
+        result = auc.eval()
+        vectorized_time = time.time() - start
+
+        start = time.time()
+        expected = reference_auc(preds, labels)
+        loop_time = time.time() - start
+
+        print("Auc of %d samples: vectorized %.4fs, python loop %.4fs" %
+              (batch_size, vectorized_time, loop_time))
+        self.assertAlmostEqual(result, expected)
+
+
 if __name__ == '__main__':
     unittest.main()
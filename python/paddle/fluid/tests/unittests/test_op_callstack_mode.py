@@ -0,0 +1,123 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import time
+import unittest
+
+import paddle.fluid as fluid
+from simple_nets import simple_fc_net
+
+CALLSTACK_ATTR = fluid.core.op_proto_and_checker_maker.kOpCreationCallstackAttrName(
+)
+
+
+class TestOpCallstackMode(unittest.TestCase):
+    def tearDown(self):
+        fluid.set_op_callstack_mode('full')
+
+    def callstacks(self, program):
+        return [op.attr(CALLSTACK_ATTR) for op in program.global_block().ops]
+
+    def test_full(self):
+        fluid.set_op_callstack_mode('full')
+        program = fluid.Program()
+        with fluid.program_guard(program, fluid.Program()):
+            simple_fc_net()
+        callstacks = self.callstacks(program)
+        self.assertTrue(all(len(callstack) > 0 for callstack in callstacks))
+        # the innermost frame is the caller of Operator.__init__
+        self.assertIn('append_op', callstacks[0][0])
+
+    def test_off(self):
+        fluid.set_op_callstack_mode('off')
+        program = fluid.Program()
+        with fluid.program_guard(program, fluid.Program()):
+            fluid.optimizer.SGD(learning_rate=0.01).minimize(simple_fc_net())
+        callstacks = self.callstacks(program)
+        self.assertTrue(all(len(callstack) == 0 for callstack in callstacks))
+
+    def test_sampled(self):
+        fluid.set_op_callstack_mode('sampled', sample_interval=4)
+        program = fluid.Program()
+        with fluid.program_guard(program, fluid.Program()):
+            simple_fc_net()
+        callstacks = self.callstacks(program)
+        recorded = [callstack for callstack in callstacks if callstack]
+        self.assertGreater(len(recorded), 0)
+        self.assertLessEqual(len(recorded), len(callstacks) // 4 + 1)
+
+    def test_interned(self):
+        fluid.set_op_callstack_mode('interned', max_depth=5)
+        program = fluid.Program()
+        with fluid.program_guard(program, fluid.Program()):
+            simple_fc_net()
+        callstacks = self.callstacks(program)
+        for callstack in callstacks:
+            self.assertTrue(0 < len(callstack) <= 5)
+            self.assertTrue(callstack[0].startswith('  File "'))
+            self.assertIn('append_op', callstack[0])
+
+    def test_model_size(self):
+        sizes = {}
+        for mode in ['full', 'sampled', 'interned', 'off']:
+            fluid.set_op_callstack_mode(mode)
+            program = fluid.Program()
+            with fluid.program_guard(program, fluid.Program()):
+                fluid.optimizer.SGD(learning_rate=0.01).minimize(
+                    simple_fc_net())
+            sizes[mode] = len(program.desc.serialize_to_string())
+        self.assertLess(sizes['off'], sizes['sampled'])
+        self.assertLess(sizes['sampled'], sizes['full'])
+        self.assertLess(sizes['interned'], sizes['full'])
+
+    def test_invalid_mode(self):
+        self.assertRaises(ValueError, fluid.set_op_callstack_mode, 'unknown')
+        self.assertRaises(
+            ValueError,
+            fluid.set_op_callstack_mode,
+            'sampled',
+            sample_interval=0)
+
+
+class TestOpCallstackModeBenchmark(unittest.TestCase):
+    def tearDown(self):
+        fluid.set_op_callstack_mode('full')
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_build_time_and_model_size(self):
+        layer_num = 200
+        for mode in ['full', 'sampled', 'interned', 'off']:
+            fluid.set_op_callstack_mode(mode)
+            start = time.time()
+            program = fluid.Program()
+            with fluid.program_guard(program, fluid.Program()):
+                hidden = fluid.data(name='x', shape=[None, 16], dtype='float32')
+                for _ in range(layer_num):
+                    hidden = fluid.layers.fc(input=hidden, size=16, act='relu')
+                loss = fluid.layers.mean(hidden)
+                fluid.optimizer.SGD(learning_rate=0.01).minimize(loss)
+            build_time = time.time() - start
+            model_size = len(program.desc.serialize_to_string())
+            print(
+                "op callstack mode %s: %d ops built in %.3fs, "
+                ".pdmodel size %d bytes" % (mode, len(
+                    program.global_block().ops), build_time, model_size))
+
+
+if __name__ == '__main__':
+    unittest.main()
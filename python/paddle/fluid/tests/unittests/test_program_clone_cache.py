@@ -0,0 +1,178 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import time
+import unittest
+
+import numpy as np
+import paddle.compat as cpt
+import paddle.fluid as fluid
+
+
+def op_types(program):
+    return [op.type for op in program.global_block().ops]
+
+
+class TestProgramCloneCache(unittest.TestCase):
+    def setUp(self):
+        self.main_program = fluid.Program()
+        self.startup_program = fluid.Program()
+        with fluid.program_guard(self.main_program, self.startup_program):
+            hidden = fluid.data(name='x', shape=[None, 16], dtype='float32')
+            for _ in range(2):
+                hidden = fluid.layers.fc(input=hidden, size=16, act='relu')
+                hidden = fluid.layers.dropout(hidden, dropout_prob=0.5)
+            self.loss = fluid.layers.mean(hidden)
+
+    def minimize(self):
+        with fluid.program_guard(self.main_program, self.startup_program):
+            fluid.optimizer.SGD(learning_rate=0.01).minimize(self.loss)
+
+    def test_cached_clone(self):
+        self.minimize()
+        main_program = self.main_program
+        test_program = main_program.clone(for_test=True)
+        cache = main_program._test_clone_cache
+        self.assertIsNotNone(cache)
+        self.assertNotIn('sgd', op_types(test_program))
+        for op in test_program.global_block().ops:
+            if op.has_attr('is_test'):
+                self.assertTrue(op.attr('is_test'))
+
+        version = main_program._version
+        cloned = main_program.clone(for_test=True)
+        self.assertEqual(main_program._version, version)
+        self.assertIs(main_program._test_clone_cache, cache)
+        self.assertEqual(cloned.desc.serialize_to_string(),
+                         test_program.desc.serialize_to_string())
+        self.assertEqual(
+            sorted(cloned.global_block().vars.keys()),
+            sorted(test_program.global_block().vars.keys()))
+
+    def test_clones_are_independent(self):
+        self.minimize()
+        main_program, loss = self.main_program, self.loss
+        test_program = main_program.clone(for_test=True)
+        dropout = [
+            op for op in test_program.global_block().ops if op.type == 'dropout'
+        ][0]
+        dropout._set_attr('is_test', False)
+        with fluid.program_guard(test_program):
+            fluid.layers.scale(
+                test_program.global_block().var(loss.name), scale=2.0)
+
+        cloned = main_program.clone(for_test=True)
+        self.assertNotIn('scale', op_types(cloned))
+        for op in cloned.global_block().ops:
+            if op.type == 'dropout':
+                self.assertTrue(op.attr('is_test'))
+
+    def test_invalidate_on_change(self):
+        main_program, loss = self.main_program, self.loss
+        test_program = main_program.clone(for_test=True)
+        with fluid.program_guard(main_program):
+            fluid.layers.scale(loss, scale=2.0)
+        cloned = main_program.clone(for_test=True)
+        self.assertEqual(op_types(cloned), op_types(test_program) + ['scale'])
+
+        op = main_program.global_block().ops[0]
+        version = main_program._version
+        op._set_attr('use_mkldnn', True)
+        self.assertGreater(main_program._version, version)
+        cloned = main_program.clone(for_test=True)
+        self.assertTrue(cloned.global_block().ops[0].attr('use_mkldnn'))
+
+        # the desc is modified on the c++ end, and synced by _sync_with_cpp
+        block = main_program.global_block()
+        block.desc._remove_op(block.desc.op_size() - 1, block.desc.op_size())
+        block._sync_with_cpp()
+        cloned = main_program.clone(for_test=True)
+        self.assertEqual(op_types(cloned), op_types(test_program))
+
+    def test_invalidate_on_desc_change(self):
+        main_program = self.main_program
+        main_program.clone(for_test=True)
+        # the desc is modified on the c++ end without _sync_with_cpp, like
+        # the pruning in contrib/slim does
+        version = main_program._version
+        main_program.global_block().desc.find_var(cpt.to_bytes('x')).set_shape(
+            [-1, 32])
+        self.assertEqual(main_program._version, version)
+        cloned = main_program.clone(for_test=True)
+        self.assertEqual(cloned.global_block().var('x').shape, (-1, 32))
+
+    def test_lazy_ops(self):
+        self.minimize()
+        test_program = self.main_program.clone(for_test=True)
+        block = test_program.global_block()
+        self.assertFalse(block._ops_materialized)
+        self.assertEqual(len(block.ops), block.desc.op_size())
+        self.assertTrue(block._ops_materialized)
+        for index, op in enumerate(block.ops):
+            self.assertTrue(op.desc is block.desc.op(index))
+
+    def test_run_cloned_program(self):
+        self.minimize()
+        exe = fluid.Executor(fluid.CPUPlace())
+        scope = fluid.Scope()
+        with fluid.scope_guard(scope):
+            exe.run(self.startup_program)
+            feed = {'x': np.random.random((4, 16)).astype('float32')}
+            for _ in range(3):
+                test_program = self.main_program.clone(for_test=True)
+                first, = exe.run(
+                    test_program, feed=feed, fetch_list=[self.loss])
+                second, = exe.run(
+                    test_program, feed=feed, fetch_list=[self.loss])
+                self.assertTrue(np.array_equal(first, second))
+
+
+class TestProgramCloneCacheBenchmark(unittest.TestCase):
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_benchmark(self):
+        main_program = fluid.Program()
+        with fluid.program_guard(main_program, fluid.Program()):
+            hidden = fluid.data(name='x', shape=[None, 16], dtype='float32')
+            for _ in range(200):
+                hidden = fluid.layers.fc(input=hidden, size=16, act='relu')
+                hidden = fluid.layers.dropout(hidden, dropout_prob=0.5)
+            loss = fluid.layers.mean(hidden)
+            fluid.optimizer.SGD(learning_rate=0.01).minimize(loss)
+
+        start = time.time()
+        main_program.clone(for_test=True)
+        first_time = time.time() - start
+
+        repeat = 10
+        start = time.time()
+        for _ in range(repeat):
+            test_program = main_program.clone(for_test=True)
+        cached_time = (time.time() - start) / repeat
+
+        start = time.time()
+        len(test_program.global_block().ops)
+        materialize_time = time.time() - start
+
+        print("%d ops: first clone %.4fs, cached clone %.4fs, "
+              "creating the Operators %.4fs" % (len(
+                  main_program.global_block().ops), first_time, cached_time,
+                                                materialize_time))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import subprocess
+import sys
+import unittest
+
+import paddle.fluid as fluid
+from paddle.fluid.transpiler.ps_dispatcher import HashName, RoundRobin, LoadBalance
+
+
+def make_blocks():
+    # a few big tables split in blocks, and many small variables
+    blocks = []
+    for i, numel in enumerate([100000, 60000, 30000]):
+        block_num = 3
+        for j in range(block_num):
+            blocks.append("table_%d:%d:%d" % (i, j, numel // block_num))
+    for i in range(20):
+        blocks.append("var_%d:0:%d" % (i, 1000 + i * 100))
+    return blocks
+
+
+def loads(dispatcher, blocks):
+    eps = dispatcher.dispatch(blocks)
+    sizes = dict((ep, 0) for ep in dispatcher.eps)
+    for ep, block in zip(eps, blocks):
+        sizes[ep] += int(block.split(':')[2])
+    return sizes
+
+
+class TestHashName(unittest.TestCase):
+    def test_stable_hash(self):
+        eps = ["127.0.0.1:6007", "127.0.0.1:6008", "127.0.0.1:6009"]
+        blocks = make_blocks()
+        code = ("from paddle.fluid.transpiler.ps_dispatcher import HashName\n"
+                "print(HashName(%r).dispatch(%r))" % (eps, blocks))
+        outputs = set()
+        for seed in ['1', '2']:
+            env = dict(os.environ, PYTHONHASHSEED=seed)
+            outputs.add(
+                subprocess.check_output([sys.executable, '-c', code],
+                                        env=env).strip())
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(
+            HashName(eps).dispatch(blocks),
+            HashName(eps).dispatch(blocks))
+
+
+class TestLoadBalance(unittest.TestCase):
+    def setUp(self):
+        self.eps = ["127.0.0.1:6007", "127.0.0.1:6008", "127.0.0.1:6009"]
+
+    def test_balance(self):
+        blocks = make_blocks()
+        dispatcher = LoadBalance(self.eps)
+        sizes = loads(dispatcher, blocks)
+        rr_sizes = loads(RoundRobin(self.eps), blocks)
+        self.assertLess(
+            max(sizes.values()) - min(sizes.values()),
+            max(rr_sizes.values()) - min(rr_sizes.values()))
+        # LPT is at most 4/3 of the optimal makespan
+        total = sum(int(block.split(':')[2]) for block in blocks)
+        self.assertLessEqual(
+            max(sizes.values()), total / float(len(self.eps)) * 4 / 3)
+
+        report = dispatcher.load_report()
+        self.assertEqual(list(report.keys()), self.eps)
+        for ep in self.eps:
+            self.assertEqual(report[ep]["size"], sizes[ep])
+            self.assertEqual(report[ep]["load"], sizes[ep])
+        self.assertEqual(sum(r["count"] for r in report.values()), len(blocks))
+
+    def test_deterministic(self):
+        blocks = make_blocks()
+        self.assertEqual(
+            LoadBalance(self.eps).dispatch(blocks),
+            LoadBalance(self.eps).dispatch(blocks))
+
+    def test_reset(self):
+        blocks = make_blocks()
+        dispatcher = LoadBalance(self.eps)
+        eplist = dispatcher.dispatch(blocks)
+        report = dispatcher.load_report()
+
+        # dispatched var by var after reset, the same endpoints are given
+        dispatcher.reset()
+        again = []
+        for block in blocks:
+            again.extend(dispatcher.dispatch([block]))
+        self.assertEqual(again, eplist)
+        self.assertEqual(dispatcher.load_report(), report)
+
+        # the new variables are balanced with the dispatched ones
+        new_ep = dispatcher.dispatch(["new_var:0:1000"])[0]
+        self.assertEqual(dispatcher.load_report()[new_ep]["count"],
+                         report[new_ep]["count"] + 1)
+
+    def test_update_frequency(self):
+        blocks = ["emb.block%d:%d:100000" % (i, i) for i in range(2)]
+        blocks += ["fc_%d.w_0@GRAD:0:20000" % i for i in range(6)]
+
+        dispatcher = LoadBalance(self.eps)
+        eplist = dispatcher.dispatch(blocks)
+        counts = [dispatcher.load_report()[ep]["count"] for ep in eplist[:2]]
+        self.assertEqual(counts, [1, 1])
+
+        # the sparsely updated table blocks weigh much less
+        dispatcher = LoadBalance(self.eps, update_frequency={"emb": 0.1})
+        eplist = dispatcher.dispatch(blocks)
+        self.assertNotEqual(eplist[0], eplist[1])
+        report = dispatcher.load_report()
+        self.assertEqual([report[ep]["count"] for ep in eplist[:2]], [3, 3])
+        self.assertEqual([report[ep]["size"] for ep in eplist[:2]],
+                         [140000, 140000])
+        self.assertEqual(
+            sorted(r["load"] for r in report.values()), [40000, 50000, 50000])
+
+
+class TestLoadBalanceTranspile(unittest.TestCase):
+    def net_conf(self):
+        x = fluid.layers.data(name='x', shape=[1000], dtype='float32')
+        hidden = fluid.layers.fc(input=x, size=1000, act='relu')
+        hidden = fluid.layers.fc(input=hidden, size=100, act='relu')
+        y_predict = fluid.layers.fc(input=hidden, size=1, act=None)
+        y = fluid.layers.data(name='y', shape=[1], dtype='float32')
+        cost = fluid.layers.square_error_cost(input=y_predict, label=y)
+        avg_cost = fluid.layers.mean(cost)
+        fluid.optimizer.SGD(learning_rate=0.1).minimize(avg_cost)
+
+    def test_transpile(self):
+        main = fluid.Program()
+        startup = fluid.Program()
+        with fluid.unique_name.guard():
+            with fluid.program_guard(main, startup):
+                self.net_conf()
+
+        config = fluid.DistributeTranspilerConfig()
+        config.split_method = LoadBalance
+        t = fluid.DistributeTranspiler(config=config)
+        eps = "127.0.0.1:6174,127.0.0.1:6175,127.0.0.1:6176"
+        t.transpile(
+            0, program=main, pservers=eps, trainers=2, startup_program=startup)
+        trainer = t.get_trainer_program(wait_port=False)
+
+        # the gradients are sent to the pservers holding their parameters
+        grad_eps = dict()
+        for ep, mapping in t.param_grad_ep_mapping.items():
+            for var in mapping["grads"]:
+                grad_eps[var.name] = ep
+        for op in trainer.global_block().ops:
+            if op.type != "send" or not op.input("X"):
+                continue
+            names = op.attr("send_varnames") or op.input("X")
+            for name, ep in zip(names, op.attr("epmap")):
+                if name in grad_eps:
+                    self.assertEqual(grad_eps[name], ep)
+
+        report = t.ps_dispatcher.load_report()
+        sizes = [r["size"] for r in report.values()]
+        self.assertLessEqual(max(sizes), sum(sizes) / 3.0 * 4 / 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
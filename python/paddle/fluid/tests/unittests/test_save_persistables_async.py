@@ -0,0 +1,133 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+
+
+class TestSavePersistablesAsync(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.main_program = fluid.Program()
+        self.startup_program = fluid.Program()
+        with fluid.program_guard(self.main_program, self.startup_program):
+            x = fluid.data(name="x", shape=[-1, 10], dtype='float32')
+            y = fluid.layers.fc(x, 20)
+            y = fluid.layers.fc(y, 10)
+            loss = fluid.layers.reduce_mean(y)
+            fluid.optimizer.Adam(learning_rate=0.01).minimize(loss)
+        self.scope = fluid.core.Scope()
+        with fluid.scope_guard(self.scope):
+            exe = fluid.Executor(fluid.CPUPlace())
+            exe.run(self.startup_program)
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def get_persistables(self):
+        persistables = {}
+        for var in self.main_program.list_vars():
+            if fluid.io.is_persistable(var):
+                persistables[var.name] = np.array(
+                    self.scope.find_var(var.name).get_tensor())
+        return persistables
+
+    def test_save_and_load(self):
+        model_path = os.path.join(self.dirname, 'model')
+        base_map = self.get_persistables()
+        handle = fluid.io.save_persistables_async(
+            model_path,
+            main_program=self.main_program,
+            scope=self.scope,
+            shard_num=3)
+
+        # the snapshot is taken before returning, later updates are not saved
+        for name in base_map:
+            t = self.scope.find_var(name).get_tensor()
+            t.set(np.zeros_like(base_map[name]), fluid.CPUPlace())
+
+        self.assertTrue(handle.wait())
+        self.assertTrue(handle.done())
+        self.assertEqual(len(os.listdir(self.dirname)), 1)
+        self.assertEqual(
+            len([f for f in os.listdir(model_path) if f.startswith('__shard')]),
+            3)
+
+        program_state = fluid.load_program_state(model_path)
+        self.assertEqual(sorted(program_state.keys()), sorted(base_map.keys()))
+        for name, value in base_map.items():
+            self.assertTrue(np.array_equal(program_state[name], value))
+
+        with fluid.scope_guard(self.scope):
+            fluid.set_program_state(self.main_program, program_state)
+        for name, value in self.get_persistables().items():
+            self.assertTrue(np.array_equal(base_map[name], value))
+
+        params = fluid.io.get_program_parameter(self.main_program)
+        program_state = fluid.load_program_state(
+            model_path, var_list=params[:1])
+        self.assertEqual(list(program_state.keys()), [params[0].name])
+
+    def test_overwrite(self):
+        model_path = os.path.join(self.dirname, 'model')
+        fluid.io.save_persistables_async(
+            model_path, main_program=self.main_program,
+            scope=self.scope).wait()
+
+        base_map = self.get_persistables()
+        for name in base_map:
+            base_map[name] = base_map[name] + 1
+            t = self.scope.find_var(name).get_tensor()
+            t.set(base_map[name], fluid.CPUPlace())
+        fluid.io.save_persistables_async(
+            model_path, main_program=self.main_program,
+            scope=self.scope).wait()
+
+        self.assertEqual(os.listdir(self.dirname), ['model'])
+        program_state = fluid.load_program_state(model_path)
+        for name, value in base_map.items():
+            self.assertTrue(np.array_equal(program_state[name], value))
+
+    def test_not_replace_other_dir(self):
+        model_path = os.path.join(self.dirname, 'model')
+        os.makedirs(model_path)
+        with open(os.path.join(model_path, '__model__'), 'w') as f:
+            f.write('model')
+        self.assertRaises(
+            ValueError,
+            fluid.io.save_persistables_async,
+            model_path,
+            main_program=self.main_program,
+            scope=self.scope)
+        self.assertEqual(os.listdir(model_path), ['__model__'])
+
+    def test_invalid_shard_num(self):
+        self.assertRaises(
+            ValueError,
+            fluid.io.save_persistables_async,
+            os.path.join(self.dirname, 'model'),
+            main_program=self.main_program,
+            scope=self.scope,
+            shard_num=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -24,6 +24,7 @@ from paddle.fluid.optimizer import Adam
 from paddle.fluid.dygraph.base import to_variable
 from test_imperative_base import new_program_scope
 from paddle.fluid.executor import global_scope
+from paddle.fluid.checkpoint_file import load_state_file
 import numpy as np
 import six
 import pickle
@@ -745,8 +746,7 @@ class TestVariableInit(unittest.TestCase):
         fluid.core._create_loaded_parameter(parameter_list, new_scope,
                                             exe._default_executor)
         parameter_file_name = "./test_path.pdparams"
-        with open(parameter_file_name, 'rb') as f:
-            load_dict = pickle.load(f)
+        load_dict = load_state_file(parameter_file_name)
 
         for v in parameter_list:
             assert v.name in load_dict, \
@@ -761,8 +761,7 @@ class TestVariableInit(unittest.TestCase):
         fluid.core._create_loaded_parameter(opt_list, new_scope,
                                             exe._default_executor)
         opt_file_name = "./test_path.pdopt"
-        with open(opt_file_name, 'rb') as f:
-            load_dict = pickle.load(f)
+        load_dict = load_state_file(opt_file_name)
 
         for v in opt_list:
             assert v.name in load_dict, \
@@ -0,0 +1,138 @@
+#   Copyright (c) 2020 PaddlePaddle Authors. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import print_function
+
+import os
+import time
+import unittest
+
+import numpy as np
+import paddle.fluid as fluid
+from paddle.fluid.dygraph import Linear, TracedLayer, to_variable
+
+
+class SimpleNet(fluid.dygraph.Layer):
+    def __init__(self, feature_size, hidden_size, layer_num):
+        super(SimpleNet, self).__init__()
+        self._linears = [
+            self.add_sublayer(
+                'linear_%d' % i,
+                Linear(
+                    feature_size if i == 0 else hidden_size,
+                    hidden_size,
+                    act='relu')) for i in range(layer_num)
+        ]
+        self._dropout_prob = 0.5
+
+    def forward(self, x):
+        for linear in self._linears:
+            x = linear(x)
+        out = fluid.layers.dropout(
+            x, self._dropout_prob, is_test=not self.training)
+        return out, fluid.layers.reduce_mean(out)
+
+
+def random_input(batch_size, feature_size):
+    return np.random.random((batch_size, feature_size)).astype('float32')
+
+
+class TestTracedLayerFastPath(unittest.TestCase):
+    def setUp(self):
+        self.batch_size = 4
+        self.feature_size = 8
+
+    def trace(self, layer_num=2):
+        layer = SimpleNet(self.feature_size, 16, layer_num)
+        layer.eval()
+        in_x = to_variable(random_input(self.batch_size, self.feature_size))
+        _, traced_layer = TracedLayer.trace(layer, [in_x])
+        return layer, traced_layer
+
+    def test_fast_path(self):
+        with fluid.dygraph.guard():
+            layer, traced_layer = self.trace()
+            for _ in range(5):
+                in_np = random_input(self.batch_size, self.feature_size)
+                in_x = to_variable(in_np)
+                dygraph_outs = layer(in_x)
+                static_outs = traced_layer([in_x])
+                self.assertIsNotNone(traced_layer._prepared)
+                self.assertIsNone(traced_layer._compiled_program)
+                self.assertEqual(len(static_outs), 2)
+                for dygraph_out, static_out in zip(dygraph_outs, static_outs):
+                    self.assertTrue(isinstance(static_out, np.ndarray))
+                    self.assertTrue(
+                        np.allclose(dygraph_out.numpy(), static_out))
+
+                # numpy inputs are fed too
+                np_outs = traced_layer([in_np])
+                for static_out, np_out in zip(static_outs, np_outs):
+                    self.assertTrue(np.array_equal(static_out, np_out))
+
+    def test_compiled_path(self):
+        with fluid.dygraph.guard():
+            layer, traced_layer = self.trace()
+            traced_layer.set_strategy(build_strategy=fluid.BuildStrategy())
+            in_x = to_variable(random_input(self.batch_size, self.feature_size))
+            dygraph_outs = layer(in_x)
+            static_outs = traced_layer([in_x])
+            self.assertIsNone(traced_layer._prepared)
+            self.assertIsNotNone(traced_layer._compiled_program)
+            for dygraph_out, static_out in zip(dygraph_outs, static_outs):
+                self.assertTrue(np.allclose(dygraph_out.numpy(), static_out))
+
+    def test_switch(self):
+        with fluid.dygraph.guard():
+            layer, traced_layer = self.trace()
+            in_x = to_variable(random_input(self.batch_size, self.feature_size))
+            eval_out = traced_layer([in_x])[0]
+
+            traced_layer._switch(is_test=False)
+            self.assertIsNone(traced_layer._prepared)
+            train_out = traced_layer([in_x])[0]
+            # dropout zeroes some of the outputs in the train mode
+            self.assertFalse(np.allclose(eval_out, train_out))
+
+            traced_layer._switch(is_test=True)
+            self.assertTrue(np.allclose(eval_out, traced_layer([in_x])[0]))
+
+
+class TestTracedLayerFastPathBenchmark(unittest.TestCase):
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_benchmark(self):
+        repeat = 200
+        with fluid.dygraph.guard():
+            layer = SimpleNet(8, 16, 3)
+            layer.eval()
+            in_x = to_variable(random_input(4, 8))
+            _, fast_layer = TracedLayer.trace(layer, [in_x])
+            _, compiled_layer = TracedLayer.trace(layer, [in_x])
+            compiled_layer.set_strategy(build_strategy=fluid.BuildStrategy())
+
+            times = []
+            for traced_layer in [compiled_layer, fast_layer]:
+                traced_layer([in_x])
+                start = time.time()
+                for _ in range(repeat):
+                    traced_layer([in_x])
+                times.append((time.time() - start) / repeat)
+
+        print("per call latency: CompiledProgram %.6fs, "
+              "prepared context %.6fs" % tuple(times))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,7 +16,7 @@ from __future__ import print_function
 
 from .distribute_transpiler import DistributeTranspiler, DistributeTranspilerConfig
 from .memory_optimization_transpiler import memory_optimize, release_memory
-from .ps_dispatcher import HashName, RoundRobin
+from .ps_dispatcher import HashName, RoundRobin, LoadBalance
 
 __all__ = [
     "DistributeTranspiler",
@@ -24,5 +24,6 @@ __all__ = [
     "release_memory",
     "HashName",
     "RoundRobin",
+    "LoadBalance",
     "DistributeTranspilerConfig",
 ]
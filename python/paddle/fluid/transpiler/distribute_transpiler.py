@@ -151,9 +151,13 @@ class DistributeTranspilerConfig(object):
     .. py:attribute:: split_method (PSDispatcher)
 
           Methods of dispatching parameters for server,
-          :ref:`api_fluid_transpiler_RoundRobin` or
-          :ref:`api_fluid_transpiler_HashName` can be used and default is RoundRobin.
+          :ref:`api_fluid_transpiler_RoundRobin` ,
+          :ref:`api_fluid_transpiler_HashName` or
+          :ref:`api_fluid_transpiler_LoadBalance` can be used and default is RoundRobin.
           Try to choose the best method to balance loads for parameter servers.
+          The dispatcher used is kept as the :code:`ps_dispatcher` attribute of
+          the transpiler, e.g. to check the loads by
+          :code:`t.ps_dispatcher.load_report()` for LoadBalance.
 
     .. py:attribute:: min_block_size (int)
 
@@ -335,7 +339,7 @@ class DistributeTranspiler(object):
         if self.config.print_log:
             PRINT_LOG = True
         assert (self.config.min_block_size >= 8192)
-        assert (self.config.split_method.__bases__[0] == PSDispatcher)
+        assert (issubclass(self.config.split_method, PSDispatcher))
         self.counter_var = None
 
     def _set_server_config(self, server_config=None):
@@ -645,6 +649,7 @@ WIKI: https://github.com/PaddlePaddle/Fleet/blob/develop/markdown_doc/transpiler
         self.optimize_ops, self.params_grads = self._get_optimize_pass()
 
         ps_dispatcher = self.config.split_method(self.pserver_endpoints)
+        self.ps_dispatcher = ps_dispatcher
         self.table_name = find_distributed_lookup_table(self.origin_program)
         self.has_distributed_lookup_table = self.table_name != None
         self.param_name_to_grad_name = dict()
@@ -688,6 +693,15 @@ WIKI: https://github.com/PaddlePaddle/Fleet/blob/develop/markdown_doc/transpiler
 
         self.grad_name_to_send_dummy_out = dict()
 
+        # dispatch all the blocks at once before dispatching them var by var
+        # below, so that a dispatcher balancing the loads, like LoadBalance,
+        # sees all of them. The same endpoints are given again after reset.
+        ps_dispatcher.dispatch([
+            var for _, splited_vars in grad_var_mapping_items
+            for var in splited_vars
+        ])
+        ps_dispatcher.reset()
+
         for grad_varname, splited_vars in grad_var_mapping_items:
             eplist = ps_dispatcher.dispatch(splited_vars)
 
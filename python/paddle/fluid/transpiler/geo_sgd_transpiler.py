@@ -57,7 +57,7 @@ class GeoSgdTranspiler(DistributeTranspiler):
             self.config.split_method = RoundRobin
 
         assert (self.config.min_block_size >= 8192)
-        assert (self.config.split_method.__bases__[0] == PSDispatcher)
+        assert (issubclass(self.config.split_method, PSDispatcher))
 
     def transpile(self,
                   trainer_id,
@@ -14,6 +14,31 @@
 
 from __future__ import print_function
 
+import collections
+import re
+import zlib
+from functools import reduce
+
+import six
+
+from .. import core
+from ... import compat as cpt
+
+
+def _var_name(var):
+    if isinstance(var, six.string_types):
+        # the VarBlock strings "varname:offset:size" from slice_variable
+        return var.split(':')[0]
+    if hasattr(var, 'varname'):
+        return var.varname
+    return var.name
+
+
+def _stable_hash(name):
+    # the builtin hash() of str is randomized per process in python 3, while
+    # all the trainers should dispatch a variable to the same endpoint
+    return zlib.crc32(cpt.to_bytes(name)) & 0xffffffff
+
 
 class PSDispatcher(object):
     """
@@ -48,8 +73,8 @@ class PSDispatcher(object):
 
 class HashName(PSDispatcher):
     """
-    Hash variable names to several endpoints using python
-    "hash()" function.
+    Hash variable names to several endpoints using a stable hash function,
+    which gives the same endpoints in all the processes.
 
     Args:
         pserver_endpoints (list): list of endpoint(ip:port).
@@ -69,7 +94,7 @@ class HashName(PSDispatcher):
         super(self.__class__, self).__init__(pserver_endpoints)
 
     def _hash_block(self, block_str, total):
-        return hash(block_str) % total
+        return _stable_hash(block_str) % total
 
     def dispatch(self, varlist):
         """
@@ -80,7 +105,7 @@ class HashName(PSDispatcher):
         """
         eplist = []
         for var in varlist:
-            server_id = self._hash_block(var.name(), len(self._eps))
+            server_id = self._hash_block(_var_name(var), len(self._eps))
             server_for_param = self._eps[server_id]
             eplist.append(server_for_param)
         return eplist
@@ -123,3 +148,111 @@ class RoundRobin(PSDispatcher):
             if self._step >= len(self._eps):
                 self._step = 0
         return eplist
+
+
+class LoadBalance(PSDispatcher):
+    """
+    Distribute variables to several endpoints balancing their sizes, in bytes
+    for Variables and in elements for VarBlocks and their "name:offset:size"
+    strings, by the LPT (Longest Processing Time first) method: the variables
+    of a dispatch are sorted by their loads in descending order, and each of
+    them is put onto the endpoint with the least load so far. The load of a
+    variable is its size weighted by its expected update frequency, the
+    fraction of its rows updated in a step for a sparse table, which is 1 by
+    default. The ties are broken by a stable hash of the variable names, so
+    the assignment is the same in all the trainers.
+
+    The endpoints of the dispatched variables are recorded in order, after
+    :code:`reset` the same endpoints are given to the variables dispatched
+    again in the same order, as the parameters and their gradients are
+    dispatched one after the other in the transpiler.
+
+    Args:
+        pserver_endpoints (list): list of endpoint(ip:port).
+        update_frequency (dict, optional): the expected update frequencies of
+            the variables, keyed on the names of the parameters. Default None.
+
+    Examples:
+        .. code-block:: python
+
+        pserver_endpoints = ["127.0.0.1:6007", "127.0.0.1:6008"]
+        vars = ["var1:0:8192", "var1:1:8192", "var2:0:1024", "var3:0:4096"]
+
+        lb = LoadBalance(pserver_endpoints)
+        lb.dispatch(vars)
+        print(lb.load_report())
+
+    """
+
+    def __init__(self, pserver_endpoints, update_frequency=None):
+        super(LoadBalance, self).__init__(pserver_endpoints)
+        self._update_frequency = update_frequency or {}
+        self._assigned = []
+        self._sizes = [0] * len(self._eps)
+        self._loads = [0.0] * len(self._eps)
+        self._counts = [0] * len(self._eps)
+
+    def _origin_name(self, name):
+        name = name.split('@GRAD')[0]
+        return re.sub(r'\.block\d+$', '', name)
+
+    def _size(self, var):
+        if isinstance(var, six.string_types):
+            return int(var.split(':')[2])
+        if hasattr(var, 'varname'):
+            return var.size
+        numel = reduce(lambda x, y: x * y, [abs(d) for d in var.shape], 1)
+        return numel * core.size_of_dtype(var.dtype)
+
+    def _load(self, var, size):
+        name = self._origin_name(_var_name(var))
+        return size * float(self._update_frequency.get(name, 1.0))
+
+    def dispatch(self, varlist):
+        """
+        use `LoadBalance` method to dispatch variables with each parameter server.
+        Args:
+            varlist (list): a list of Variables, or VarBlocks
+
+        """
+        begin = self._step
+        replayed = len(self._assigned[begin:begin + len(varlist)])
+        new_vars = varlist[replayed:]
+        sizes = [self._size(var) for var in new_vars]
+        loads = [self._load(var, size) for var, size in zip(new_vars, sizes)]
+        eps_num = len(self._eps)
+
+        assigned = [None] * len(new_vars)
+        for i in sorted(range(len(new_vars)), key=lambda i: (-loads[i], i)):
+            offset = _stable_hash(_var_name(new_vars[i])) % eps_num
+            server_id = min(
+                range(eps_num),
+                key=lambda j: (self._loads[j], (j - offset) % eps_num))
+            self._sizes[server_id] += sizes[i]
+            self._loads[server_id] += loads[i]
+            self._counts[server_id] += 1
+            assigned[i] = server_id
+        self._assigned.extend(assigned)
+
+        self._step += len(varlist)
+        return [self._eps[i] for i in self._assigned[begin:self._step]]
+
+    def load_report(self):
+        """
+        Get the loads of the endpoints from the variables dispatched.
+
+        Returns:
+            OrderedDict: a map of pserver endpoint -> a dict with the number
+            of the variables as "count", their total size as "size", and
+            their total load weighted by the update frequencies as "load".
+            The sizes are counted in bytes for Variables, and in elements for
+            VarBlocks and their "name:offset:size" strings.
+        """
+        report = collections.OrderedDict()
+        for i, ep in enumerate(self._eps):
+            report[ep] = {
+                "count": self._counts[i],
+                "size": self._sizes[i],
+                "load": self._loads[i]
+            }
+        return report
@@ -14,24 +14,42 @@
 
 __all__ = [
     'cache', 'map_readers', 'buffered', 'compose', 'chain', 'shuffle',
-    'ComposeNotAligned', 'firstn', 'xmap_readers', 'multiprocess_reader'
+    'ComposeNotAligned', 'firstn', 'xmap_readers', 'multiprocess_reader',
+    'shared_memory_reader', 'streaming_shuffle', 'disk_cache'
 ]
 
-from threading import Thread
+from threading import Thread, Condition, Event
 import subprocess
 import multiprocessing
+import mmap
+import os
+import select
+import shutil
+import struct
 import six
 import sys
 
-from six.moves.queue import Queue
+from six.moves.queue import Queue, Empty, Full
+from six.moves import cPickle as pickle
 from six.moves import zip_longest
 from six.moves import map
 from six.moves import zip
 import itertools
+import json
 import random
+import traceback
 import zlib
+import numpy as np
 import paddle.compat as cpt
 
+try:
+    from multiprocessing.connection import wait as _wait_connections
+except ImportError:
+    # python2 has no multiprocessing.connection.wait, select only works with
+    # the pipes on Unix there
+    def _wait_connections(conns):
+        return select.select(conns, [], [])[0]
+
 
 def cache(reader):
     """
@@ -57,6 +75,273 @@ def cache(reader):
     return __impl__
 
 
+_DISK_CACHE_META = 'meta.json'
+
+
+def _disk_cache_slot_path(cache_dir, slot_idx, suffix):
+    return os.path.join(cache_dir, 'slot_%d.%s' % (slot_idx, suffix))
+
+
+class _DiskCacheWriter(object):
+    """
+    Write samples into a columnar cache directory. The data of each slot of
+    the samples is appended to a raw data file, and the offsets and shapes of
+    the samples are saved as arrays when the writer is closed.
+    """
+
+    def __init__(self, cache_dir, fingerprint):
+        self._cache_dir = cache_dir
+        self._tmp_dir = '%s.tmp.%d' % (cache_dir, os.getpid())
+        if os.path.exists(self._tmp_dir):
+            shutil.rmtree(self._tmp_dir)
+        os.makedirs(self._tmp_dir)
+        self._fingerprint = fingerprint
+        self._kind = None
+        self._slots = None
+        self._files = None
+        self._shapes = None
+        self._num_samples = 0
+
+    def write(self, sample):
+        if isinstance(sample, tuple):
+            kind, fields = 'tuple', sample
+        elif isinstance(sample, list):
+            kind, fields = 'list', sample
+        else:
+            kind, fields = 'single', [sample]
+
+        if self._slots is None:
+            self._kind = kind
+            self._slots = [self._new_slot(f) for f in fields]
+            self._files = [
+                open(_disk_cache_slot_path(self._tmp_dir, i, 'data'), 'wb')
+                for i in six.moves.range(len(fields))
+            ]
+            self._shapes = [[] for _ in fields]
+        elif kind != self._kind or len(fields) != len(self._slots):
+            raise ValueError(
+                "All the samples cached to disk should have the same "
+                "structure, but the sample %d is different from the first "
+                "one." % self._num_samples)
+
+        for i, field in enumerate(fields):
+            arr = np.asarray(field)
+            dtype = np.dtype(self._slots[i]['dtype'])
+            if arr.dtype != dtype:
+                if not np.can_cast(arr.dtype, dtype, 'same_kind'):
+                    raise ValueError(
+                        "The slot %d of sample %d has dtype %s, which can not "
+                        "be cached as %s." % (i, self._num_samples, arr.dtype,
+                                              dtype))
+                arr = arr.astype(dtype)
+            self._files[i].write(np.ascontiguousarray(arr).tobytes())
+            self._shapes[i].append(arr.shape)
+        self._num_samples += 1
+
+    def _new_slot(self, field):
+        if isinstance(field, np.ndarray):
+            py_type = 'ndarray'
+        elif isinstance(field, (list, tuple)):
+            py_type = 'list'
+        else:
+            py_type = 'scalar'
+        arr = np.asarray(field)
+        if arr.dtype.kind not in 'biuf':
+            raise TypeError(
+                "disk_cache only supports samples of numbers or "
+                "numpy.ndarray of numbers, but received %s." % arr.dtype)
+        return {'dtype': arr.dtype.str, 'type': py_type}
+
+    def close(self):
+        slots = self._slots if self._slots is not None else []
+        for i, slot in enumerate(slots):
+            self._files[i].close()
+            shapes = self._shapes[i]
+            if all(shape == shapes[0] for shape in shapes):
+                # all the samples of the slot have the same shape, so the
+                # data can be viewed as a single array without index
+                slot['shape'] = list(shapes[0])
+                continue
+            slot['shape'] = None
+            ndim = len(shapes[0])
+            if any(len(shape) != ndim for shape in shapes):
+                self.abort()
+                raise ValueError("The samples of slot %d have different "
+                                 "number of dimensions." % i)
+            shape_arr = np.array(shapes, dtype='int64').reshape([-1, ndim])
+            offsets = np.zeros([len(shapes) + 1], dtype='int64')
+            np.cumsum(np.prod(shape_arr, axis=1), out=offsets[1:])
+            np.save(
+                _disk_cache_slot_path(self._tmp_dir, i, 'shape.npy'), shape_arr)
+            np.save(
+                _disk_cache_slot_path(self._tmp_dir, i, 'offset.npy'), offsets)
+
+        meta = {
+            'fingerprint': self._fingerprint,
+            'num_samples': self._num_samples,
+            'kind': self._kind,
+            'slots': slots
+        }
+        with open(os.path.join(self._tmp_dir, _DISK_CACHE_META), 'w') as f:
+            f.write(json.dumps(meta))
+        # publish the cache at once, so that an interrupted first pass never
+        # leaves an incomplete cache behind
+        if os.path.exists(self._cache_dir):
+            shutil.rmtree(self._cache_dir)
+        os.rename(self._tmp_dir, self._cache_dir)
+
+    def abort(self):
+        if self._files is not None:
+            for f in self._files:
+                f.close()
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+class _DiskCacheReader(object):
+    """
+    Read the samples of a cache directory by np.memmap without any
+    deserialization.
+    """
+
+    def __init__(self, cache_dir, meta):
+        self._kind = meta['kind']
+        self._num_samples = meta['num_samples']
+        self._slots = []
+        for i, slot in enumerate(meta['slots']):
+            data_path = _disk_cache_slot_path(cache_dir, i, 'data')
+            dtype = np.dtype(slot['dtype'])
+            if os.path.getsize(data_path) > 0:
+                data = np.memmap(data_path, dtype=dtype, mode='r')
+            else:
+                # empty file can not be mapped
+                data = np.zeros([0], dtype=dtype)
+            if slot['shape'] is not None:
+                data = data.reshape([self._num_samples] + slot['shape'])
+                shapes, offsets = None, None
+            else:
+                shapes = np.load(
+                    _disk_cache_slot_path(cache_dir, i, 'shape.npy'))
+                offsets = np.load(
+                    _disk_cache_slot_path(cache_dir, i, 'offset.npy'))
+            self._slots.append((slot['type'], data, shapes, offsets))
+
+    def __len__(self):
+        return self._num_samples
+
+    def __getitem__(self, idx):
+        fields = []
+        for py_type, data, shapes, offsets in self._slots:
+            if shapes is None:
+                field = data[idx, ...]
+            else:
+                field = data[offsets[idx]:offsets[idx + 1]].reshape(shapes[idx])
+            if py_type == 'scalar':
+                field = field.item()
+            elif py_type == 'list':
+                field = field.tolist()
+            fields.append(field)
+        if self._kind == 'tuple':
+            return tuple(fields)
+        elif self._kind == 'list':
+            return fields
+        else:
+            return fields[0]
+
+
+def _load_disk_cache(cache_dir, fingerprint):
+    meta_path = os.path.join(cache_dir, _DISK_CACHE_META)
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, 'r') as f:
+        meta = json.loads(f.read())
+    if meta['fingerprint'] != fingerprint:
+        return None
+    return _DiskCacheReader(cache_dir, meta)
+
+
+def disk_cache(reader, cache_dir, fingerprint='', shuffle=False, seed=None):
+    """
+    Cache the reader data into a directory on disk, which works for data
+    larger than memory. Unlike :code:`cache`, :code:`reader()` is not called
+    when decorating.
+
+    At the first pass, the samples are output from ``reader`` as usual and
+    spilled to ``cache_dir`` at the same time. Each slot of the samples is
+    saved as a raw array of fixed dtype, with an index of offsets and shapes
+    if its samples have different shapes. The following passes replay the
+    cache by ``numpy.memmap`` without any deserialization, and
+    ``numpy.ndarray`` in the replayed samples are read-only views of the
+    cache files. Numbers and lists of numbers are returned as python objects.
+
+    The cache is published when the first pass finishes, and it is rebuilt
+    if ``fingerprint`` is different from the one it is built with, e.g. a
+    version or a hash of the data source and preprocessing options.
+
+    Args:
+        reader (generator): a reader object which yields data each time.
+            Each sample should be a number, a ``numpy.ndarray`` of numbers,
+            or a tuple or list of them, and its structure and data types
+            should be the same as the first sample.
+        cache_dir (str): the directory to save the cache.
+        fingerprint (str, optional): the fingerprint of the data to cache.
+            Default ''.
+        shuffle (bool, optional): whether to replay the cache in a random
+            order. The first pass is never shuffled. Default False.
+        seed (int, optional): the random seed to shuffle, the order of each
+            epoch is reproducible if set. Default None.
+
+    Returns:
+        generator: a decorated reader object which yields data from the
+        cache on disk.
+
+    Examples:
+        .. code-block:: python
+
+            import numpy as np
+            import paddle
+
+            def reader():
+                for i in range(100):
+                    yield np.random.random([3, 32, 32]).astype('float32'), i
+
+            cached_reader = paddle.reader.disk_cache(
+                reader, './data_cache', fingerprint='v1', shuffle=True)
+            for epoch in range(3):
+                for image, label in cached_reader():
+                    pass
+    """
+    fingerprint = str(fingerprint)
+    epoch = [0]
+
+    def __impl__():
+        if seed is None:
+            rng = np.random.RandomState()
+        else:
+            rng = np.random.RandomState((seed * 1000003 + epoch[0]) % (2**32))
+        epoch[0] += 1
+
+        cached = _load_disk_cache(cache_dir, fingerprint)
+        if cached is not None:
+            order = six.moves.range(len(cached))
+            if shuffle:
+                order = rng.permutation(len(cached))
+            for idx in order:
+                yield cached[idx]
+            return
+
+        writer = _DiskCacheWriter(cache_dir, fingerprint)
+        try:
+            for sample in reader():
+                writer.write(sample)
+                yield sample
+        except:
+            writer.abort()
+            six.reraise(*sys.exc_info())
+        writer.close()
+
+    return __impl__
+
+
 def map_readers(func, *readers):
     """
     Creates a data reader that outputs return value of function using
@@ -148,6 +433,186 @@ def shuffle(reader, buf_size):
     return data_reader
 
 
+class _ShuffleBuffer(object):
+    """
+    A buffer of samples used by streaming_shuffle. If the samples are
+    numpy.ndarray, or tuples or lists of numpy.ndarray, of the same shapes and
+    dtypes, they are stored in preallocated arrays instead of a list of python
+    objects. Once a sample does not fit the arrays, all the samples are moved
+    to a list.
+    """
+
+    def __init__(self, capacity):
+        self._capacity = capacity
+        self._size = 0
+        self._objects = None
+        self._arrays = None
+        self._kind = None
+
+    def __len__(self):
+        return self._size
+
+    def append(self, sample):
+        if self._objects is None and self._arrays is None:
+            self._init_storage(sample)
+        self._size += 1
+        if self._objects is not None:
+            self._objects.append(sample)
+        else:
+            self._set(self._size - 1, sample)
+
+    def replace(self, idx, sample):
+        old = self._get(idx)
+        self._set(idx, sample)
+        return old
+
+    def pop(self, idx):
+        old = self._get(idx)
+        last = self._size - 1
+        if idx != last:
+            self._set(idx, self._get(last))
+        if self._objects is not None:
+            self._objects.pop()
+        self._size -= 1
+        return old
+
+    def _init_storage(self, sample):
+        if isinstance(sample, np.ndarray):
+            kind, fields = 'single', [sample]
+        elif type(sample) in (tuple, list) and len(sample) > 0:
+            kind, fields = type(sample), sample
+        else:
+            kind, fields = None, None
+
+        if fields is None or not all(
+                isinstance(f, np.ndarray) and not f.dtype.hasobject
+                for f in fields):
+            self._objects = []
+            return
+        self._kind = kind
+        self._arrays = [
+            np.empty((self._capacity, ) + f.shape, dtype=f.dtype)
+            for f in fields
+        ]
+
+    def _fit(self, sample):
+        if self._kind == 'single':
+            fields = [sample]
+        elif type(sample) is self._kind:
+            fields = sample
+        else:
+            return None
+        if len(fields) != len(self._arrays):
+            return None
+        for f, arr in zip(fields, self._arrays):
+            if not isinstance(f, np.ndarray) or f.shape != arr.shape[1:] or \
+                    f.dtype != arr.dtype:
+                return None
+        return fields
+
+    def _get(self, idx):
+        if self._objects is not None:
+            return self._objects[idx]
+        fields = [arr[idx].copy() for arr in self._arrays]
+        if self._kind == 'single':
+            return fields[0]
+        return self._kind(fields)
+
+    def _set(self, idx, sample):
+        if self._objects is None:
+            fields = self._fit(sample)
+            if fields is not None:
+                for f, arr in zip(fields, self._arrays):
+                    arr[idx] = f
+                return
+            self._objects = [self._get(i) for i in six.moves.range(self._size)]
+            self._arrays = None
+        self._objects[idx] = sample
+
+
+def _interleave_readers(readers, rng):
+    iters = [r() for r in readers]
+    rng.shuffle(iters)
+    iters = [iter(it) for it in iters]
+    while iters:
+        idx = rng.randrange(len(iters))
+        try:
+            yield next(iters[idx])
+        except StopIteration:
+            iters[idx] = iters[-1]
+            iters.pop()
+
+
+def streaming_shuffle(reader, buf_size, seed=None):
+    """
+    This API creates a decorated reader that outputs the shuffled data like
+    :code:`shuffle`, but mixes the data continuously instead of shuffling
+    disjoint windows of ``buf_size`` samples.
+
+    Once the buffer is filled with ``buf_size`` samples, each new sample
+    replaces a randomly chosen sample in the buffer, which is output. So a
+    sample can be output at any position after it is read, and the output is
+    not blocky. If the samples are ``numpy.ndarray`` , or tuples of
+    ``numpy.ndarray`` , of the same shapes and dtypes, they are stored in
+    preallocated arrays to save the memory of python objects.
+
+    If ``reader`` is a list of readers, e.g. one reader for each shard file,
+    the samples are drawn from randomly chosen readers, which approximates
+    a global shuffle over data larger than memory.
+
+    Args:
+        reader(callable|list(callable)): the original reader, or a list of
+            readers, whose data will be shuffled.
+        buf_size(int): the size of shuffled buffer.
+        seed(int, optional): the random seed. If set, the output order of
+            each epoch, i.e. each call of the decorated reader, is
+            reproducible, and different epochs use different orders.
+            Default None.
+
+    Returns:
+        callable: a decorated reader.
+
+    Examples:
+        .. code-block:: python
+
+            import paddle
+
+            def shard_reader(shard_id):
+                def reader():
+                    for i in range(5):
+                        yield shard_id * 5 + i
+                return reader
+
+            shuffled_reader = paddle.reader.streaming_shuffle(
+                [shard_reader(0), shard_reader(1)], buf_size=3, seed=1)
+            for e in shuffled_reader():
+                print(e)
+            # outputs are 0~9 unordered arrangement
+    """
+    assert buf_size > 0, "buf_size must be larger than 0"
+    readers = list(reader) if isinstance(reader, (list, tuple)) else [reader]
+    epoch = [0]
+
+    def data_reader():
+        if seed is None:
+            rng = random.Random()
+        else:
+            rng = random.Random(seed * 1000003 + epoch[0])
+        epoch[0] += 1
+
+        buf = _ShuffleBuffer(buf_size)
+        for e in _interleave_readers(readers, rng):
+            if len(buf) < buf_size:
+                buf.append(e)
+            else:
+                yield buf.replace(rng.randrange(buf_size), e)
+
+        while len(buf) > 0:
+            yield buf.pop(rng.randrange(len(buf)))
+
+    return data_reader
+
+
 def chain(*readers):
     """
     Use the input data readers to create a chained data reader. The new created reader
@@ -361,21 +826,40 @@ class XmapEndSignal():
     pass
 
 
-def xmap_readers(mapper, reader, process_num, buffer_size, order=False):
+def xmap_readers(mapper,
+                 reader,
+                 process_num,
+                 buffer_size,
+                 order=False,
+                 backend='thread',
+                 chunk_size=1):
     """
-    Use multi-threads to map samples from reader by a mapper defined by user.
+    Use multi-threads or multi-processes to map samples from reader by a mapper defined by user.
 
     Args:
         mapper (callable): a function to map the data from reader.
         reader (callable): a data reader which yields the data. 
-        process_num (int): thread number to handle original sample.
+        process_num (int): thread or process number to handle original sample.
         buffer_size (int): size of the queue to read data in. 
         order (bool): whether to keep the data order from original reader. 
             Default False.
+        backend (str): 'thread' or 'process'. If 'process', the mapper runs in
+            ``process_num`` processes, which is not limited by the GIL, and the
+            samples and mapped results should be picklable. Default 'thread'.
+        chunk_size (int): only useful when ``backend`` is 'process', the number
+            of samples sent to a process at a time, increase it to reduce the
+            communication overhead of small samples. Default 1.
 
     Returns:
         callable: a decorated reader with data mapping. 
     """
+    if backend == 'process':
+        return _process_xmap_readers(mapper, reader, process_num, buffer_size,
+                                     order, chunk_size)
+    elif backend != 'thread':
+        raise ValueError("backend should be 'thread' or 'process', but "
+                         "received %s." % backend)
+
     end = XmapEndSignal()
 
     # define a worker to read samples from reader to in_queue
@@ -405,15 +889,18 @@ def xmap_readers(mapper, reader, process_num, buffer_size, order=False):
 
     # define a worker to handle samples from in_queue by mapper
     # and put mapped samples into out_queue by order
-    def order_handle_worker(in_queue, out_queue, mapper, out_order):
+    def order_handle_worker(in_queue, out_queue, mapper, out_order, order_cond):
         ins = in_queue.get()
         while not isinstance(ins, XmapEndSignal):
             order, sample = ins
             r = mapper(sample)
-            while order != out_order[0]:
-                pass
-            out_queue.put(r)
-            out_order[0] += 1
+            # wait until the samples before this one are put into out_queue
+            with order_cond:
+                while order != out_order[0]:
+                    order_cond.wait()
+                out_queue.put(r)
+                out_order[0] += 1
+                order_cond.notify_all()
             ins = in_queue.get()
         in_queue.put(end)
         out_queue.put(end)
@@ -422,6 +909,7 @@ def xmap_readers(mapper, reader, process_num, buffer_size, order=False):
         in_queue = Queue(buffer_size)
         out_queue = Queue(buffer_size)
         out_order = [0]
+        order_cond = Condition()
         # start a read worker in a thread
         target = order_read_worker if order else read_worker
         t = Thread(target=target, args=(reader, in_queue))
@@ -429,8 +917,8 @@ def xmap_readers(mapper, reader, process_num, buffer_size, order=False):
         t.start()
         # start several handle_workers
         target = order_handle_worker if order else handle_worker
-        args = (in_queue, out_queue, mapper, out_order) if order else (
-            in_queue, out_queue, mapper)
+        args = (in_queue, out_queue, mapper, out_order,
+                order_cond) if order else (in_queue, out_queue, mapper)
         workers = []
         for i in range(process_num):
             worker = Thread(target=target, args=args)
@@ -454,6 +942,153 @@ def xmap_readers(mapper, reader, process_num, buffer_size, order=False):
     return xreader
 
 
+class _XmapWorkerError(object):
+    def __init__(self, exc, tb):
+        self.exc = exc
+        self.tb = tb
+
+
+def _xmap_process_worker(mapper, in_queue, out_queue):
+    try:
+        chunk = in_queue.get()
+        while chunk is not None:
+            chunk_idx, samples = chunk
+            out_queue.put((chunk_idx, [mapper(sample) for sample in samples]))
+            chunk = in_queue.get()
+    except Exception as e:
+        tb = traceback.format_exc()
+        try:
+            pickle.dumps(e)
+        except Exception:
+            # the exception is sent back to the main process by pickle
+            e = RuntimeError("xmap_readers mapper raises an exception:\n" + tb)
+        out_queue.put(_XmapWorkerError(e, tb))
+    out_queue.put(None)
+
+
+def _process_xmap_readers(mapper, reader, process_num, buffer_size, order,
+                          chunk_size):
+    assert chunk_size > 0, "chunk_size must be larger than 0"
+
+    # with order, at most buffer_size chunks are dispatched ahead of the
+    # first chunk not yielded yet, which bounds the chunks waiting in
+    # reorder_buffer
+    window = max(buffer_size, 1)
+
+    def put(in_queue, item, stopped):
+        # put with a timeout so that the read thread notices the consumer
+        # has stopped instead of blocking on a full in_queue forever
+        while not stopped.is_set():
+            try:
+                in_queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                pass
+        return False
+
+    def dispatch(in_queue, chunk_idx, chunk, yielded, yielded_cond, stopped):
+        if order:
+            with yielded_cond:
+                while chunk_idx >= yielded[0] + window and \
+                        not stopped.is_set():
+                    yielded_cond.wait()
+        return put(in_queue, (chunk_idx, chunk), stopped)
+
+    def read_worker(in_queue, reader_error, yielded, yielded_cond, stopped):
+        try:
+            chunk_idx = 0
+            chunk = []
+            for sample in reader():
+                chunk.append(sample)
+                if len(chunk) == chunk_size:
+                    if not dispatch(in_queue, chunk_idx, chunk, yielded,
+                                    yielded_cond, stopped):
+                        return
+                    chunk_idx += 1
+                    chunk = []
+            if chunk:
+                dispatch(in_queue, chunk_idx, chunk, yielded, yielded_cond,
+                         stopped)
+        except Exception:
+            reader_error.append(sys.exc_info())
+        finally:
+            for _ in six.moves.range(process_num):
+                if not put(in_queue, None, stopped):
+                    break
+
+    def xreader():
+        in_queue = multiprocessing.Queue(buffer_size)
+        out_queue = multiprocessing.Queue(buffer_size)
+        reader_error = []
+        yielded = [0]
+        yielded_cond = Condition()
+        # set when the consumer stops iterating, maybe before the end
+        stopped = Event()
+        # the reader runs in a thread of the main process, so it needs not
+        # to be picklable
+        t = Thread(
+            target=read_worker,
+            args=(in_queue, reader_error, yielded, yielded_cond, stopped))
+        t.daemon = True
+        t.start()
+        workers = []
+        for _ in six.moves.range(process_num):
+            worker = multiprocessing.Process(
+                target=_xmap_process_worker, args=(mapper, in_queue, out_queue))
+            worker.daemon = True
+            worker.start()
+            workers.append(worker)
+
+        try:
+            # the chunks finished out of order wait in reorder_buffer until
+            # all the chunks before them are yielded
+            reorder_buffer = {}
+            finish = 0
+            while finish < process_num:
+                result = out_queue.get()
+                if result is None:
+                    finish += 1
+                    continue
+                if isinstance(result, _XmapWorkerError):
+                    sys.stderr.write(result.tb)
+                    raise result.exc
+                if not order:
+                    for r in result[1]:
+                        yield r
+                    continue
+                reorder_buffer[result[0]] = result[1]
+                while yielded[0] in reorder_buffer:
+                    for r in reorder_buffer.pop(yielded[0]):
+                        yield r
+                    with yielded_cond:
+                        yielded[0] += 1
+                        yielded_cond.notify()
+            if reader_error:
+                six.reraise(*reader_error[0])
+        finally:
+            # the consumer may stop early (break, islice), so wake up and
+            # stop the read thread, stop the workers and drain in_queue,
+            # otherwise its feeder thread blocks on the full pipe
+            stopped.set()
+            with yielded_cond:
+                yielded_cond.notify_all()
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+                worker.join()
+            t.join()
+            try:
+                while True:
+                    in_queue.get(timeout=0.1)
+            except Empty:
+                pass
+            in_queue.cancel_join_thread()
+            in_queue.close()
+            out_queue.close()
+
+    return xreader
+
+
 def multiprocess_reader(readers, use_pipe=True, queue_size=1000):
     """
     This API use python ``multiprocessing`` to read data from ``readers`` parallelly,
@@ -595,22 +1230,18 @@ def multiprocess_reader(readers, use_pipe=True, queue_size=1000):
                 target=_read_into_pipe, args=(reader, child_conn))
             p.start()
 
-        reader_num = len(readers)
-        finish_num = 0
-        conn_to_remove = []
-        while finish_num < reader_num:
-            for conn in conn_to_remove:
-                conns.remove(conn)
-            conn_to_remove = []
-            for conn in conns:
+        while conns:
+            # only receive from the readers which have data ready, so that
+            # a slow reader does not block the others
+            ready_conns = _wait_connections(conns)
+            for conn in ready_conns:
                 sample = json.loads(conn.recv())
                 if sample is None:
-                    finish_num += 1
                     conn.close()
-                    conn_to_remove.append(conn)
+                    conns.remove(conn)
                 elif sample == "":
                     conn.close()
-                    conn_to_remove.append(conn)
+                    conns.remove(conn)
                     raise ValueError("multiprocess reader raises an exception")
                 else:
                     yield sample
@@ -619,3 +1250,219 @@ def multiprocess_reader(readers, use_pipe=True, queue_size=1000):
         return pipe_reader
     else:
         return queue_reader
+
+
+_SLAB_READY_END = -1
+_SLAB_READY_ERROR = -2
+_SLAB_ALIGNMENT = 64
+
+
+def _align_slab_offset(offset):
+    return (offset + _SLAB_ALIGNMENT - 1) // _SLAB_ALIGNMENT * _SLAB_ALIGNMENT
+
+
+def _write_sample_to_slab(sample, buf, slab_offset, slab_size):
+    """
+    Write a sample into the slab starting at slab_offset of buf. The raw data
+    of numpy.ndarray fields is laid out from the first aligned offset of the
+    slab, followed by a json header recording the dtype, shape and offset of
+    each numpy.ndarray field and the value of other fields. The offset and
+    length of the header are stored at the beginning of the slab.
+    """
+    if isinstance(sample, tuple):
+        kind, fields = 'tuple', sample
+    elif isinstance(sample, list):
+        kind, fields = 'list', sample
+    else:
+        kind, fields = 'single', [sample]
+
+    descs = []
+    offset = _SLAB_ALIGNMENT
+    for field in fields:
+        # numpy scalars are not json serializable, so they are stored as 0-d
+        # arrays and read back as scalars
+        is_scalar = isinstance(field, np.generic)
+        if is_scalar:
+            field = np.asarray(field)
+        if isinstance(field, np.ndarray):
+            if field.dtype.hasobject:
+                raise TypeError(
+                    "numpy.ndarray of object dtype can not be put into "
+                    "shared memory")
+            if offset + field.nbytes <= slab_size:
+                dst = np.frombuffer(
+                    buf,
+                    dtype=field.dtype,
+                    count=field.size,
+                    offset=slab_offset + offset).reshape(field.shape)
+                dst[...] = field
+            desc = {'a': [field.dtype.str, list(field.shape), offset]}
+            if is_scalar:
+                desc['s'] = True
+            descs.append(desc)
+            offset = _align_slab_offset(offset + field.nbytes)
+        else:
+            descs.append({'v': field})
+
+    header = cpt.to_bytes(json.dumps({'k': kind, 'f': descs}))
+    if offset + len(header) > slab_size:
+        raise ValueError(
+            "The sample needs %d bytes which exceeds the slab size %d of "
+            "shared memory, please increase slab_size." % (offset + len(header),
+                                                           slab_size))
+    begin = slab_offset + offset
+    buf[begin:begin + len(header)] = header
+    struct.pack_into('<ii', buf, slab_offset, offset, len(header))
+
+
+def _read_sample_from_slab(buf, slab_offset, copy):
+    header_offset, header_len = struct.unpack_from('<ii', buf, slab_offset)
+    begin = slab_offset + header_offset
+    header = json.loads(cpt.to_text(buf[begin:begin + header_len]))
+    fields = []
+    for desc in header['f']:
+        if 'a' in desc:
+            dtype, shape, offset = desc['a']
+            dtype = np.dtype(dtype)
+            arr = np.frombuffer(
+                buf,
+                dtype=dtype,
+                count=int(np.prod(shape)),
+                offset=slab_offset + offset).reshape(shape)
+            if desc.get('s'):
+                arr = arr[()]
+            elif copy:
+                arr = arr.copy()
+            else:
+                arr.flags.writeable = False
+            fields.append(arr)
+        else:
+            fields.append(desc['v'])
+    if header['k'] == 'tuple':
+        return tuple(fields)
+    elif header['k'] == 'list':
+        return fields
+    else:
+        return fields[0]
+
+
+def _read_into_slabs(reader, conn, buf, slab_size, slab_num, free_slabs):
+    slab_idx = 0
+    try:
+        for sample in reader():
+            if sample is None:
+                raise ValueError("sample has None!")
+            free_slabs.acquire()
+            _write_sample_to_slab(sample, buf, slab_idx * slab_size, slab_size)
+            conn.send_bytes(struct.pack('<i', slab_idx))
+            slab_idx = (slab_idx + 1) % slab_num
+        conn.send_bytes(struct.pack('<i', _SLAB_READY_END))
+        conn.close()
+    except:
+        conn.send_bytes(struct.pack('<i', _SLAB_READY_ERROR))
+        conn.close()
+        six.reraise(*sys.exc_info())
+
+
+def shared_memory_reader(readers,
+                         slab_size=4 * 1024 * 1024,
+                         slab_num=8,
+                         zero_copy=False):
+    """
+    This API reads data from ``readers`` parallelly like :code:`multiprocess_reader`,
+    but transports the samples through shared memory instead of serializing them.
+
+    A separate process is created for each reader in the ``readers`` list. Each process
+    owns ``slab_num`` fixed-size slabs of shared memory used in a ring. The raw data of
+    ``numpy.ndarray`` fields is written into a slab once by the process, and only the
+    index of the slab is sent to the main process, so samples are not pickled. Numpy
+    scalars are stored in the same way. Other fields of a sample should be json
+    serializable, and tuples inside them are read back as lists. The main process
+    reads from whichever processes have samples ready, so a slow reader does not
+    block the others.
+
+    Parameters:
+       readers (list( ``generator`` ) | tuple( ``generator`` )): a python ``generator`` list
+           used to read input data
+       slab_size (int, optional): the size in bytes of each slab, it should be larger than
+           the largest sample. Default 4MB.
+       slab_num (int, optional): the number of slabs of each reader. Default 8.
+       zero_copy (bool, optional): whether to return the ``numpy.ndarray`` fields as
+           read-only views of the shared memory. The views are only valid until the next
+           sample is read from the returned reader, please copy them if they are kept for
+           longer. Default False, which copies the arrays out of the shared memory.
+
+    Returns:
+        ``generator``: a new reader which can be run parallelly
+
+    Examples:
+        .. code-block:: python
+
+            import numpy as np
+            import paddle
+
+            def generate_reader(index):
+                def _impl():
+                    for i in range(100):
+                        yield np.full([3, 32, 32], index, dtype='float32'), i
+                return _impl
+
+            reader = paddle.reader.shared_memory_reader(
+                [generate_reader(0), generate_reader(1)], slab_size=1024 * 1024)
+
+            for image, label in reader():
+                print(image.shape, label)
+    """
+
+    assert isinstance(readers, (list, tuple)) and len(readers) > 0
+    assert slab_num > 0, "slab_num must be larger than 0"
+    slab_size = _align_slab_offset(slab_size)
+
+    def __impl__():
+        conns = []
+        workers = {}
+        for reader in readers:
+            # an anonymous shared mapping is inherited by forked processes
+            buf = mmap.mmap(-1, slab_size * slab_num)
+            free_slabs = multiprocessing.Semaphore(slab_num)
+            parent_conn, child_conn = multiprocessing.Pipe(False)
+            p = multiprocessing.Process(
+                target=_read_into_slabs,
+                args=(reader, child_conn, buf, slab_size, slab_num, free_slabs))
+            p.daemon = True
+            p.start()
+            child_conn.close()
+            conns.append(parent_conn)
+            workers[parent_conn] = (p, buf, free_slabs)
+
+        try:
+            while conns:
+                ready_conns = _wait_connections(conns)
+                for conn in ready_conns:
+                    slab_idx, = struct.unpack('<i', conn.recv_bytes())
+                    if slab_idx == _SLAB_READY_END:
+                        conn.close()
+                        conns.remove(conn)
+                    elif slab_idx == _SLAB_READY_ERROR:
+                        raise ValueError(
+                            "multiprocess reader raises an exception")
+                    else:
+                        p, buf, free_slabs = workers[conn]
+                        sample = _read_sample_from_slab(
+                            buf, slab_idx * slab_size, copy=not zero_copy)
+                        if not zero_copy:
+                            free_slabs.release()
+                        yield sample
+                        if zero_copy:
+                            free_slabs.release()
+        finally:
+            for conn in conns:
+                conn.close()
+            # the shared memory is released once the zero-copy views
+            # of it are released
+            for p, _, _ in six.itervalues(workers):
+                if p.is_alive():
+                    p.terminate()
+                p.join()
+
+    return __impl__
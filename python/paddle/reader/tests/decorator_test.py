@@ -12,10 +12,16 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import os
+import shutil
+import tempfile
+import threading
 import time
 import unittest
 import functools
+import itertools
 
+import numpy as np
 import paddle.reader
 
 
@@ -123,6 +129,153 @@ class TestShuffle(unittest.TestCase):
             self.assertEqual(total, 10)
 
 
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.cache_root = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.cache_root, 'cache')
+        self.read_times = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_root)
+
+    def reader(self):
+        self.read_times += 1
+        for i in range(20):
+            # the second slot has variable shapes
+            yield np.full([2, 3], i, dtype='float32'), np.arange(i % 4), i
+
+    def check_sample(self, sample, i):
+        image, seq, label = sample
+        self.assertEqual(label, i)
+        self.assertTrue(np.all(image == i))
+        self.assertEqual(image.dtype, np.float32)
+        self.assertTrue(np.array_equal(seq, np.arange(i % 4)))
+
+    def test_replay(self):
+        reader = paddle.reader.disk_cache(self.reader, self.cache_dir, 'v1')
+        self.assertEqual(self.read_times, 0)
+        for epoch in range(3):
+            samples = list(reader())
+            self.assertEqual(len(samples), 20)
+            for i, sample in enumerate(samples):
+                self.check_sample(sample, i)
+        self.assertEqual(self.read_times, 1)
+        self.assertFalse(samples[0][0].flags.writeable)
+
+        # the cache is rebuilt when the fingerprint changes
+        reader = paddle.reader.disk_cache(self.reader, self.cache_dir, 'v2')
+        self.assertEqual(len(list(reader())), 20)
+        self.assertEqual(self.read_times, 2)
+
+    def test_interrupted_first_pass(self):
+        reader = paddle.reader.disk_cache(self.reader, self.cache_dir)
+        for i, _ in enumerate(reader()):
+            if i == 5:
+                break
+        self.assertFalse(os.path.exists(self.cache_dir))
+        self.assertEqual(len(list(reader())), 20)
+        self.assertEqual(self.read_times, 2)
+
+    def test_different_ndim(self):
+        def reader():
+            yield np.zeros([2]),
+            yield np.zeros([2, 2]),
+
+        reader = paddle.reader.disk_cache(reader, self.cache_dir)
+        with self.assertRaises(ValueError):
+            list(reader())
+        # the partially written cache is removed
+        self.assertEqual(os.listdir(self.cache_root), [])
+
+    def test_shuffle(self):
+        reader = paddle.reader.disk_cache(
+            self.reader, self.cache_dir, shuffle=True, seed=1)
+        list(reader())
+        epoch1 = [sample[2] for sample in reader()]
+        self.assertEqual(sorted(epoch1), list(range(20)))
+        self.assertNotEqual(epoch1, list(range(20)))
+        for sample in reader():
+            self.check_sample(sample, sample[2])
+
+
+class TestStreamingShuffle(unittest.TestCase):
+    def shard_creator(self, shard_id, num, as_array=False):
+        def reader():
+            for i in range(num):
+                idx = shard_id * num + i
+                if as_array:
+                    yield np.full([2, 3], idx, dtype='int64'), np.array([idx])
+                else:
+                    yield idx
+
+        return reader
+
+    def test_permutation(self):
+        for buf_size in (1, 7, 100):
+            reader = paddle.reader.streaming_shuffle(
+                self.shard_creator(0, 50), buf_size)
+            self.assertEqual(sorted(reader()), list(range(50)))
+
+    def test_array_samples(self):
+        readers = [self.shard_creator(i, 20, as_array=True) for i in range(3)]
+        reader = paddle.reader.streaming_shuffle(readers, 16, seed=1)
+        result = []
+        for data, label in reader():
+            self.assertTrue(np.all(data == label[0]))
+            result.append(int(label[0]))
+        self.assertEqual(sorted(result), list(range(60)))
+
+    def test_reproducible(self):
+        readers = [self.shard_creator(i, 100) for i in range(4)]
+        reader1 = paddle.reader.streaming_shuffle(readers, 32, seed=10)
+        reader2 = paddle.reader.streaming_shuffle(readers, 32, seed=10)
+        epoch0, epoch1 = list(reader1()), list(reader1())
+        self.assertEqual(epoch0, list(reader2()))
+        self.assertEqual(epoch1, list(reader2()))
+        self.assertNotEqual(epoch0, epoch1)
+
+    def test_quality(self):
+        num, buf_size = 20000, 100
+
+        def mean_displacement(reader):
+            result = list(reader())
+            return np.mean(np.abs(np.array(result) - np.arange(len(result))))
+
+        reader = self.shard_creator(0, num)
+        window_disp = mean_displacement(paddle.reader.shuffle(reader, buf_size))
+        stream_disp = mean_displacement(
+            paddle.reader.streaming_shuffle(reader, buf_size))
+        shard_disp = mean_displacement(
+            paddle.reader.streaming_shuffle(
+                [self.shard_creator(i, num // 10) for i in range(10)],
+                buf_size))
+        # windows of shuffle never move a sample across the window
+        self.assertLess(window_disp, buf_size)
+        self.assertGreater(shard_disp, stream_disp)
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_throughput(self):
+        num, buf_size = 20000, 100
+
+        def throughput(reader):
+            begin = time.time()
+            count = sum(1 for _ in reader())
+            self.assertEqual(count, num)
+            return count / (time.time() - begin)
+
+        reader = self.shard_creator(0, num)
+        window_qps = throughput(paddle.reader.shuffle(reader, buf_size))
+        stream_qps = throughput(
+            paddle.reader.streaming_shuffle(reader, buf_size))
+        shard_qps = throughput(
+            paddle.reader.streaming_shuffle(
+                [self.shard_creator(i, num // 10) for i in range(10)],
+                buf_size))
+        print("samples per second: window shuffle %.0f, streaming shuffle "
+              "%.0f, 10 shards %.0f" % (window_qps, stream_qps, shard_qps))
+
+
 class TestXmap(unittest.TestCase):
     def test_xmap(self):
         def mapper(x):
@@ -146,6 +299,88 @@ class TestXmap(unittest.TestCase):
                         for idx, e in enumerate(result):
                             self.assertEqual(e, mapper(idx))
 
+    def test_process_xmap(self):
+        def mapper(x):
+            return (x + 1)
+
+        for order in (True, False):
+            for process_num in (1, 4):
+                for chunk_size in (1, 3):
+                    reader = paddle.reader.xmap_readers(
+                        mapper,
+                        reader_creator_10(0),
+                        process_num,
+                        4,
+                        order,
+                        backend='process',
+                        chunk_size=chunk_size)
+                    result = list(reader())
+                    if not order:
+                        result.sort()
+                    self.assertEqual(result, [mapper(i) for i in range(10)])
+
+    def test_process_xmap_bounded_reorder(self):
+        def mapper(x):
+            if x == 0:
+                time.sleep(0.5)
+            return x
+
+        read = [0]
+
+        def reader():
+            for i in range(100):
+                read[0] += 1
+                yield i
+
+        buffer_size, chunk_size = 4, 2
+        reader = paddle.reader.xmap_readers(
+            mapper,
+            reader,
+            4,
+            buffer_size,
+            True,
+            backend='process',
+            chunk_size=chunk_size)
+        result = []
+        for sample in reader():
+            if not result:
+                # the reader stops dispatching while the first chunk is
+                # being mapped, so the later chunks do not pile up
+                self.assertLessEqual(read[0], (buffer_size + 1) * chunk_size)
+            result.append(sample)
+        self.assertEqual(result, list(range(100)))
+
+    def test_process_xmap_early_stop(self):
+        def mapper(x):
+            return x
+
+        def reader():
+            for i in range(10000):
+                yield i
+
+        threads = set(threading.enumerate())
+        for order in (True, False):
+            xreader = paddle.reader.xmap_readers(
+                mapper, reader, 2, 4, order, backend='process')
+            for sample in xreader():
+                if sample >= 10:
+                    break
+            self.assertEqual(len(list(itertools.islice(xreader(), 5))), 5)
+        # the read threads and the queue feeder threads are all stopped
+        self.assertFalse(set(threading.enumerate()) - threads)
+
+    def test_process_xmap_exception(self):
+        def mapper(x):
+            if x == 5:
+                raise ValueError("bad sample %d" % x)
+            return x
+
+        reader = paddle.reader.xmap_readers(
+            mapper, reader_creator_10(0), 2, 4, True, backend='process')
+        with self.assertRaises(ValueError):
+            for _ in reader():
+                pass
+
 
 class TestMultiProcessReader(unittest.TestCase):
     def setup(self):
@@ -175,5 +410,85 @@ class TestMultiProcessReader(unittest.TestCase):
         self.reader_test(use_pipe=True)
 
 
+class TestSharedMemoryReader(unittest.TestCase):
+    def reader_creator(self, index, num=200, shape=[3, 16, 16]):
+        def reader():
+            for i in range(num):
+                yield np.full(shape, index * num + i, dtype='float32'), [i], i
+
+        return reader
+
+    def check_samples(self, zero_copy):
+        readers = [self.reader_creator(i) for i in range(3)]
+        reader = paddle.reader.shared_memory_reader(
+            readers, slab_size=4096, slab_num=4, zero_copy=zero_copy)
+        labels = []
+        for image, label, idx in reader():
+            self.assertEqual(image.shape, (3, 16, 16))
+            self.assertEqual(image.dtype, np.float32)
+            self.assertEqual(image.flags.writeable, not zero_copy)
+            self.assertEqual(label, [idx])
+            self.assertTrue(np.all(image == image.flat[0]))
+            labels.append(int(image.flat[0]))
+        self.assertEqual(sorted(labels), list(range(600)))
+
+    def test_shared_memory_reader(self):
+        self.check_samples(zero_copy=False)
+        self.check_samples(zero_copy=True)
+
+    def test_numpy_scalar(self):
+        def reader():
+            for i in range(10):
+                yield np.full([2, 2], i, dtype='float32'), np.int64(i)
+
+        reader = paddle.reader.shared_memory_reader([reader], slab_size=1024)
+        for image, label in reader():
+            self.assertIsInstance(label, np.int64)
+            self.assertTrue(np.all(image == label))
+
+    def test_sample_exceeds_slab(self):
+        reader = paddle.reader.shared_memory_reader(
+            [self.reader_creator(0, shape=[64, 64])], slab_size=1024)
+        with self.assertRaises(ValueError):
+            for _ in reader():
+                pass
+
+    @unittest.skipIf(not os.environ.get('RUN_BENCHMARK'),
+                     "set RUN_BENCHMARK to run the benchmark")
+    def test_throughput(self):
+        num, shape = 100, [3, 64, 64]
+
+        def json_reader_creator(index):
+            def reader():
+                data = np.random.random(shape).astype('float32').tolist()
+                for i in range(num):
+                    yield data, i
+
+            return reader
+
+        def shm_reader_creator(index):
+            def reader():
+                data = np.random.random(shape).astype('float32')
+                for i in range(num):
+                    yield data, i
+
+            return reader
+
+        def throughput(reader):
+            begin = time.time()
+            count = sum(1 for _ in reader())
+            self.assertEqual(count, num * 2)
+            return count / (time.time() - begin)
+
+        json_qps = throughput(
+            paddle.reader.multiprocess_reader(
+                [json_reader_creator(i) for i in range(2)], use_pipe=True))
+        shm_qps = throughput(
+            paddle.reader.shared_memory_reader(
+                [shm_reader_creator(i) for i in range(2)], slab_size=64 * 1024))
+        print("json pipe: %.1f samples/s, shared memory: %.1f samples/s" %
+              (json_qps, shm_qps))
+
+
 if __name__ == '__main__':
     unittest.main()